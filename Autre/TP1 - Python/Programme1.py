@@ -4,33 +4,19 @@ Created on Fri Dec 13 10:48:29 2024
 
 @author: aciac
 """
+import os
 import re
+import sys
 
-def tab(file_path):
-    """
-    Fonction pour lire un fichier ICS ligne par ligne et stocker chaque ligne dans un tableau.
-
-    :param file_path: Le chemin du fichier .ics
-    :return: Liste contenant les lignes du fichier.
-    """
-    lines = []  # Initialisation de la liste pour stocker les lignes
-    try:
-        with open(file_path, 'r', encoding='utf-8') as file:
-            # Lire le fichier ligne par ligne et ajouter chaque ligne à la liste
-            for line in file:
-                lines.append(line.strip())  # Ajouter la ligne après suppression des espaces et retours à la ligne
-    except FileNotFoundError:
-        print(f"Erreur: Le fichier '{file_path}' n'a pas été trouvé.")
-    except IOError:
-        print(f"Erreur: Impossible d'ouvrir le fichier '{file_path}'.")
-
-    return lines
+# La lecture des calendriers ICS est partagée avec le dossier TP1
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "TP1"))
+from calendrier_ics import blocs_evenements
 
 def parse_ics(lines):
     """
     Analyse les lignes d'un fichier ICS pour extraire les informations nécessaires.
 
-    :param lines: Liste des lignes du fichier ICS
+    :param lines: Lignes logiques (dépliées) d'un événement ICS
     :return: Chaîne formatée selon les spécifications.
     """
     # Dictionnaire pour stocker les données d'événement
@@ -104,20 +90,26 @@ def main():
     # Définir le chemin du fichier .ics
     file_path = "evenementSAE_15.ics"
 
-    # Lire le fichier et obtenir les lignes dans un tableau
-    lignes = tab(file_path)
-
-    # Vérifier si des lignes ont été récupérées
-    if lignes:
-        print("Les lignes du fichier .ics sont :")
-        for i, ligne in enumerate(lignes, 1):
-            print(f"Ligne {i}: {ligne}")
+    # Lire le fichier un événement à la fois (lignes de continuation dépliées)
+    lu = False
+    try:
+        for lignes in blocs_evenements(file_path):
+            lu = True
+            print("Les lignes de l'événement sont :")
+            for i, ligne in enumerate(lignes, 1):
+                print(f"Ligne {i}: {ligne}")
+
+            # Analyser les lignes et afficher le résultat formaté
+            print("\nSortie formatée :")
+            print(parse_ics(lignes))
+    except FileNotFoundError:
+        print(f"Erreur: Le fichier '{file_path}' n'a pas été trouvé.")
+    except IOError:
+        print(f"Erreur: Impossible d'ouvrir le fichier '{file_path}'.")
 
-        # Analyser les lignes et afficher le résultat formaté
-        print("\nSortie formatée :")
-        print(parse_ics(lignes))
-    else:
-        print("Aucune ligne lue du fichier.")
+    # Vérifier si des événements ont été lus
+    if not lu:
+        print("Aucun événement lu du fichier.")
 
 # Point d'entrée du programme
 if __name__ == "__main__":
@@ -4,33 +4,19 @@ Created on Fri Dec 13 11:11:35 2024
 
 @author: aciac
 """
+import os
 import re
+import sys
 
-def tab(file_path):
-    """
-    Fonction pour lire un fichier ICS ligne par ligne et stocker chaque ligne dans un tableau.
-
-    :param file_path: Le chemin du fichier .ics
-    :return: Liste contenant les lignes du fichier.
-    """
-    lines = []  # Initialisation de la liste pour stocker les lignes
-    try:
-        with open(file_path, 'r', encoding='utf-8') as file:
-            # Lire le fichier ligne par ligne et ajouter chaque ligne à la liste
-            for line in file:
-                lines.append(line.strip())  # Ajouter la ligne après suppression des espaces et retours à la ligne
-    except FileNotFoundError:
-        print(f"Erreur: Le fichier '{file_path}' n'a pas été trouvé.")
-    except IOError:
-        print(f"Erreur: Impossible d'ouvrir le fichier '{file_path}'.")
-
-    return lines
+# La lecture des calendriers ICS est partagée avec le dossier TP1
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "TP1"))
+from calendrier_ics import blocs_evenements
 
 def parse_event(lines):
     """
     Analyse les lignes d'un fichier ICS pour extraire les informations d'un événement unique.
 
-    :param lines: Liste des lignes représentant un événement ICS
+    :param lines: Liste des lignes logiques (dépliées) représentant un événement ICS
     :return: Chaîne formatée selon les spécifications ou "vide" pour les champs manquants.
     """
     # Dictionnaire pour stocker les données d'événement
@@ -110,19 +96,15 @@ def parse_ics(file_path):
     :param file_path: Le chemin du fichier ICS
     :return: Liste de chaînes de caractères formatées
     """
-    lines = tab(file_path)
     events = []
-    current_event = []
-
-    for line in lines:
-        if line == "BEGIN:VEVENT":
-            current_event = []  # Démarrer un nouvel événement
-        elif line == "END:VEVENT":
-            # Ajouter l'événement analysé à la liste
-            events.append(parse_event(current_event))
-            current_event = []
-        else:
-            current_event.append(line)
+    try:
+        # Un événement à la fois, lignes de continuation dépliées
+        for lines in blocs_evenements(file_path):
+            events.append(parse_event(lines))
+    except FileNotFoundError:
+        print(f"Erreur: Le fichier '{file_path}' n'a pas été trouvé.")
+    except IOError:
+        print(f"Erreur: Impossible d'ouvrir le fichier '{file_path}'.")
 
     return events
 
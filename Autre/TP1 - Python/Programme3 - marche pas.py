@@ -4,33 +4,20 @@ Created on Fri Dec 13 11:24:13 2024
 
 @author: aciac
 """
+import os
 import re
+import sys
 
-def tab(file_path):
-    """
-    Fonction pour lire un fichier ICS ligne par ligne et stocker chaque ligne dans un tableau.
-
-    :param file_path: Le chemin du fichier .ics
-    :return: Liste contenant les lignes du fichier.
-    """
-    lines = []  # Initialisation de la liste pour stocker les lignes
-    try:
-        with open(file_path, 'r', encoding='utf-8') as file:
-            # Lire le fichier ligne par ligne et ajouter chaque ligne à la liste
-            for line in file:
-                lines.append(line.strip())  # Ajouter la ligne après suppression des espaces et retours à la ligne
-    except FileNotFoundError:
-        print(f"Erreur: Le fichier '{file_path}' n'a pas été trouvé.")
-    except IOError:
-        print(f"Erreur: Impossible d'ouvrir le fichier '{file_path}'.")
-
-    return lines
+# La lecture des calendriers et le calendrier indexé sont partagés avec le dossier TP1
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "TP1"))
+from calendrier_ics import blocs_evenements
+from index_evenements import TYPES_SEANCE, CalendrierIndexe
 
 def parse_event(lines):
     """
     Analyse les lignes d'un fichier ICS pour extraire les informations d'un événement unique.
 
-    :param lines: Liste des lignes représentant un événement ICS
+    :param lines: Liste des lignes logiques (dépliées) représentant un événement ICS
     :return: Dictionnaire contenant les données de l'événement.
     """
     # Dictionnaire pour stocker les données d'événement
@@ -96,54 +83,44 @@ def parse_ics(file_path):
     :param file_path: Le chemin du fichier ICS
     :return: Liste de dictionnaires représentant les événements
     """
-    lines = tab(file_path)
     events = []
-    current_event = []
-
-    for line in lines:
-        if line == "BEGIN:VEVENT":
-            current_event = []  # Démarrer un nouvel événement
-        elif line == "END:VEVENT":
-            # Ajouter l'événement analysé à la liste
-            events.append(parse_event(current_event))
-            current_event = []
-        else:
-            current_event.append(line)
+    try:
+        # Un événement à la fois, lignes de continuation dépliées
+        for lines in blocs_evenements(file_path):
+            events.append(parse_event(lines))
+    except FileNotFoundError:
+        print(f"Erreur: Le fichier '{file_path}' n'a pas été trouvé.")
+    except IOError:
+        print(f"Erreur: Impossible d'ouvrir le fichier '{file_path}'.")
 
     return events
 
-def filter_events(events):
+def filter_events(calendrier, groupes=("A", "B")):
     """
     Filtre les événements pour ne garder que ceux liés à la ressource R1.07 et aux groupes spécifiques.
 
-    :param events: Liste de dictionnaires représentant les événements
-    :return: Liste de tuples (date, durée, type de séance)
+    :param calendrier: CalendrierIndexe des événements
+    :param groupes: Groupes retenus pour les TD et TP ("A" couvre TD A, TP A1 et TP A2)
+    :return: Liste de tuples (date, durée, type de séance), par date
     """
-    filtered = []
-    for event in events:
-        summary = event["SUMMARY"]
-        if "R1.07" in summary:
-            if "TP A" in summary or "TP B" in summary:
-                session_type = "TP"
-            elif "TD A" in summary or "TD B" in summary:
-                session_type = "TD"
-            elif "S1" in summary or "CM" in summary:
-                session_type = "CM"
-            else:
-                session_type = "vide"
-
-            filtered.append((event["DATE"], event["DURATION"], session_type))
-    return filtered
+    seances = {}
+    for session_type in TYPES_SEANCE:
+        # Les CM sont donnés à toute la promotion ("RT1-S1") : ils concernent tous les groupes
+        recherches = [{}] if session_type == "CM" else [{"groupe": groupe} for groupe in groupes]
+        for criteres in recherches:
+            for event in calendrier.rechercher(ressource="R1.07", type_seance=session_type, **criteres):
+                seances[event["UID"]] = (event["DTSTART"], event["DATE"], event["DURATION"], session_type)
+    return [(date, duration, session_type) for _, date, duration, session_type in sorted(seances.values())]
 
 def main():
     # Définir le chemin du fichier .ics
     file_path = "ADE_RT1_Septembre2023_Decembre2023.ics"  # Exemple de fichier
 
-    # Analyser le fichier ICS pour obtenir la liste des événements
-    events = parse_ics(file_path)
+    # Analyser le fichier ICS et indexer les événements (une seule fois)
+    calendrier = CalendrierIndexe(parse_ics(file_path))
 
     # Filtrer les événements pour ne garder que ceux de R1.07 liés aux groupes spécifiques
-    filtered_events = filter_events(events)
+    filtered_events = filter_events(calendrier)
 
     # Afficher chaque événement filtré
     print("\nSéances de R1.07 (Informatique) pour les groupes spécifiques :")
@@ -1,58 +1,42 @@
-def tab(file_path):
-    """
-    Fonction pour lire un fichier ICS ligne par ligne et stocker chaque ligne dans un tableau.
-    
-    :param file_path: Le chemin du fichier .ics
-    :return: Liste contenant les lignes du fichier.
-    """
-    lines = []  # Initialisation de la liste pour stocker les lignes
-    try:
-        with open(file_path, 'r', encoding='utf-8') as file:
-            # Lire le fichier ligne par ligne et ajouter chaque ligne à la liste
-            for line in file:
-                lines.append(line.strip())  # Ajouter la ligne après suppression des espaces et retours à la ligne
-    except FileNotFoundError:
-        print(f"Erreur: Le fichier '{file_path}' n'a pas été trouvé.")
-    except IOError:
-        print(f"Erreur: Impossible d'ouvrir le fichier '{file_path}'.")
-    
-    return lines
+import os
+import sys
+
+# L'index plein texte du calendrier est partagé avec le dossier TP1
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "TP1"))
+from index_texte import charger_index
 
-def rechercheFlag(mot, lignes):
+def rechercheFlag(mot, index, tous=True):
     """
-    Recherche un mot dans chaque ligne d'un tableau et affiche les lignes contenant ce mot.
-    
-    :param mot: Le mot à rechercher.
-    :param lignes: La liste des lignes dans lesquelles chercher.
+    Recherche un ou plusieurs mots dans l'index du calendrier et affiche les événements qui les contiennent,
+    par date de début.
+
+    :param mot: Le ou les mots à rechercher (casse et accents ignorés, "mot*" pour un préfixe).
+    :param index: IndexTexte du calendrier (voir charger_index()).
+    :param tous: True pour les événements contenant tous les mots, False pour au moins un.
     """
-    print(f"\nRecherche du mot '{mot}' dans les lignes :")
-    found = False  # Variable pour savoir si on a trouvé au moins une ligne
-    for i, ligne in enumerate(lignes, 1):
-        if mot.lower() in ligne.lower():  # Recherche insensible à la casse
-            print(f"Ligne {i}: {ligne}")
-            found = True
-    
-    if not found:
-        print(f"Aucune ligne ne contient le mot '{mot}'.")
+    print(f"\nRecherche du mot '{mot}' dans les événements :")
+    evenements = index.rechercher(mot, tous)
+    for evenement in evenements:
+        print(f"{evenement['DTSTART']} : {evenement['SUMMARY']} ({evenement['LOCATION']})")
+
+    if not evenements:
+        print(f"Aucun événement ne contient le mot '{mot}'.")
 
 def main():
     # Définir le chemin du fichier .ics
     file_path = "testEv.ics"
-    
-    # Appeler la fonction tab pour lire le fichier et obtenir les lignes dans un tableau
-    lignes = tab(file_path)
-    
-    # Afficher les lignes récupérées (facultatif)
-    if lignes:
-        print("Les lignes du fichier .ics sont :")
-        for i, ligne in enumerate(lignes, 1):
-            print(f"Ligne {i}: {ligne}")
-    else:
-        print("Aucune ligne lue du fichier.")
-    
-    # Recherche d'un mot spécifique dans les lignes
+
+    # Charger l'index du calendrier (relu depuis le disque s'il est à jour, sinon construit)
+    try:
+        index = charger_index(file_path)
+    except FileNotFoundError:
+        print(f"Erreur: Le fichier '{file_path}' n'a pas été trouvé.")
+        return
+    print(f"{len(index)} événements indexés.")
+
+    # Recherche d'un mot spécifique dans les événements
     mot_a_rechercher = "LACAN"  # Exemple de mot à rechercher
-    rechercheFlag(mot_a_rechercher, lignes)
+    rechercheFlag(mot_a_rechercher, index)
 
 # Point d'entrée du programme
 if __name__ == "__main__":
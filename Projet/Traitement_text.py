@@ -5,17 +5,45 @@ Created on Fri Dec 13 12:00:00 2024
 Programme pour traiter le fichier texte "Fichier texte à traiter.txt"
 """
 
-import re
-import markdown
-import matplotlib.pyplot as plt
+import argparse
+import contextlib
+import glob
+import io
+import json
 import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 
-# Définition des patterns
-Ip_pattern = re.compile(r'IP (\S+)')
-Ip_pattern4 = re.compile(r'IP (\S+)')
-IP_pattern3 = re.compile(r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}')
-IP_pattern5 = re.compile(r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}')
-port_pattern = re.compile(r'\.\d+$')
+# matplotlib, markdown, NumPy (colonnes_paquets) et le pool de processus sont importés
+# dans les fonctions qui s'en servent : à eux seuls ils prendraient l'essentiel du
+# temps de démarrage, pour des exécutions qui souvent n'en ont pas besoin
+from decompression import EXTENSIONS, compression_fichier, ouvrir_capture
+from detection_debit import MoteurDebit, formater_horodatage
+from esquisses import HyperLogLog, PlusFrequents
+from lecteur_pcap import decoder_paquets, format_capture, lire_capture, lire_enregistrements, ligne_tcpdump
+from parseur_tcpdump import lire_entetes, lire_paquets, parse_tcpdump_line
+from rapport_incremental import (ecrire_instantane, ecrire_sections, empreinte_donnees, joindre_lignes, lire_instantane,
+                                 sections_inchangees)
+from suivi_connexions import LIBELLES_STATUTS, SuiviConnexions
+from symboles import TableSymboles
+
+# Ports conservés par filtrer_lignes_interessantes() en plus de TCP et ICMP
+PORTS_INTERESSANTS = {"http", "https", "ssh"}
+
+# Rapports produits par ecrire_rapports()
+FICHIER_CSV = "Projet/adresses_extraites.csv"
+FICHIER_GRAPHIQUE = "Projet/Activité-suspect.png"
+FICHIER_MARKDOWN = "Projet/compte_rendu.md"
+FICHIER_HTML = "Projet/compte_rendu.html"
+FICHIER_EMPREINTES = "Projet/.empreintes_rapports.json"
+
+# Formats de rapport disponibles (option --format)
+FORMATS = ("csv", "png", "md", "html")
+
+# Capture analysée quand aucune n'est donnée sur la ligne de commande
+CAPTURE_DEFAUT = "Projet/tcpdump_old.txt"
 
 def convertir_markdown_en_html(contenu_markdown):
     """
@@ -24,6 +52,7 @@ def convertir_markdown_en_html(contenu_markdown):
     :param contenu_markdown: Texte du fichier Markdown
     :return: Texte HTML
     """
+    import markdown
     return markdown.markdown(contenu_markdown)
 
 def enregistrer_html(contenu_html, file_path):
@@ -56,126 +85,911 @@ def generer_markdown(nombre_trames, visites_sources, visites_destinations, fichi
         if "BP-Linux8" in visites_sources:
             mdfile.write(f"- **BP-Linux8** : {visites_sources['BP-Linux8']} requêtes\n")
 
-def Analyser(log_contents):
-    with open(log_contents, "r") as f:
-        http = https = domaine = ssh = icmp = icmp_req = icmp_rep = ipa = flags_connexion = flags_SynAcK = flags_deco = flags_push = flags_nokonnexion = compteur = 0
-        suspect = {}
-        occurence = {} 
-        allip = {}
-
-        for line in f:
-            if '.domain' in line:
+class StatistiquesTrafic:
+    """
+    Compteurs de l'analyse d'une capture. Ce sont tous des sommes : deux objets
+    calculés sur deux morceaux d'une capture se fusionnent sans perte.
+
+    Les hôtes sont internés une fois dans une TableSymboles : les compteurs par hôte
+    sont des listes indexées par identifiant, et les noms ne sont retrouvés que pour
+    les résultats (propriétés occurence et allip).
+    """
+    __slots__ = ("compteurs", "symboles", "adresses", "sources", "ordre_sources")
+
+    # Ordre des compteurs simples (protocoles et flags)
+    NOMS_COMPTEURS = ("http", "https", "domaine", "ssh", "icmp_req", "icmp_rep", "compteur",
+                      "flags_connexion", "flags_SynAcK", "flags_deco", "flags_push", "flags_nokonnexion")
+
+    def __init__(self):
+        self.compteurs = dict.fromkeys(self.NOMS_COMPTEURS, 0)
+        self.symboles = TableSymboles()
+        self.adresses = []        # identifiant -> apparitions de l'hôte, en source comme en destination
+        self.sources = []         # identifiant -> requêtes émises par l'hôte
+        self.ordre_sources = []   # identifiants des hôtes ayant émis, dans l'ordre de leur première requête
+
+    def hote(self, nom):
+        """
+        :param nom: Nom d'hôte ou adresse
+        :return: Identifiant de l'hôte, ses compteurs étant créés (à zéro) s'il est nouveau
+        """
+        identifiant = self.symboles.chercher(nom)
+        if identifiant < 0:
+            identifiant = self.symboles.identifiant(nom)
+            self.adresses.append(0)
+            self.sources.append(0)
+        return identifiant
+
+    @property
+    def occurence(self):
+        """
+        :return: Dictionnaire source -> requêtes, dans l'ordre de première requête
+        """
+        noms, sources = self.symboles.noms, self.sources
+        return {noms[i]: sources[i] for i in self.ordre_sources}
+
+    @property
+    def allip(self):
+        """
+        :return: Dictionnaire adresse -> apparitions, dans l'ordre de première apparition
+        """
+        return self.symboles.traduire(range(len(self.adresses)), self.adresses)
+
+    def compter_protocoles(self, paquets):
+        """
+        Compte protocoles et flags au passage puis retransmet chaque paquet, pour que
+        ajouter_paquets() n'ait plus qu'à compter les adresses.
+
+        :param paquets: Itérable de Paquet
+        :return: Générateur des mêmes paquets
+        """
+        http = https = domaine = ssh = icmp_req = icmp_rep = flags_connexion = flags_SynAcK = flags_deco = flags_push = flags_nokonnexion = compteur = 0
+
+        for paquet in paquets:
+            compteur += 1
+            ports = (paquet.port_source, paquet.port_destination)
+
+            if 'domain' in ports:
                 domaine += 1
-            if 'ssh' in line:
+            if 'ssh' in ports:
                 ssh += 1
-            if 'https' in line:
+            if 'https' in ports:
                 https += 1
-            if 'http' in line:
                 http += 1
-            if 'ICMP echo request' in line:
-                icmp_req += 1
-            if 'ICMP echo reply' in line:
-                icmp_rep += 1
-            if '192.168' in line:
-                ipa += 1
-            if 'Flags [S]' in line:
-                flags_connexion += 1
-            if 'Flags [S.]' in line:
-                flags_SynAcK += 1
-            if 'Flags [F.]' in line:
-                flags_deco += 1
-            if 'Flags [P.]' in line:
-                flags_push += 1
-            if 'Flags [.]' in line:
-                flags_nokonnexion += 1
-
-            for ip2 in Ip_pattern4.findall(line):
-                clean_ip2 = port_pattern.sub('', ip2)
-                if clean_ip2 not in allip:
-                    allip[clean_ip2] = 1
-                else:
-                    allip[clean_ip2] += 1
-
-            for ip2 in IP_pattern5.findall(line):
-                clean_ip2 = port_pattern.sub('', ip2)
-                if clean_ip2 not in allip:
-                    allip[clean_ip2] = 1
-                else:
-                    allip[clean_ip2] += 1
-
-            for ip in Ip_pattern.findall(line):
-                clean_ip = port_pattern.sub('', ip)
-                compteur += 1
-                if clean_ip not in occurence and 'https' not in clean_ip:
-                    occurence[clean_ip] = 1
-                elif clean_ip in occurence and 'https' not in clean_ip:
-                    occurence[clean_ip] += 1
-
-            for ip in IP_pattern3.findall(line):
-                clean_ip = port_pattern.sub('', ip)
-                if clean_ip not in occurence and 'https' not in clean_ip:
-                    occurence[clean_ip] = 1
-                elif clean_ip in occurence and 'https' not in clean_ip:
-                    occurence[clean_ip] += 1
-
-    moyenne = sum(occurence.values()) / len(occurence)
-    suspect = {cle: valeur for cle, valeur in occurence.items() if valeur > moyenne}
-
-    http_final = http - https
-    icmp = icmp_req + icmp_rep
-
-    return http, https, http_final, domaine, ssh, icmp, icmp_req, icmp_rep, compteur, suspect, allip, flags_connexion, flags_SynAcK, flags_deco, flags_push, flags_nokonnexion
+            elif 'http' in ports:
+                http += 1
+
+            if paquet.protocole == "ICMP":
+                if paquet.flags == 'echo request':
+                    icmp_req += 1
+                elif paquet.flags == 'echo reply':
+                    icmp_rep += 1
+            elif paquet.protocole == "TCP":
+                if paquet.flags == 'S':
+                    flags_connexion += 1
+                elif paquet.flags == 'S.':
+                    flags_SynAcK += 1
+                elif paquet.flags == 'F.':
+                    flags_deco += 1
+                elif paquet.flags == 'P.':
+                    flags_push += 1
+                elif paquet.flags == '.':
+                    flags_nokonnexion += 1
+
+            yield paquet
+
+        for nom, valeur in zip(self.NOMS_COMPTEURS, (http, https, domaine, ssh, icmp_req, icmp_rep, compteur,
+                                                    flags_connexion, flags_SynAcK, flags_deco, flags_push, flags_nokonnexion)):
+            self.compteurs[nom] += valeur
+
+    def ajouter_paquets(self, paquets):
+        """
+        Ajoute un flux de paquets aux compteurs.
+
+        :param paquets: Itérable de Paquet (consommé au fil de l'eau)
+        """
+        indices = self.symboles.indices
+        hote = self.hote
+        adresses = self.adresses
+        sources = self.sources
+        ordre_sources = self.ordre_sources
+
+        for paquet in self.compter_protocoles(paquets):
+            # Un seul accès au dictionnaire par hôte, puis des listes indexées par identifiant
+            source = indices.get(paquet.source)
+            if source is None:
+                source = hote(paquet.source)
+            destination = indices.get(paquet.destination)
+            if destination is None:
+                destination = hote(paquet.destination)
+
+            # Toutes les adresses rencontrées, en source comme en destination
+            adresses[source] += 1
+            adresses[destination] += 1
+
+            # Les réponses des serveurs HTTPS ne comptent pas comme des requêtes
+            if paquet.port_source != 'https':
+                if not sources[source]:
+                    ordre_sources.append(source)
+                sources[source] += 1
+
+    def fusionner(self, autre):
+        """
+        Ajoute les compteurs d'une autre analyse à celle-ci. L'ordre d'apparition des
+        adresses est conservé si les morceaux sont fusionnés dans l'ordre du fichier.
+
+        :param autre: StatistiquesTrafic calculées sur un autre morceau de la capture
+        :return: self, pour enchaîner les fusions
+        """
+        for nom, valeur in autre.compteurs.items():
+            self.compteurs[nom] += valeur
+        # Identifiants de l'autre table -> identifiants de celle-ci
+        correspondance = [self.hote(nom) for nom in autre.symboles.noms]
+        for identifiant, valeur in zip(correspondance, autre.adresses):
+            self.adresses[identifiant] += valeur
+        for identifiant in autre.ordre_sources:
+            cible = correspondance[identifiant]
+            if not self.sources[cible]:
+                self.ordre_sources.append(cible)
+            self.sources[cible] += autre.sources[identifiant]
+        return self
+
+    def etat(self):
+        """
+        :return: Dictionnaire sérialisable en JSON (pour le point de reprise du mode suivi)
+        """
+        return {"compteurs": self.compteurs, "occurence": self.occurence, "allip": self.allip}
+
+    @classmethod
+    def depuis_etat(cls, etat):
+        """
+        Reconstruit des statistiques à partir du dictionnaire produit par etat().
+
+        :param etat: Dictionnaire issu de etat()
+        :return: StatistiquesTrafic
+        """
+        statistiques = cls()
+        statistiques.compteurs.update(etat["compteurs"])
+        for nom, valeur in etat["allip"].items():
+            statistiques.adresses[statistiques.hote(nom)] = valeur
+        for nom, valeur in etat["occurence"].items():
+            identifiant = statistiques.hote(nom)
+            statistiques.ordre_sources.append(identifiant)
+            statistiques.sources[identifiant] = valeur
+        return statistiques
+
+    def resultats(self):
+        """
+        Calcule les valeurs dérivées (suspects, HTTP seul, ICMP total).
+
+        :return: Même tuple que Analyser()
+        """
+        noms, sources, ordre_sources = self.symboles.noms, self.sources, self.ordre_sources
+        moyenne = sum(sources) / len(ordre_sources) if ordre_sources else 0
+        suspect = {noms[i]: sources[i] for i in ordre_sources if sources[i] > moyenne}
+        return self.assembler_resultats(suspect, self.allip)
+
+    def assembler_resultats(self, suspect, allip):
+        """
+        :param suspect: Dictionnaire des sources suspectes
+        :param allip: Dictionnaire des adresses
+        :return: Même tuple que Analyser()
+        """
+        c = self.compteurs
+        http_final = c["http"] - c["https"]
+        icmp = c["icmp_req"] + c["icmp_rep"]
+
+        return c["http"], c["https"], http_final, c["domaine"], c["ssh"], icmp, c["icmp_req"], c["icmp_rep"], c["compteur"], suspect, allip, c["flags_connexion"], c["flags_SynAcK"], c["flags_deco"], c["flags_push"], c["flags_nokonnexion"]
+
+class StatistiquesApprochees(StatistiquesTrafic):
+    """
+    Variante à mémoire fixe (option --approx) : les dictionnaires d'adresses sont
+    remplacés par des esquisses (voir esquisses.py pour les bornes d'erreur).
+    Les compteurs de protocoles restent exacts ; occurence et allip ne contiennent
+    plus que les top_k adresses, avec une estimation par excès de leur compte, et
+    la moyenne des suspects utilise une estimation HyperLogLog du nombre de sources.
+    """
+    __slots__ = ("parametres", "top_sources", "top_adresses", "hll_sources", "hll_destinations")
+    ESQUISSES = ("top_sources", "top_adresses", "hll_sources", "hll_destinations")
+
+    def __init__(self, top_k=100, largeur=8192, profondeur=4, precision=12):
+        """
+        :param top_k: Nombre d'adresses les plus actives conservées
+        :param largeur: Largeur des Count-Min Sketch
+        :param profondeur: Profondeur des Count-Min Sketch
+        :param precision: Précision p des HyperLogLog (2**p registres)
+        """
+        super().__init__()
+        self.parametres = {"top_k": top_k, "largeur": largeur, "profondeur": profondeur, "precision": precision}
+        self.top_sources = PlusFrequents(top_k, largeur, profondeur)
+        self.top_adresses = PlusFrequents(top_k, largeur, profondeur)
+        self.hll_sources = HyperLogLog(precision)
+        self.hll_destinations = HyperLogLog(precision)
+
+    def ajouter_paquets(self, paquets):
+        """
+        Ajoute un flux de paquets aux compteurs et aux esquisses.
+
+        :param paquets: Itérable de Paquet (consommé au fil de l'eau)
+        """
+        top_sources = self.top_sources
+        top_adresses = self.top_adresses
+        hll_sources = self.hll_sources
+        hll_destinations = self.hll_destinations
+
+        for paquet in self.compter_protocoles(paquets):
+            top_adresses.ajouter(paquet.source)
+            top_adresses.ajouter(paquet.destination)
+            hll_destinations.ajouter(paquet.destination)
+
+            if paquet.port_source != 'https':
+                top_sources.ajouter(paquet.source)
+                hll_sources.ajouter(paquet.source)
+
+    def fusionner(self, autre):
+        """
+        :param autre: StatistiquesApprochees de mêmes paramètres
+        :return: self
+        """
+        super().fusionner(autre)
+        for nom in self.ESQUISSES:
+            getattr(self, nom).fusionner(getattr(autre, nom))
+        return self
+
+    def etat(self):
+        """
+        :return: Dictionnaire sérialisable en JSON (pour le point de reprise du mode suivi)
+        """
+        etat = super().etat()
+        etat["parametres"] = self.parametres
+        for nom in self.ESQUISSES:
+            etat[nom] = getattr(self, nom).etat()
+        return etat
+
+    @classmethod
+    def depuis_etat(cls, etat):
+        """
+        :param etat: Dictionnaire issu de etat()
+        :return: StatistiquesApprochees
+        """
+        statistiques = cls(**etat["parametres"])
+        statistiques.compteurs.update(etat["compteurs"])
+        for nom in cls.ESQUISSES:
+            classe = type(getattr(statistiques, nom))
+            setattr(statistiques, nom, classe.depuis_etat(etat[nom]))
+        return statistiques
+
+    def cardinalites(self):
+        """
+        :return: Couple (sources distinctes, destinations distinctes) estimé
+        """
+        return self.hll_sources.estimer(), self.hll_destinations.estimer()
+
+    def resultats(self):
+        """
+        Calcule les valeurs dérivées à partir des esquisses.
+
+        :return: Même tuple que Analyser()
+        """
+        occurence = self.top_sources.resultats()
+        nb_sources = self.hll_sources.estimer()
+        moyenne = self.top_sources.cms.total / nb_sources if nb_sources else 0
+        suspect = {cle: valeur for cle, valeur in occurence.items() if valeur > moyenne}
+        return self.assembler_resultats(suspect, self.top_adresses.resultats())
+
+def creer_statistiques(approx=None):
+    """
+    :param approx: None pour des compteurs exacts, ou dictionnaire des paramètres de
+                   StatistiquesApprochees (ex. {"top_k": 100}) pour le mode à mémoire fixe
+    :return: StatistiquesTrafic vide
+    """
+    return StatistiquesTrafic() if approx is None else StatistiquesApprochees(**approx)
+
+def agreger_paquets(paquets, statistiques=None):
+    """
+    Dernier étage du pipeline : calcule toutes les statistiques en un seul passage.
+
+    :param paquets: Itérable de Paquet (consommé au fil de l'eau)
+    :param statistiques: StatistiquesTrafic à remplir (exactes si None)
+    :return: Même tuple que Analyser()
+    """
+    if statistiques is None:
+        statistiques = StatistiquesTrafic()
+    statistiques.ajouter_paquets(paquets)
+    return statistiques.resultats()
+
+def Analyser(log_contents):
+    return agreger_paquets(lire_capture(log_contents))
+
+def analyser_vectorise(log_contents):
+    """
+    Version NumPy d'Analyser() : les paquets sont rangés en colonnes d'entiers puis
+    comptés par opérations vectorisées (voir colonnes_paquets.py).
+
+    :param log_contents: Chemin du fichier tcpdump
+    :return: Même tuple que Analyser()
+    """
+    from colonnes_paquets import ColonnesPaquets, statistiques_colonnes
+    return statistiques_colonnes(ColonnesPaquets.depuis_paquets(lire_capture(log_contents)))
+
+def est_interessant(paquet):
+    """
+    Indique si un paquet fait partie du trafic étudié (TCP, ICMP, HTTP(S) ou SSH).
+
+    :param paquet: Paquet issu de parse_tcpdump_line()
+    :return: True si le paquet doit être conservé
+    """
+    return (paquet.protocole in ("TCP", "ICMP")
+            or not {paquet.port_source, paquet.port_destination}.isdisjoint(PORTS_INTERESSANTS))
+
+def paquets_interessants(lignes, resume=None):
+    """
+    Étages "analyse + filtre" du pipeline : chaque ligne est analysée une fois et
+    seuls les paquets intéressants sont transmis à l'étage suivant.
+
+    :param lignes: Itérable de lignes tcpdump (fichier ouvert, générateur...)
+    :param resume: Fichier ouvert en écriture recevant une copie des lignes
+                   conservées (équivalent de tcpdump_resume.txt), ou None
+    :return: Générateur de Paquet
+    """
+    for line in lignes:
+        paquet = parse_tcpdump_line(line)
+        if paquet is not None and est_interessant(paquet):
+            if resume is not None:
+                resume.write(line)
+            yield paquet
+
+def filtrer_paquets(paquets, resume=None):
+    """
+    Étage "filtre" pour les paquets d'une capture binaire (pcap, pcapng).
+
+    :param paquets: Itérable de Paquet
+    :param resume: Fichier ouvert en écriture recevant la ligne tcpdump de chaque paquet
+                   conservé, ou None
+    :return: Générateur de Paquet
+    """
+    for paquet in paquets:
+        if est_interessant(paquet):
+            if resume is not None:
+                resume.write(ligne_tcpdump(paquet))
+            yield paquet
+
+class CompteurLecture:
+    """
+    Nombre de paquets vus par l'étage de lecture (lignes d'en-tête d'une capture texte,
+    les lignes de dump hexadécimal n'étant pas lues ; enregistrements d'une capture pcap
+    ou pcapng), pour la mesure de débit : compté pendant l'analyse plutôt qu'en relisant
+    (et en décompressant de nouveau) la capture.
+    """
+    __slots__ = ("paquets",)
+
+    def __init__(self):
+        self.paquets = 0
+
+    def compter(self, elements):
+        """
+        :param elements: Itérable produit par l'étage de lecture
+        :return: Générateur des mêmes éléments
+        """
+        for element in elements:
+            self.paquets += 1
+            yield element
+
+def paquets_capture(fichier, resume=None, lecture=None):
+    """
+    Étages "lecture + analyse + filtre" d'une capture texte, pcap ou pcapng.
+
+    :param fichier: Chemin de la capture (éventuellement compressée)
+    :param resume: Fichier ouvert en écriture recevant les lignes conservées, ou None
+    :param lecture: CompteurLecture alimenté par l'étage de lecture, ou None
+    :return: Générateur de Paquet
+    """
+    binaire = format_capture(fichier) is not None
+    lues = lire_enregistrements(fichier) if binaire else lire_entetes(fichier)
+    if lecture is not None:
+        lues = lecture.compter(lues)
+    if binaire:
+        return filtrer_paquets(decoder_paquets(lues), resume)
+    return paquets_interessants(lues, resume)
 
 def filtrer_lignes_interessantes(fichier_source, fichier_destination):
-    mots_cles = ["http", "https", "ssh", "ICMP", "Flags"]
-    with open(fichier_source, "r") as source, open(fichier_destination, "w") as destination:
-        for line in source:
-            if any(mot in line for mot in mots_cles):
-                destination.write(line)
+    with open(fichier_destination, "w") as destination:
+        for _ in paquets_capture(fichier_source, destination):
+            pass
 
-def main():
-    # Spécifiez le chemin du fichier à analyser directement dans le code
-    fichier = "Projet/tcpdump_old.txt"
-    fichier_resume = "Projet/tcpdump_resume.txt"
-    
-    # Filtrer les lignes intéressantes et les écrire dans tcpdump_resume.txt
-    filtrer_lignes_interessantes(fichier, fichier_resume)
-    
-    http, https, http_final, domaine, ssh, icmp, icmp_req, icmp_rep, compteur, suspect, addresse, flags_connexion, flags_SynAcK, flags_deco, flags_push, flags_nokonnexion = Analyser(fichier_resume)
+def pipeline_capture(fichier, resume=None, moteur_debit=None, suivi_connexions=None, lecture=None):
+    """
+    Étages lecture -> analyse -> filtre -> observateurs du pipeline, sans l'agrégation.
 
-    pseudo_csv_content = "IP;Nombre de requêtes\n"
-    for ip, count in addresse.items():
-        pseudo_csv_content += f"{ip};{count}\n"
+    :param fichier: Chemin du fichier tcpdump
+    :param resume: Fichier ouvert en écriture recevant les lignes conservées, ou None
+    :param moteur_debit: MoteurDebit alimenté au passage (détection des rafales), ou None
+    :param suivi_connexions: SuiviConnexions alimenté au passage (flux TCP), ou None
+    :param lecture: CompteurLecture alimenté par l'étage de lecture, ou None
+    :return: Générateur de Paquet
+    """
+    paquets = paquets_capture(fichier, resume, lecture)
+    if moteur_debit is not None:
+        paquets = moteur_debit.observer(paquets)
+    if suivi_connexions is not None:
+        paquets = suivi_connexions.observer(paquets)
+    return paquets
+
+def compter_motifs(paquets, motifs):
+    """
+    Étage d'instrumentation : compte les paquets reconnus par branche de l'expression
+    tcpdump (protocole, longueur) et par port de PORTS_INTERESSANTS.
+
+    :param paquets: Itérable de Paquet
+    :param motifs: Counter à incrémenter
+    :return: Générateur des mêmes paquets
+    """
+    for paquet in paquets:
+        motifs["protocole " + paquet.protocole] += 1
+        if paquet.longueur:
+            motifs["longueur"] += 1
+        for port in PORTS_INTERESSANTS.intersection((paquet.port_source, paquet.port_destination)):
+            motifs["port " + port] += 1
+        yield paquet
+
+def pipeline_instrumente(fichier, instrumentation, moteur_debit=None, suivi_connexions=None):
+    """
+    Variante chronométrée de pipeline_capture() : l'analyse et le filtre y sont deux
+    étages distincts, et chaque étage est mesuré par l'instrumentation.
+
+    :param fichier: Chemin du fichier tcpdump
+    :param instrumentation: Instrumentation recevant les mesures
+    :param moteur_debit: MoteurDebit alimenté au passage, ou None
+    :param suivi_connexions: SuiviConnexions alimenté au passage, ou None
+    :return: Générateur de Paquet
+    """
+    flux = instrumentation.flux
+    if format_capture(fichier) is not None:
+        # Capture binaire : la lecture produit les paquets bruts, l'analyse les décode
+        paquets = flux("analyse", decoder_paquets(flux("lecture", lire_enregistrements(fichier))))
+    else:
+        paquets = flux("analyse", lire_paquets(flux("lecture", lire_entetes(fichier))))
+    paquets = flux("filtre", filter(est_interessant, flux("motifs", compter_motifs(paquets, instrumentation.motifs))))
+    if moteur_debit is not None:
+        paquets = flux("débit", moteur_debit.observer(paquets))
+    if suivi_connexions is not None:
+        paquets = flux("connexions", suivi_connexions.observer(paquets))
+    return paquets
+
+def analyser_capture_instrumentee(fichier, instrumentation, moteur_debit=None, approx=None, suivi_connexions=None):
+    """
+    analyser_capture() avec mesure de chaque étage (sans résumé).
+
+    :param fichier: Chemin du fichier tcpdump
+    :param instrumentation: Instrumentation recevant les mesures
+    :param moteur_debit: MoteurDebit alimenté au passage, ou None
+    :param approx: Paramètres du mode à mémoire fixe, ou None
+    :param suivi_connexions: SuiviConnexions alimenté au passage, ou None
+    :return: Même tuple que Analyser()
+    """
+    statistiques = creer_statistiques(approx)
+    paquets = pipeline_instrumente(fichier, instrumentation, moteur_debit, suivi_connexions)
+    with instrumentation.etage_final("agrégation"):
+        statistiques.ajouter_paquets(paquets)
+    instrumentation.motifs["lignes non reconnues"] = (instrumentation.elements("lecture")
+                                                      - instrumentation.elements("analyse"))
+    with instrumentation.etape("résultats"):
+        return statistiques.resultats()
+
+def analyser_capture(fichier, fichier_resume=None, moteur_debit=None, approx=None, suivi_connexions=None,
+                     lecture=None):
+    """
+    Pipeline complet lecture -> analyse -> filtre -> agrégation en un seul passage
+    sur le fichier, sans fichier intermédiaire obligatoire.
+
+    :param fichier: Chemin du fichier tcpdump
+    :param fichier_resume: Chemin du résumé à écrire au passage, ou None pour s'en passer
+    :param moteur_debit: MoteurDebit alimenté au passage (détection des rafales), ou None
+    :param approx: Paramètres du mode à mémoire fixe (voir creer_statistiques()), ou None
+    :param suivi_connexions: SuiviConnexions alimenté au passage (flux TCP), ou None
+    :param lecture: CompteurLecture alimenté par l'étage de lecture, ou None
+    :return: Même tuple que Analyser()
+    """
+    with open(fichier_resume, "w") if fichier_resume else contextlib.nullcontext() as resume:
+        return agreger_paquets(pipeline_capture(fichier, resume, moteur_debit, suivi_connexions, lecture),
+                               creer_statistiques(approx))
+
+def analyser_capture_cache(fichier, moteur_debit=None, suivi_connexions=None, lecture=None):
+    """
+    Variante d'analyser_capture() passant par le cache en colonnes (colonnes_paquets.py) :
+    la capture n'est relue que si elle a changé depuis la dernière analyse.
+
+    :param fichier: Chemin du fichier tcpdump
+    :param moteur_debit: MoteurDebit alimenté avec les paquets reconstruits, ou None
+    :param suivi_connexions: SuiviConnexions alimenté avec les paquets reconstruits, ou None
+    :param lecture: CompteurLecture recevant le nombre de paquets de la capture (le cache ne
+                    garde pas les lignes d'en-tête non reconnues), ou None
+    :return: Même tuple que Analyser()
+    """
+    from colonnes_paquets import charger_colonnes, masque_interessants, statistiques_colonnes
+    colonnes = charger_colonnes(fichier)
+    if lecture is not None:
+        lecture.paquets += len(colonnes)
+    colonnes = colonnes.selection(masque_interessants(colonnes, PORTS_INTERESSANTS))
+    if moteur_debit is not None or suivi_connexions is not None:
+        for paquet in colonnes.paquets():
+            if moteur_debit is not None:
+                moteur_debit.ajouter(paquet)
+            if suivi_connexions is not None:
+                suivi_connexions.ajouter(paquet)
+    return statistiques_colonnes(colonnes)
+
+def decouper_fichier(fichier, nb_tranches):
+    """
+    Découpe un fichier en tranches d'octets de tailles proches, chaque limite étant
+    placée juste après un retour à la ligne.
+
+    :param fichier: Chemin du fichier
+    :param nb_tranches: Nombre de tranches souhaité
+    :return: Liste de couples (début, fin) en octets, dans l'ordre du fichier
+    """
+    taille = os.path.getsize(fichier)
+    limites = [0]
+    with open(fichier, "rb") as f:
+        for i in range(1, nb_tranches):
+            f.seek(taille * i // nb_tranches)
+            f.readline()  # avancer jusqu'au début de la ligne suivante
+            limites.append(max(f.tell(), limites[-1]))
+    limites.append(taille)
+    return [(debut, fin) for debut, fin in zip(limites, limites[1:]) if fin > debut]
 
-    os.makedirs("Projet", exist_ok=True)
-    with open("Projet/adresses_extraites.csv", "w") as csv_file:
-        csv_file.write(pseudo_csv_content)
+def analyser_tranche(fichier, debut, fin, approx=None):
+    """
+    Travail d'un processus du mode parallèle : pipeline complet sur une tranche.
+
+    :param fichier: Chemin du fichier tcpdump
+    :param debut: Position de début de la tranche
+    :param fin: Position de fin de la tranche
+    :param approx: Paramètres du mode à mémoire fixe, ou None
+    :return: Couple (StatistiquesTrafic de la tranche, nombre de paquets lus)
+    """
+    statistiques = creer_statistiques(approx)
+    lecture = CompteurLecture()
+    statistiques.ajouter_paquets(paquets_interessants(lecture.compter(lire_entetes(fichier, debut, fin))))
+    return statistiques, lecture.paquets
+
+def analyser_capture_parallele(fichier, workers, approx=None, lecture=None):
+    """
+    Version multi-processus d'analyser_capture() : chaque tranche du fichier est
+    analysée par un processus puis les compteurs sont fusionnés dans l'ordre.
+
+    :param fichier: Chemin du fichier tcpdump
+    :param workers: Nombre de processus
+    :param approx: Paramètres du mode à mémoire fixe, ou None
+    :param lecture: CompteurLecture recevant le total des paquets lus par les processus, ou None
+    :return: Même tuple que Analyser()
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    tranches = decouper_fichier(fichier, workers)
+    total = creer_statistiques(approx)
+    with ProcessPoolExecutor(max_workers=workers) as executeur:
+        futurs = [executeur.submit(analyser_tranche, fichier, debut, fin, approx) for debut, fin in tranches]
+        for futur in futurs:
+            statistiques, paquets = futur.result()
+            total.fusionner(statistiques)
+            if lecture is not None:
+                lecture.paquets += paquets
+    return total.resultats()
+
+def compter_lignes(fichier, taille_bloc=1 << 20):
+    """
+    :param fichier: Chemin du fichier (éventuellement compressé)
+    :param taille_bloc: Taille des blocs lus, en octets
+    :return: Nombre de lignes du fichier (de paquets pour une capture pcap ou pcapng)
+    """
+    if format_capture(fichier) is not None:
+        # Capture binaire : une ligne par paquet, comme l'en-tête du texte équivalent
+        return sum(1 for _ in lire_enregistrements(fichier))
+    lignes = 0
+    dernier = b"\n"
+    # Une capture compressée est comptée sur son contenu décompressé
+    with ouvrir_capture(fichier) as f:
+        for bloc in iter(lambda: f.read(taille_bloc), b""):
+            lignes += bloc.count(b"\n")
+            dernier = bloc[-1:]
+    # Dernière ligne sans retour à la ligne final
+    return lignes + (dernier != b"\n")
+
+def developper_captures(motifs):
+    """
+    Remplace les motifs glob ("captures/*.txt") par les fichiers correspondants, dans
+    l'ordre alphabétique, sans doublon. Les chemins sans caractère spécial sont gardés
+    tels quels.
+
+    :param motifs: Chemins ou motifs donnés sur la ligne de commande
+    :return: Liste de chemins
+    :raises FileNotFoundError: Si un motif ne correspond à aucun fichier
+    """
+    fichiers = {}
+    for motif in motifs:
+        trouves = sorted(glob.glob(motif)) if glob.has_magic(motif) else [motif]
+        trouves = [fichier for fichier in trouves if os.path.isfile(fichier)]
+        if not trouves:
+            raise FileNotFoundError(f"Aucune capture ne correspond à {motif}")
+        fichiers.update(dict.fromkeys(trouves))
+    return list(fichiers)
+
+def dossiers_rapports(fichiers):
+    """
+    Un dossier de rapports par capture, nommé d'après le fichier (sans extension) ;
+    un suffixe -2, -3... départage les captures de même nom.
+
+    :param fichiers: Chemins des captures
+    :return: Liste des noms de dossiers, dans l'ordre des captures
+    """
+    noms = []
+    for fichier in fichiers:
+        base = os.path.basename(fichier)
+        # "capture.txt.gz" -> "capture"
+        if os.path.splitext(base)[1] in EXTENSIONS.values():
+            base = os.path.splitext(base)[0]
+        base = os.path.splitext(base)[0] or "capture"
+        nom, numero = base, 1
+        while nom in noms:
+            numero += 1
+            nom = f"{base}-{numero}"
+        noms.append(nom)
+    return noms
+
+def mesurer_capture(fichier, duree, paquets):
+    """
+    :param fichier: Chemin de la capture analysée
+    :param duree: Durée de l'analyse en secondes
+    :param paquets: Paquets vus par l'analyse, voir CompteurLecture (à ne pas comparer aux
+                    lignes de compter_lignes(), qui compte aussi le dump hexadécimal)
+    :return: Dictionnaire "fichier", "paquets", "octets", "duree"
+    """
+    return {"fichier": fichier, "paquets": paquets, "octets": os.path.getsize(fichier), "duree": duree}
+
+def analyser_fichier(fichier, options, dossier=None):
+    """
+    Travail d'un processus du mode lot : analyse complète d'une capture puis écriture
+    de ses rapports.
+
+    :param fichier: Chemin du fichier tcpdump
+    :param options: Dictionnaire "approx" (voir creer_statistiques()), "debit" (arguments
+                    de MoteurDebit, ou None), "delai_inactivite" (None sans suivi des
+                    connexions) et "formats"
+    :param dossier: Dossier des rapports de la capture, ou None pour ne pas en écrire
+    :return: Couple (StatistiquesTrafic de la capture, mesure de mesurer_capture())
+    """
+    moteur_debit = MoteurDebit(*options["debit"]) if options["debit"] else None
+    suivi_connexions = None
+    if options["delai_inactivite"] is not None:
+        suivi_connexions = SuiviConnexions(options["delai_inactivite"])
+
+    debut = time.perf_counter()
+    statistiques = creer_statistiques(options["approx"])
+    lecture = CompteurLecture()
+    statistiques.ajouter_paquets(pipeline_capture(fichier, None, moteur_debit, suivi_connexions, lecture))
+    mesure = mesurer_capture(fichier, time.perf_counter() - debut, lecture.paquets)
+
+    if dossier is not None:
+        ecrire_rapports(statistiques.resultats(), moteur_debit.alertes if moteur_debit else None,
+                        suivi_connexions.bilan() if suivi_connexions else None, options["formats"], dossier)
+    return statistiques, mesure
+
+def analyser_lot(fichiers, options, sortie, jobs=1):
+    """
+    Analyse plusieurs captures, jusqu'à `jobs` à la fois (un processus par capture),
+    et fusionne leurs compteurs. Les rapports de chaque capture sont écrits par le
+    processus qui l'a analysée, dans un sous-dossier de `sortie`.
 
+    :param fichiers: Chemins des captures
+    :param options: Options d'analyse (voir analyser_fichier())
+    :param sortie: Dossier des rapports
+    :param jobs: Nombre de captures analysées simultanément
+    :return: Couple (StatistiquesTrafic fusionnées, mesures des captures dans l'ordre
+             des fichiers, avec en plus "rapports" : le nom du dossier de la capture)
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    noms = dossiers_rapports(fichiers)
+    total = creer_statistiques(options["approx"])
+    mesures = []
+    with ProcessPoolExecutor(max_workers=jobs) as executeur:
+        futurs = [executeur.submit(analyser_fichier, fichier, options, os.path.join(sortie, nom))
+                  for fichier, nom in zip(fichiers, noms)]
+        for futur, nom in zip(futurs, noms):
+            statistiques, mesure = futur.result()
+            total.fusionner(statistiques)
+            mesure["rapports"] = nom
+            mesures.append(mesure)
+    return total, mesures
+
+def lire_checkpoint(checkpoint, fichier, approx=None):
+    """
+    Relit le point de reprise du mode suivi.
+
+    :param checkpoint: Chemin du fichier JSON de reprise
+    :param fichier: Capture suivie ; un point de reprise d'une autre capture est ignoré
+    :param approx: Paramètres du mode à mémoire fixe, ou None ; un point de reprise
+                   enregistré dans l'autre mode est ignoré
+    :return: Couple (position en octets, StatistiquesTrafic cumulées)
+    """
+    try:
+        with open(checkpoint, "r", encoding="utf-8") as f:
+            etat = json.load(f)
+    except FileNotFoundError:
+        return 0, creer_statistiques(approx)
+    except ValueError:
+        print(f"Point de reprise '{checkpoint}' ignoré : il est illisible.")
+        return 0, creer_statistiques(approx)
+
+    position, etat_statistiques = etat.get("position"), etat.get("statistiques")
+    if not isinstance(position, int) or not isinstance(etat_statistiques, dict):
+        print(f"Point de reprise '{checkpoint}' ignoré : il est incomplet ou d'une ancienne version.")
+        return 0, creer_statistiques(approx)
+    try:
+        taille = os.path.getsize(fichier)
+    except OSError:
+        # Capture supprimée ou renommée (rotation) depuis l'enregistrement du point de reprise
+        taille = -1
+    if etat.get("fichier") != os.path.abspath(fichier) or position > taille:
+        print(f"Point de reprise '{checkpoint}' ignoré : il ne correspond pas à '{fichier}'.")
+        return 0, creer_statistiques(approx)
+    if ("parametres" in etat_statistiques) != (approx is not None):
+        print(f"Point de reprise '{checkpoint}' ignoré : il a été enregistré dans l'autre mode (--approx).")
+        return 0, creer_statistiques(approx)
+    classe = StatistiquesTrafic if approx is None else StatistiquesApprochees
+    return position, classe.depuis_etat(etat_statistiques)
+
+def ecrire_checkpoint(checkpoint, fichier, position, statistiques):
+    """
+    Enregistre la position lue et les totaux, de façon atomique (fichier temporaire
+    puis renommage) pour qu'un arrêt brutal ne laisse pas de point de reprise corrompu.
+
+    :param checkpoint: Chemin du fichier JSON de reprise
+    :param fichier: Capture suivie
+    :param position: Nombre d'octets déjà comptés
+    :param statistiques: StatistiquesTrafic cumulées jusqu'à cette position
+    """
+    temporaire = checkpoint + ".tmp"
+    with open(temporaire, "w", encoding="utf-8") as f:
+        json.dump({"fichier": os.path.abspath(fichier), "position": position,
+                   "statistiques": statistiques.etat()}, f)
+    os.replace(temporaire, checkpoint)
+
+def suivre_capture(fichier, intervalle=10.0, nb_paquets=1000, checkpoint=None, attente=0.5, moteur_debit=None,
+                   approx=None, suivi_connexions=None, formats=FORMATS, dossier="Projet"):
+    """
+    Mode suivi : lit une capture qui grossit (ou l'entrée standard de "tcpdump -l")
+    sans jamais relire ce qui a déjà été compté, et régénère les rapports toutes les
+    `intervalle` secondes ou tous les `nb_paquets` paquets. S'arrête avec Ctrl+C, ou
+    à la fin de l'entrée standard.
+
+    :param fichier: Chemin de la capture, ou "-" pour l'entrée standard
+    :param intervalle: Délai maximal entre deux rapports, en secondes
+    :param nb_paquets: Nombre de nouveaux paquets déclenchant un rapport
+    :param checkpoint: Fichier JSON de reprise (ignoré pour l'entrée standard), ou None
+    :param attente: Pause quand la fin actuelle du fichier est atteinte, en secondes
+    :param moteur_debit: MoteurDebit alimenté au fil de la lecture, ou None
+    :param approx: Paramètres du mode à mémoire fixe, ou None
+    :param suivi_connexions: SuiviConnexions alimenté au fil de la lecture, ou None
+    :param formats: Formats de rapport à produire, parmi FORMATS
+    :param dossier: Dossier des rapports
+    """
+    entree_standard = fichier == "-"
+    if checkpoint and not entree_standard:
+        position, statistiques = lire_checkpoint(checkpoint, fichier, approx)
+    else:
+        position, statistiques = 0, creer_statistiques(approx)
+
+    source = sys.stdin.buffer if entree_standard else open(fichier, "rb")
+    if not entree_standard:
+        source.seek(position)
+
+    lot = []      # paquets lus depuis le dernier rapport
+    reste = b""   # début de ligne pas encore terminée par tcpdump
+    dernier_rapport = time.monotonic()
+
+    def rafraichir():
+        statistiques.ajouter_paquets(lot)
+        lot.clear()
+        if statistiques.compteurs["compteur"]:
+            ecrire_rapports(statistiques.resultats(), moteur_debit.alertes if moteur_debit else None,
+                            suivi_connexions.bilan() if suivi_connexions else None, formats, dossier)
+        if checkpoint and not entree_standard:
+            ecrire_checkpoint(checkpoint, fichier, position, statistiques)
+
+    try:
+        while True:
+            ligne = source.readline()
+            if ligne.endswith(b"\n"):
+                ligne = reste + ligne
+                reste = b""
+                position += len(ligne)
+                paquet = parse_tcpdump_line(ligne.decode("utf-8", errors="replace"))
+                if paquet is not None and est_interessant(paquet):
+                    lot.append(paquet)
+                    if moteur_debit is not None:
+                        moteur_debit.ajouter(paquet)
+                    if suivi_connexions is not None:
+                        suivi_connexions.ajouter(paquet)
+            elif entree_standard:
+                if not ligne:
+                    break  # fin de l'entrée standard
+                reste += ligne
+            else:
+                reste += ligne
+                # Fin actuelle du fichier : capture tronquée ou remplacée (rotation) ?
+                try:
+                    remplace = os.stat(fichier).st_ino != os.fstat(source.fileno()).st_ino
+                    tronque = os.path.getsize(fichier) < position + len(reste)
+                except FileNotFoundError:
+                    remplace = tronque = False
+                if remplace or tronque:
+                    source.close()
+                    source = open(fichier, "rb")
+                    position, reste = 0, b""
+                elif not ligne:
+                    time.sleep(attente)
+
+            if len(lot) >= nb_paquets or time.monotonic() - dernier_rapport >= intervalle:
+                rafraichir()
+                dernier_rapport = time.monotonic()
+    except KeyboardInterrupt:
+        print("Arrêt du suivi.")
+    finally:
+        rafraichir()
+        if not entree_standard:
+            source.close()
+
+def lignes_csv(addresse):
+    """
+    :param addresse: Dictionnaire adresse -> nombre de requêtes
+    :return: Générateur des lignes du CSV des adresses
+    """
+    yield "IP;Nombre de requêtes\n"
+    for ip, count in addresse.items():
+        yield f"{ip};{count}\n"
+
+def image_suspects(suspect):
+    """
+    :param suspect: Dictionnaire des sources suspectes
+    :return: Liste d'un seul morceau : le graphique au format PNG
+    """
+    from matplotlib.figure import Figure
     cles = list(suspect.keys())
     valeurs = list(suspect.values())
 
-    # Assurez-vous que le répertoire Projet existe
-    os.makedirs("Projet", exist_ok=True)
-    
+    # Figure plutôt que pyplot : le rendu se fait dans un thread du pool, et l'état
+    # global de pyplot (figure courante, interface graphique) n'y est pas sûr
     colors = ['yellowgreen', 'gold', 'lightskyblue', 'lightcoral', 'red', 'blue', 'yellow']
-    plt.figure(figsize=(10, 7))
-    plt.pie(valeurs, labels=cles, colors=colors, autopct='%1.1f%%', shadow=True, startangle=90)
-    plt.axis('equal')
-    plt.savefig('Projet/Activité-suspect.png', transparent=True)
+    figure = Figure(figsize=(10, 7))
+    axes = figure.subplots()
+    axes.pie(valeurs, labels=cles, colors=colors, autopct='%1.1f%%', shadow=True, startangle=90)
+    axes.axis('equal')
+    tampon = io.BytesIO()
+    figure.savefig(tampon, format="png", transparent=True)
+    return [tampon.getvalue()]
+
+# Sections du compte rendu Markdown : chacune commence par son titre "## ..." (sauf
+# l'en-tête), ce qui permet aussi de les convertir en HTML séparément
 
-    markdown_text = f'''
+def section_entete(compteur):
+    yield f'''
 # ___Résultats Brut analyse du trafic___
 
 ___Nombre de trames :___ {compteur}
 
-## ___adresses IP :___
-''' + '\n'.join(f'- {ip} : {addresses} requêtes' for ip, addresses in addresse.items()) + f'''
+'''
+
+def section_adresses(addresse):
+    yield "## ___adresses IP :___\n"
+    yield from joindre_lignes(f'- {ip} : {addresses} requêtes' for ip, addresses in addresse.items())
+    yield "\n\n"
 
-## ___Activité Suspecte :___
-''' + '\n'.join(f'- {ip} : {occurrences} requêtes' for ip, occurrences in suspect.items()) + f'''
+def section_suspects(suspect):
+    yield "## ___Activité Suspecte :___\n"
+    yield from joindre_lignes(f'- {ip} : {occurrences} requêtes' for ip, occurrences in suspect.items())
+    yield '\n\n<img src="Activité-suspect.png" class="merge" />\n'
 
-<img src="Activité-suspect.png" class="merge" />
-## ___Protocol + Stats :___ 
+def section_protocoles(ssh, http_final, https, domaine, icmp, icmp_req, icmp_rep):
+    yield f'''## ___Protocol + Stats :___ 
 - SSH: {ssh}
 - HTTP: {http_final}
 - HTTPS: {https}
@@ -184,7 +998,10 @@ ___Nombre de trames :___ {compteur}
 - ICMP Requests: {icmp_req}
 - ICMP Replies: {icmp_rep}
 
-## ___Flags :___
+'''
+
+def section_flags(flags_connexion, flags_SynAcK, flags_deco, flags_push, flags_nokonnexion):
+    yield f'''## ___Flags :___
 - Connexion Demande: {flags_connexion}
 - SynAcK: {flags_SynAcK}
 - Déconnexion: {flags_deco}
@@ -192,16 +1009,368 @@ ___Nombre de trames :___ {compteur}
 - No Connexion: {flags_nokonnexion}
 '''
 
-    # Écrire le texte Markdown dans un fichier
-    with open("Projet/compte_rendu.md", "w") as md_file:
-        md_file.write(markdown_text)
+def section_rafales(alertes_debit):
+    yield '''
+## ___Rafales détectées (fenêtres glissantes) :___
+'''
+    yield from joindre_lignes(f'- {ip} : {alerte["paquets_par_seconde"]:.1f} paquets/s, {alerte["syn_par_seconde"]:.1f} SYN/s, '
+                              f'{alerte["destinations"]} destinations (dès {formater_horodatage(alerte["debut"])})'
+                              for ip, alerte in alertes_debit.items())
+    yield '\n'
+
+def section_connexions(bilan_connexions):
+    yield f'''
+## ___Connexions TCP :___
+- Flux suivis : {bilan_connexions["total"]} (dont {bilan_connexions["actives"]} encore actifs)
+'''
+    yield from joindre_lignes(f'- {libelle} : {bilan_connexions["statuts"][statut]}'
+                              for statut, libelle in LIBELLES_STATUTS.items())
+    yield f'''
+- Octets échangés : {bilan_connexions["octets"]}
+- Durée moyenne : {bilan_connexions["duree_moyenne"]:.2f} s
+
+| Client | Serveur | Statut | Début | Durée (s) | Paquets | Octets |
+|---|---|---|---|---|---|---|
+'''
+    yield from joindre_lignes(f'| {flux["client"]} | {flux["serveur"]} | {LIBELLES_STATUTS[flux["statut"]]} | '
+                              f'{formater_horodatage(flux["debut"])} | {flux["duree"]:.2f} | {flux["paquets"]} | {flux["octets"]} |'
+                              for flux in bilan_connexions["plus_volumineuses"])
+    yield '\n'
+
+def section_captures(captures):
+    yield '''
+## ___Captures analysées :___
+
+| Capture | Paquets | Taille (Mo) | Durée (s) | Paquets/s | Mo/s | Compte rendu |
+|---|---|---|---|---|---|---|
+'''
+    yield from joindre_lignes(f'| {mesure["fichier"]} | {mesure["paquets"]} | {mesure["octets"] / 1e6:.2f} | {mesure["duree"]:.3f} | '
+                              f'{debit_paquets(mesure):.0f} | {debit_octets(mesure) / 1e6:.2f} | '
+                              f'[{mesure["rapports"]}]({mesure["rapports"]}/{os.path.basename(FICHIER_MARKDOWN)}) |'
+                              for mesure in captures)
+    yield '\n'
+
+def section_performances(performances):
+    capture = performances.get("capture")
+    yield '''
+## ___Performances :___
+'''
+    if capture is not None:
+        yield (f'- Capture : {capture["paquets"]} paquets, {capture["octets"] / 1e6:.2f} Mo en {capture["duree"]:.3f} s '
+               f'({capture["paquets_par_seconde"] or 0:.0f} paquets/s, {(capture["octets_par_seconde"] or 0) / 1e6:.2f} Mo/s)\n')
+    if performances["rss_max"] is not None:
+        yield f'- Mémoire résidente maximale : {performances["rss_max"] / 1e6:.1f} Mo\n'
+    yield '''
+| Étage | Durée (s) | Éléments | Éléments/s |
+|---|---|---|---|
+'''
+    yield from joindre_lignes(f'| {etage["nom"]} | {etage["duree"]:.3f} | {etage["elements"]} | '
+                              f'{etage["par_seconde"] or 0:.0f} |' for etage in performances["etages"])
+    yield '\n\n'
+    yield from joindre_lignes(f'- {motif} : {nombre}' for motif, nombre in sorted(performances["motifs"].items()))
+    yield '\n'
+
+def sections_markdown(resultats, alertes_debit=None, bilan_connexions=None, captures=None, performances=None):
+    """
+    :param resultats: Tuple retourné par Analyser()
+    :param alertes_debit: Alertes d'un MoteurDebit (source -> valeurs), ou None
+    :param bilan_connexions: Résultat de SuiviConnexions.bilan(), ou None
+    :param captures: Mesures des captures d'un lot (voir analyser_lot()), ou None
+    :param performances: Résultat d'Instrumentation.apercu(), ou None
+    :return: Liste de triplets (clé, fonction section_*, arguments), dans l'ordre du compte rendu
+    """
+    http, https, http_final, domaine, ssh, icmp, icmp_req, icmp_rep, compteur, suspect, addresse, flags_connexion, flags_SynAcK, flags_deco, flags_push, flags_nokonnexion = resultats
+
+    sections = [
+        ("entete", section_entete, (compteur,)),
+        ("adresses", section_adresses, (addresse,)),
+        ("suspects", section_suspects, (suspect,)),
+        ("protocoles", section_protocoles, (ssh, http_final, https, domaine, icmp, icmp_req, icmp_rep)),
+        ("flags", section_flags, (flags_connexion, flags_SynAcK, flags_deco, flags_push, flags_nokonnexion)),
+    ]
+    if alertes_debit is not None:
+        sections.append(("rafales", section_rafales, (alertes_debit,)))
+    if bilan_connexions is not None:
+        sections.append(("connexions", section_connexions, (bilan_connexions,)))
+    if captures is not None:
+        sections.append(("captures", section_captures, (captures,)))
+    if performances is not None:
+        sections.append(("performances", section_performances, (performances,)))
+    return sections
+
+def section_html(fonction, arguments):
+    """
+    :param fonction: Fonction section_* produisant le Markdown de la section
+    :param arguments: Arguments de la fonction
+    :return: Liste d'un seul morceau : la section convertie en HTML
+    """
+    return [convertir_markdown_en_html("".join(fonction(*arguments)))]
+
+def rendre_artefacts(artefacts, fichier_empreintes=FICHIER_EMPREINTES, workers=4):
+    """
+    Produit des rapports indépendants en parallèle (pool de threads), section par
+    section (voir rapport_incremental.py) : un rapport dont aucune section n'a changé
+    depuis le rendu précédent, et dont le fichier est intact, n'est pas refait ; sinon
+    seules ses sections modifiées sont produites, les autres étant recopiées.
+
+    :param artefacts: Liste de triplets (chemin du fichier, sections, séparateur des sections),
+                      les sections étant des triplets (clé, empreinte, producteur)
+    :param fichier_empreintes: Fichier JSON de l'instantané du rendu précédent
+    :param workers: Nombre de threads
+    :return: Dictionnaire chemin -> durée du rendu en secondes, ou None s'il a été sauté
+    """
+    instantane = lire_instantane(fichier_empreintes)
+
+    def rendre(chemin, sections, separateur):
+        debut = time.perf_counter()
+        entree, _ = ecrire_sections(chemin, sections, instantane.get(chemin), separateur)
+        return entree, time.perf_counter() - debut
+
+    durees = {}
+    futurs = {}
+    with ThreadPoolExecutor(max_workers=workers) as executeur:
+        for chemin, sections, separateur in artefacts:
+            if sections_inchangees(chemin, sections, instantane.get(chemin)):
+                durees[chemin] = None
+            else:
+                futurs[chemin] = executeur.submit(rendre, chemin, sections, separateur)
+
+    # L'instantané n'est mis à jour que pour les rendus réussis
+    erreur = None
+    for chemin, futur in futurs.items():
+        try:
+            instantane[chemin], durees[chemin] = futur.result()
+        except Exception as exception:
+            instantane.pop(chemin, None)
+            erreur = erreur or exception
+
+    ecrire_instantane(fichier_empreintes, instantane)
+    if erreur is not None:
+        raise erreur
+    return {chemin: durees[chemin] for chemin, _, _ in artefacts}
+
+def ecrire_rapports(resultats, alertes_debit=None, bilan_connexions=None, formats=FORMATS, dossier="Projet",
+                    captures=None, performances=None):
+    """
+    Écrit le CSV des adresses, le graphique des suspects et le compte rendu Markdown/HTML.
+    Les fichiers sont produits en parallèle et seules les sections dont les données ont
+    changé depuis le dernier appel sont refaites.
+
+    :param resultats: Tuple retourné par Analyser()
+    :param alertes_debit: Alertes d'un MoteurDebit (source -> valeurs), ou None
+    :param bilan_connexions: Résultat de SuiviConnexions.bilan(), ou None
+    :param formats: Formats à produire, parmi FORMATS
+    :param dossier: Dossier des rapports (les noms de fichiers restent ceux de FICHIER_*)
+    :param captures: Mesures des captures d'un lot, ajoutées au compte rendu, ou None
+    :param performances: Résultat d'Instrumentation.apercu(), ajouté au compte rendu, ou None
+    :return: Dictionnaire chemin -> durée du rendu en secondes, ou None s'il a été sauté
+    """
+    suspect, addresse = resultats[9], resultats[10]
+    sections = sections_markdown(resultats, alertes_debit, bilan_connexions, captures, performances)
+    # Une empreinte par section, partagée par tous les fichiers qui en sont tirés
+    empreintes = {cle: empreinte_donnees(cle, *arguments) for cle, _, arguments in sections}
+
+    # Assurez-vous que le répertoire des rapports existe
+    os.makedirs(dossier, exist_ok=True)
+
+    def chemin(fichier):
+        return os.path.join(dossier, os.path.basename(fichier))
+
+    artefacts = []
+    if "csv" in formats:
+        artefacts.append((chemin(FICHIER_CSV), [("adresses", empreintes["adresses"], partial(lignes_csv, addresse))], ""))
+    if "png" in formats:
+        artefacts.append((chemin(FICHIER_GRAPHIQUE),
+                          [("suspects", empreintes["suspects"], partial(image_suspects, suspect))], ""))
+    if "md" in formats:
+        artefacts.append((chemin(FICHIER_MARKDOWN), [(cle, empreintes[cle], partial(fonction, *arguments))
+                                                     for cle, fonction, arguments in sections], ""))
+    if "html" in formats:
+        # python-markdown sépare les blocs par "\n" : convertir les sections une à une
+        # puis les joindre ainsi donne le même HTML que la conversion du document entier
+        artefacts.append((chemin(FICHIER_HTML), [(cle, empreintes[cle], partial(section_html, fonction, arguments))
+                                                 for cle, fonction, arguments in sections], "\n"))
+    return rendre_artefacts(artefacts, chemin(FICHIER_EMPREINTES))
+
+def debit_paquets(mesure):
+    """
+    :param mesure: Mesure d'une capture (voir mesurer_capture())
+    :return: Paquets analysés par seconde
+    """
+    return mesure["paquets"] / mesure["duree"] if mesure["duree"] else 0.0
+
+def debit_octets(mesure):
+    """
+    :param mesure: Mesure d'une capture (voir mesurer_capture())
+    :return: Octets analysés par seconde
+    """
+    return mesure["octets"] / mesure["duree"] if mesure["duree"] else 0.0
+
+def afficher_debits(mesures):
+    """
+    :param mesures: Mesures des captures analysées
+    """
+    largeur = max(len(mesure["fichier"]) for mesure in mesures)
+    for mesure in mesures:
+        print(f"{mesure['fichier']:<{largeur}}  {mesure['paquets']:>10,} paquets  {mesure['octets'] / 1e6:8.2f} Mo  "
+              f"{mesure['duree']:7.3f} s  {debit_paquets(mesure):>12,.0f} paquets/s  {debit_octets(mesure) / 1e6:7.2f} Mo/s")
+
+def afficher_durees(durees):
+    """
+    :param durees: Dictionnaire retourné par ecrire_rapports()
+    """
+    print("Rapports : " + ", ".join(
+        f"{os.path.basename(chemin)} {'inchangé' if duree is None else f'{duree:.3f} s'}"
+        for chemin, duree in durees.items()))
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyse de captures tcpdump")
+    parser.add_argument("captures", nargs="*", metavar="CAPTURE",
+                        help="fichiers tcpdump (texte, pcap ou pcapng), éventuellement compressés (gz, bz2, xz, zst), ou motifs (\"captures/*.txt\") à analyser (défaut : " + CAPTURE_DEFAUT + ")")
+    parser.add_argument("--jobs", "-j", type=int, default=os.cpu_count() or 1,
+                        help="plusieurs captures : nombre de captures analysées simultanément (défaut : nombre de CPU)")
+    parser.add_argument("--sortie", default="Projet",
+                        help="dossier des rapports (défaut : Projet) ; avec plusieurs captures, chacune a son "
+                             "sous-dossier et le dossier reçoit le bilan fusionné")
+    parser.add_argument("--resume", nargs="?", const="Projet/tcpdump_resume.txt", default=None,
+                        help="écrire aussi les lignes retenues dans ce fichier (défaut : Projet/tcpdump_resume.txt)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="nombre de processus pour analyser la capture (défaut : 1)")
+    parser.add_argument("--suivre", metavar="FICHIER",
+                        help="suivre une capture en cours d'écriture (\"-\" pour l'entrée standard)")
+    parser.add_argument("--intervalle", type=float, default=10.0,
+                        help="mode suivi : secondes entre deux rapports (défaut : 10)")
+    parser.add_argument("--paquets", type=int, default=1000,
+                        help="mode suivi : nouveaux paquets déclenchant un rapport (défaut : 1000)")
+    parser.add_argument("--checkpoint", default="Projet/tcpdump_suivi.json",
+                        help="mode suivi : fichier de reprise (défaut : Projet/tcpdump_suivi.json)")
+    parser.add_argument("--debit", action="store_true",
+                        help="détecter les rafales par fenêtres glissantes (paquets/s, SYN/s, destinations)")
+    parser.add_argument("--fenetre", type=int, default=10,
+                        help="détection des rafales : largeur de la fenêtre en secondes (défaut : 10)")
+    parser.add_argument("--seuil-paquets", type=float, default=100.0,
+                        help="détection des rafales : paquets/s maximum par source (défaut : 100)")
+    parser.add_argument("--seuil-syn", type=float, default=20.0,
+                        help="détection des rafales : SYN/s maximum par source (défaut : 20)")
+    parser.add_argument("--seuil-destinations", type=int, default=50,
+                        help="détection des rafales : destinations distinctes maximum par fenêtre (défaut : 50)")
+    parser.add_argument("--approx", action="store_true",
+                        help="compter les adresses avec des esquisses à mémoire fixe (résultats approchés)")
+    parser.add_argument("--top-k", type=int, default=100,
+                        help="mode --approx : nombre d'adresses les plus actives conservées (défaut : 100)")
+    parser.add_argument("--connexions", action="store_true",
+                        help="suivre les connexions TCP (poignée de main, fermeture, semi-ouvertes, RST)")
+    parser.add_argument("--delai-inactivite", type=float, default=300.0,
+                        help="suivi des connexions : secondes d'inactivité avant de clore un flux (défaut : 300)")
+    parser.add_argument("--cache", action="store_true",
+                        help="garder les paquets analysés dans <capture>.npz pour les analyses suivantes")
+    parser.add_argument("--format", nargs="+", choices=FORMATS, default=list(FORMATS), dest="formats",
+                        help="rapports à produire (défaut : csv png md html)")
+    parser.add_argument("--no-chart", action="store_true",
+                        help="ne pas dessiner le graphique des suspects (matplotlib n'est alors pas chargé)")
+    parser.add_argument("--instrumentation", nargs="?", const="Projet/instrumentation.json", default=None,
+                        metavar="JSON",
+                        help="mesurer chaque étage (durées, débits, motifs, mémoire) et écrire le bilan dans ce "
+                             "fichier (défaut : Projet/instrumentation.json)")
+    parser.add_argument("--cprofile", action="store_true",
+                        help="instrumentation : profiler les fonctions du thread principal (profil complet dans "
+                             "<JSON>.prof)")
+    parser.add_argument("--tracemalloc", action="store_true",
+                        help="instrumentation : suivre les allocations (pic et lignes retenant le plus de mémoire)")
+    parser.add_argument("--section-performances", action="store_true",
+                        help="instrumentation : ajouter une section Performances au compte rendu")
+    args = parser.parse_args()
+    if args.suivre and args.captures:
+        parser.error("--suivre ne prend pas d'autre capture")
+    try:
+        fichiers = developper_captures(args.captures or [CAPTURE_DEFAUT]) if not args.suivre else []
+    except FileNotFoundError as erreur:
+        parser.error(str(erreur))
+    if len(fichiers) > 1 and (args.resume or args.workers > 1 or args.cache):
+        parser.error("--resume, --workers et --cache ne sont disponibles que pour une seule capture")
+    if (args.cprofile or args.tracemalloc or args.section_performances) and not args.instrumentation:
+        parser.error("--cprofile, --tracemalloc et --section-performances demandent --instrumentation")
+    if args.instrumentation and (len(fichiers) != 1 or args.resume or args.workers > 1 or args.cache):
+        parser.error("--instrumentation ne mesure que l'analyse en série d'une seule capture "
+                     "(sans --resume, --workers, --cache ni --suivre)")
+    if args.jobs < 1:
+        parser.error("--jobs doit être supérieur ou égal à 1")
+    if args.workers < 1:
+        parser.error("--workers doit être supérieur ou égal à 1")
+    if args.workers > 1 and fichiers and compression_fichier(fichiers[0]):
+        parser.error("--workers n'est pas disponible pour une capture compressée (elle se lit d'un seul tenant)")
+    if args.workers > 1 and fichiers and format_capture(fichiers[0]):
+        parser.error("--workers n'est pas disponible pour une capture pcap ou pcapng")
+    if args.workers > 1 and args.resume:
+        parser.error("--resume n'est pas disponible avec plusieurs processus")
+    if args.workers > 1 and args.debit:
+        parser.error("--debit n'est pas disponible avec plusieurs processus")
+    if args.workers > 1 and args.connexions:
+        parser.error("--connexions n'est pas disponible avec plusieurs processus")
+    if args.cache and (args.resume or args.workers > 1 or args.approx or args.suivre):
+        parser.error("--cache n'est pas disponible avec --resume, --workers, --approx ou --suivre")
+    if args.top_k < 1:
+        parser.error("--top-k doit être supérieur ou égal à 1")
+    approx = {"top_k": args.top_k} if args.approx else None
+    formats = [nom for nom in args.formats if not (args.no_chart and nom == "png")]
+
+    parametres_debit = (args.fenetre, args.seuil_paquets, args.seuil_syn, args.seuil_destinations)
+
+    if len(fichiers) > 1:
+        options = {"approx": approx, "debit": parametres_debit if args.debit else None,
+                   "delai_inactivite": args.delai_inactivite if args.connexions else None, "formats": formats}
+        total, mesures = analyser_lot(fichiers, options, args.sortie, min(args.jobs, len(fichiers)))
+        durees = ecrire_rapports(total.resultats(), formats=formats, dossier=args.sortie, captures=mesures)
+        afficher_debits(mesures)
+        afficher_durees(durees)
+        print("Done.")
+        return
+
+    moteur_debit = MoteurDebit(*parametres_debit) if args.debit else None
+    suivi_connexions = SuiviConnexions(args.delai_inactivite) if args.connexions else None
+
+    if args.suivre:
+        suivre_capture(args.suivre, args.intervalle, args.paquets, args.checkpoint, moteur_debit=moteur_debit,
+                       approx=approx, suivi_connexions=suivi_connexions, formats=formats, dossier=args.sortie)
+        print("Done.")
+        return
+
+    fichier = fichiers[0]
+    instrumentation = None
+    if args.instrumentation:
+        from instrumentation import Instrumentation
+        instrumentation = Instrumentation(args.cprofile, args.tracemalloc)
+        instrumentation.demarrer()
 
-    # Convertir le texte Markdown en HTML
-    html_output = markdown.markdown(markdown_text)
+    # Filtrage et analyse en un seul passage ; le résumé n'est écrit que sur demande
+    debut = time.perf_counter()
+    lecture = CompteurLecture()
+    if instrumentation is not None:
+        resultats = analyser_capture_instrumentee(fichier, instrumentation, moteur_debit, approx, suivi_connexions)
+        lecture.paquets = instrumentation.elements("lecture")
+    elif args.cache:
+        resultats = analyser_capture_cache(fichier, moteur_debit, suivi_connexions, lecture)
+    elif args.workers > 1:
+        resultats = analyser_capture_parallele(fichier, args.workers, approx, lecture)
+    else:
+        resultats = analyser_capture(fichier, args.resume, moteur_debit, approx, suivi_connexions, lecture)
+    mesure = mesurer_capture(fichier, time.perf_counter() - debut, lecture.paquets)
+    performances = instrumentation.apercu(mesure) if args.section_performances else None
+    durees = ecrire_rapports(resultats, moteur_debit.alertes if moteur_debit else None,
+                             suivi_connexions.bilan() if suivi_connexions else None, formats, args.sortie,
+                             performances=performances)
+    afficher_debits([mesure])
+    afficher_durees(durees)
 
-    # Écrire le contenu HTML dans un fichier
-    with open("Projet/compte_rendu.html", "w") as file:
-        file.write(html_output)
+    if instrumentation is not None:
+        from instrumentation import ecrire_resume
+        for chemin, duree in durees.items():
+            if duree is not None:
+                instrumentation.ajouter_etape("rendu " + os.path.basename(chemin), duree)
+        instrumentation.arreter()
+        fichier_profil = os.path.splitext(args.instrumentation)[0] + ".prof" if args.cprofile else None
+        ecrire_resume(instrumentation.resume(mesure, fichier_profil), args.instrumentation)
+        print(f"Instrumentation : {args.instrumentation}")
 
     print("Done.")
 
@@ -0,0 +1,760 @@
+# -*- coding: utf-8 -*-
+"""
+Mesures de performance des traitements du fichier tcpdump.
+
+Utilisation (depuis la racine du dépôt) :
+    python Projet/benchmark.py classifieur [fichier]
+    python Projet/benchmark.py workers [fichier] [--copies N]
+    python Projet/benchmark.py esquisses [fichier] [--top-k K]
+    python Projet/benchmark.py vectorise [fichier]
+    python Projet/benchmark.py demarrage [-n N]
+    python Projet/benchmark.py generer {tcpdump,ics} lignes fichier [--graine G]
+    python Projet/benchmark.py echelle [--tailles N ...] [--sortie JSON] [--reference JSON]
+    python Projet/benchmark.py compression [fichier] [--lignes N] [--formats gz bz2 xz zst]
+    python Projet/benchmark.py pcap [--lignes N]
+    python Projet/benchmark.py calendrier [--lignes N]
+    python Projet/benchmark.py index [--lignes N]
+"""
+
+import argparse
+import json
+import os
+import platform
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+from colonnes_paquets import ColonnesPaquets, histogramme_par_seconde, statistiques_colonnes
+from decompression import (EXTENSIONS, PROFONDEUR, blocs_decompresses, lire_entetes_compresses, ouvrir_flux,
+                           profondeur_par_defaut)
+from detection_debit import formater_horodatage
+from generateurs import ecrire_lignes, ecrire_pcap, lignes_ics, lignes_tcpdump
+from parseur_tcpdump import lire_entetes, lire_paquets
+from Traitement_text import (Analyser, StatistiquesApprochees, StatistiquesTrafic, agreger_paquets, analyser_capture,
+                             analyser_capture_parallele, analyser_vectorise, compter_lignes,
+                             filtrer_lignes_interessantes, paquets_interessants)
+
+FICHIER_DEFAUT = "Projet/tcpdump_new.txt"
+FICHIER_ECHELLE = "Projet/benchmark_echelle.json"
+DOSSIER_TP1 = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "TP1")
+
+# Tailles mesurées par défaut ; 10^7 et 10^8 lignes (de l'ordre de 0,7 et 7 Go de
+# capture) se demandent explicitement avec --tailles
+TAILLES_ECHELLE = (10**4, 10**5, 10**6)
+
+# Motifs de la version d'origine d'Analyser(), conservés comme référence
+Ip_pattern = re.compile(r'IP (\S+)')
+IP_pattern3 = re.compile(r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}')
+port_pattern = re.compile(r'\.\d+$')
+
+def analyser_reference(log_contents):
+    """
+    Version d'origine d'Analyser() : un test "in" par mot-clé puis quatre findall
+    par ligne. Sert de point de comparaison ("avant") pour les mesures.
+
+    :param log_contents: Chemin du fichier tcpdump
+    :return: Même tuple que Analyser()
+    """
+    with open(log_contents, "r") as f:
+        http = https = domaine = ssh = icmp_req = icmp_rep = flags_connexion = flags_SynAcK = flags_deco = flags_push = flags_nokonnexion = compteur = 0
+        occurence = {}
+        allip = {}
+
+        for line in f:
+            if '.domain' in line:
+                domaine += 1
+            if 'ssh' in line:
+                ssh += 1
+            if 'https' in line:
+                https += 1
+            if 'http' in line:
+                http += 1
+            if 'ICMP echo request' in line:
+                icmp_req += 1
+            if 'ICMP echo reply' in line:
+                icmp_rep += 1
+            if 'Flags [S]' in line:
+                flags_connexion += 1
+            if 'Flags [S.]' in line:
+                flags_SynAcK += 1
+            if 'Flags [F.]' in line:
+                flags_deco += 1
+            if 'Flags [P.]' in line:
+                flags_push += 1
+            if 'Flags [.]' in line:
+                flags_nokonnexion += 1
+
+            for motif in (Ip_pattern, IP_pattern3):
+                for ip2 in motif.findall(line):
+                    clean_ip2 = port_pattern.sub('', ip2)
+                    allip[clean_ip2] = allip.get(clean_ip2, 0) + 1
+
+            for ip in Ip_pattern.findall(line):
+                clean_ip = port_pattern.sub('', ip)
+                compteur += 1
+                if 'https' not in clean_ip:
+                    occurence[clean_ip] = occurence.get(clean_ip, 0) + 1
+
+            for ip in IP_pattern3.findall(line):
+                clean_ip = port_pattern.sub('', ip)
+                if 'https' not in clean_ip:
+                    occurence[clean_ip] = occurence.get(clean_ip, 0) + 1
+
+    moyenne = sum(occurence.values()) / len(occurence)
+    suspect = {cle: valeur for cle, valeur in occurence.items() if valeur > moyenne}
+
+    http_final = http - https
+    icmp = icmp_req + icmp_rep
+
+    return http, https, http_final, domaine, ssh, icmp, icmp_req, icmp_rep, compteur, suspect, allip, flags_connexion, flags_SynAcK, flags_deco, flags_push, flags_nokonnexion
+
+def mesurer(fonction, *args, repetitions=5):
+    """
+    Exécute plusieurs fois une fonction et garde le meilleur temps.
+
+    :param fonction: Fonction à mesurer
+    :param args: Arguments passés à la fonction
+    :param repetitions: Nombre d'exécutions
+    :return: Couple (meilleur temps en secondes, résultat de la dernière exécution)
+    """
+    meilleur = float("inf")
+    resultat = None
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        resultat = fonction(*args)
+        meilleur = min(meilleur, time.perf_counter() - debut)
+    return meilleur, resultat
+
+def bench_classifieur(fichier, repetitions=5):
+    """
+    Compare le débit (lignes/s) d'Analyser() dans sa version d'origine et actuelle.
+
+    :param fichier: Fichier tcpdump à analyser
+    :param repetitions: Nombre d'exécutions par version
+    """
+    nb_lignes = compter_lignes(fichier)
+    temps_avant, resultat_avant = mesurer(analyser_reference, fichier, repetitions=repetitions)
+    temps_apres, resultat_apres = mesurer(Analyser, fichier, repetitions=repetitions)
+
+    print(f"Fichier : {fichier} ({nb_lignes} lignes)")
+    print(f"- Avant : {nb_lignes / temps_avant:,.0f} lignes/s ({temps_avant:.3f} s)")
+    print(f"- Après : {nb_lignes / temps_apres:,.0f} lignes/s ({temps_apres:.3f} s)")
+    print(f"- Gain : x{temps_avant / temps_apres:.2f}")
+    # Les dictionnaires d'adresses sont désormais indexés par hôte (sans port) :
+    # seuls les compteurs de protocoles et de flags sont comparables
+    compteurs_avant = [valeur for valeur in resultat_avant if not isinstance(valeur, dict)]
+    compteurs_apres = [valeur for valeur in resultat_apres if not isinstance(valeur, dict)]
+    print(f"- Compteurs identiques : {compteurs_avant == compteurs_apres}")
+
+def dupliquer_capture(fichier, copies):
+    """
+    Crée un fichier temporaire contenant plusieurs fois la même capture, pour
+    mesurer sur un volume où le coût des processus devient négligeable.
+
+    :param fichier: Capture d'origine
+    :param copies: Nombre de copies concaténées
+    :return: Chemin du fichier temporaire (à supprimer par l'appelant)
+    """
+    descripteur, chemin = tempfile.mkstemp(suffix=".txt")
+    with open(descripteur, "wb") as destination:
+        for _ in range(copies):
+            with open(fichier, "rb") as source:
+                shutil.copyfileobj(source, destination)
+    return chemin
+
+def bench_workers(fichier, copies=1, liste_workers=(1, 2, 4, 8), repetitions=3):
+    """
+    Mesure le passage à l'échelle du mode parallèle (1, 2, 4, 8 processus).
+
+    :param fichier: Fichier tcpdump à analyser
+    :param copies: Nombre de copies de la capture à concaténer avant la mesure
+    :param liste_workers: Nombres de processus à tester
+    :param repetitions: Nombre d'exécutions par configuration
+    """
+    chemin = dupliquer_capture(fichier, copies) if copies > 1 else fichier
+    try:
+        nb_lignes = compter_lignes(chemin)
+        print(f"Fichier : {fichier} x{copies} ({nb_lignes} lignes, {os.cpu_count()} coeurs)")
+
+        temps_serie, resultat_serie = mesurer(analyser_capture, chemin, repetitions=repetitions)
+        print(f"- Série : {nb_lignes / temps_serie:,.0f} lignes/s ({temps_serie:.3f} s)")
+
+        for workers in liste_workers:
+            temps, resultat = mesurer(analyser_capture_parallele, chemin, workers, repetitions=repetitions)
+            print(f"- {workers} processus : {nb_lignes / temps:,.0f} lignes/s ({temps:.3f} s), "
+                  f"accélération x{temps_serie / temps:.2f}, identique : {resultat == resultat_serie}")
+    finally:
+        if chemin != fichier:
+            os.remove(chemin)
+
+def mesurer_memoire(classe, fichier, **parametres):
+    """
+    Crée et remplit des statistiques avec une capture en mesurant la mémoire allouée.
+
+    :param classe: StatistiquesTrafic ou StatistiquesApprochees
+    :param fichier: Fichier tcpdump à analyser
+    :param parametres: Arguments passés au constructeur
+    :return: Triplet (statistiques, pic de mémoire en octets, temps en secondes)
+    """
+    tracemalloc.start()
+    debut = time.perf_counter()
+    statistiques = classe(**parametres)
+    statistiques.ajouter_paquets(paquets_interessants(lire_entetes(fichier)))
+    temps = time.perf_counter() - debut
+    _, pic = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistiques, pic, temps
+
+def bench_esquisses(fichier, top_k=100):
+    """
+    Compare les dictionnaires exacts et les esquisses de --approx : mémoire, temps,
+    erreur relative sur les adresses les plus actives et sur le nombre de sources.
+
+    :param fichier: Fichier tcpdump à analyser
+    :param top_k: Nombre d'adresses conservées par les esquisses
+    """
+    exactes, memoire_exacte, temps_exact = mesurer_memoire(StatistiquesTrafic, fichier)
+    approchees, memoire_approchee, temps_approche = mesurer_memoire(StatistiquesApprochees, fichier, top_k=top_k)
+
+    print(f"Fichier : {fichier} ({exactes.compteurs['compteur']} paquets, "
+          f"{len(exactes.occurence)} sources, {len(exactes.allip)} adresses)")
+    print(f"- Exact : pic mémoire {memoire_exacte / 1024:,.0f} Kio, {temps_exact:.3f} s")
+    print(f"- Esquisses (top {top_k}) : pic mémoire {memoire_approchee / 1024:,.0f} Kio, {temps_approche:.3f} s")
+
+    comparaisons = (
+        ("sources", exactes.occurence, approchees.top_sources),
+        ("adresses", exactes.allip, approchees.top_adresses),
+    )
+    for nom, reference, top in comparaisons:
+        estimations = top.resultats()
+        vrais = sorted(reference, key=reference.get, reverse=True)[:top_k]
+        if not vrais:
+            continue
+        erreurs = [abs(estimations.get(cle, 0) - reference[cle]) / reference[cle] for cle in vrais]
+        trouves = sum(1 for cle in vrais if cle in estimations)
+        print(f"- Top {len(vrais)} {nom} : {trouves} retrouvées, erreur relative moyenne "
+              f"{sum(erreurs) / len(erreurs):.2%}, maximale {max(erreurs):.2%}")
+
+    nb_sources, _ = approchees.cardinalites()
+    print(f"- Sources distinctes : {len(exactes.occurence)} réelles, {nb_sources} estimées (HyperLogLog)")
+
+    suspects_exacts = exactes.resultats()[9]
+    suspects_approches = approchees.resultats()[9]
+    print(f"- Suspects : {len(suspects_exacts)} exacts, {len(suspects_approches)} approchés, "
+          f"{len(suspects_exacts.keys() & suspects_approches.keys())} en commun")
+
+def bench_vectorise(fichier, repetitions=5):
+    """
+    Compare Analyser() et sa version NumPy, de bout en bout puis pour la seule
+    agrégation (paquets déjà analysés en mémoire).
+
+    :param fichier: Fichier tcpdump à analyser
+    :param repetitions: Nombre d'exécutions par version
+    """
+    nb_lignes = compter_lignes(fichier)
+    temps_python, resultat_python = mesurer(Analyser, fichier, repetitions=repetitions)
+    temps_numpy, resultat_numpy = mesurer(analyser_vectorise, fichier, repetitions=repetitions)
+    print(f"Fichier : {fichier} ({nb_lignes} lignes)")
+    print(f"- Analyser() : {nb_lignes / temps_python:,.0f} lignes/s ({temps_python:.3f} s)")
+    print(f"- analyser_vectorise() : {nb_lignes / temps_numpy:,.0f} lignes/s ({temps_numpy:.3f} s), "
+          f"gain x{temps_python / temps_numpy:.2f}, identique : {resultat_python == resultat_numpy}")
+
+    paquets = list(lire_paquets(lire_entetes(fichier)))
+    temps_construction, colonnes = mesurer(ColonnesPaquets.depuis_paquets, paquets, repetitions=repetitions)
+    temps_dict, _ = mesurer(agreger_paquets, paquets, repetitions=repetitions)
+    temps_colonnes, _ = mesurer(statistiques_colonnes, colonnes, repetitions=repetitions)
+    print(f"- Agrégation de {len(paquets)} paquets : dictionnaires {temps_dict * 1000:.1f} ms, "
+          f"colonnes {temps_colonnes * 1000:.1f} ms (+ {temps_construction * 1000:.1f} ms de mise en colonnes), "
+          f"gain x{temps_dict / temps_colonnes:.1f}")
+
+    secondes, comptes = histogramme_par_seconde(colonnes)
+    if len(comptes):
+        pic = int(comptes.argmax())
+        print(f"- Débit maximal : {comptes[pic]} paquets/s à {formater_horodatage(secondes[pic])}")
+
+# Modules chargés à la demande par Traitement_text, selon les rapports et options demandés
+MODULES_DIFFERES = ("colonnes_paquets", "markdown", "matplotlib.figure", "concurrent.futures.process")
+
+def temps_import(modules, repetitions=5):
+    """
+    Temps d'import mesuré par "python -X importtime" dans un interpréteur neuf.
+
+    :param modules: Modules importés, dans l'ordre
+    :param repetitions: Nombre d'interpréteurs lancés (le meilleur temps de chaque module est gardé)
+    :return: Dictionnaire module de premier niveau -> temps cumulé en secondes
+    """
+    commande = [sys.executable, "-X", "importtime", "-c", "import " + ", ".join(modules)]
+    meilleurs = {}
+    for _ in range(repetitions):
+        sortie = subprocess.run(commande, cwd=os.path.dirname(os.path.abspath(__file__)),
+                                capture_output=True, text=True, check=True).stderr
+        for ligne in sortie.splitlines():
+            # "import time: <propre µs> | <cumulé µs> | <module>", le module indenté selon sa profondeur
+            champs = ligne.split("|")
+            if len(champs) != 3 or not champs[1].strip().isdigit() or champs[2].startswith("  "):
+                continue
+            nom = champs[2].strip()
+            temps = int(champs[1]) / 1e6
+            meilleurs[nom] = min(meilleurs.get(nom, temps), temps)
+    return meilleurs
+
+def bench_demarrage(repetitions=5):
+    """
+    Temps de démarrage de Traitement_text : import seul (ce que paient --help, --format csv,
+    --no-chart...), puis coût de chaque module chargé à la demande.
+
+    :param repetitions: Nombre d'interpréteurs lancés par mesure
+    """
+    seul = temps_import(["Traitement_text"], repetitions)["Traitement_text"]
+    complet = temps_import(["Traitement_text", *MODULES_DIFFERES], repetitions)
+    print(f"- import Traitement_text : {seul * 1000:.1f} ms")
+    for module in MODULES_DIFFERES:
+        print(f"  + {module} (à la demande) : {complet.get(module, 0.0) * 1000:.1f} ms")
+    total = sum(complet.get(module, 0.0) for module in ("Traitement_text", *MODULES_DIFFERES))
+    print(f"- Tout charger au démarrage : {total * 1000:.1f} ms, soit x{total / seul:.1f}")
+
+GENERATEURS = {"tcpdump": lignes_tcpdump, "ics": lignes_ics}
+
+def donnees_synthetiques(dossier, format_donnees, nb_lignes, graine=0):
+    """
+    Génère (ou réutilise) un fichier synthétique : le nom dépend de la taille et de la
+    graine, donc un fichier déjà présent contient exactement les mêmes données.
+
+    :param dossier: Dossier des fichiers générés
+    :param format_donnees: "tcpdump" ou "ics"
+    :param nb_lignes: Nombre de lignes demandé
+    :param graine: Graine des générateurs
+    :return: Chemin du fichier
+    """
+    extension = "txt" if format_donnees == "tcpdump" else "ics"
+    chemin = os.path.join(dossier, f"{format_donnees}_{nb_lignes}_{graine}.{extension}")
+    if not os.path.exists(chemin):
+        temporaire = chemin + ".tmp"
+        ecrire_lignes(temporaire, GENERATEURS[format_donnees](nb_lignes, graine))
+        os.replace(temporaire, chemin)
+    return chemin
+
+def extraire_fichier(fichier):
+    """
+    :param fichier: Fichier tcpdump
+    :return: Résultat d'extraire_informations() (TP1/Test.py) sur le fichier lu au fil de l'eau
+    """
+    from Test import extraire_informations
+    with open(fichier, "r", encoding="utf-8") as f:
+        return extraire_informations(f)
+
+def ajouter_dossier_tp1():
+    """
+    Rend importables les programmes du TP1 (calendrier ICS, extraction des adresses),
+    qui sont dans un dossier voisin.
+    """
+    if DOSSIER_TP1 not in sys.path:
+        sys.path.insert(0, DOSSIER_TP1)
+
+def fonctions_echelle(dossier):
+    """
+    :param dossier: Dossier de travail (sortie de filtrer_lignes_interessantes())
+    :return: Liste de triplets (nom, format des données, fonction du fichier)
+    """
+    ajouter_dossier_tp1()
+    from Programme2 import parse_ics
+
+    resume = os.path.join(dossier, "resume.txt")
+    return [
+        ("Analyser", "tcpdump", Analyser),
+        ("filtrer_lignes_interessantes", "tcpdump", lambda fichier: filtrer_lignes_interessantes(fichier, resume)),
+        ("extraire_informations", "tcpdump", extraire_fichier),
+        ("parse_ics", "ics", parse_ics),
+    ]
+
+def comparer(mesure, reference):
+    """
+    :param mesure: Mesure de bench_echelle()
+    :param reference: Mesures d'une exécution précédente, ou None
+    :return: Rapport des débits (actuel / référence) pour la même fonction et la même taille, ou None
+    """
+    for ancienne in (reference or {}).get("mesures", []):
+        if ancienne["fonction"] == mesure["fonction"] and ancienne["taille"] == mesure["taille"]:
+            return mesure["lignes_par_seconde"] / ancienne["lignes_par_seconde"]
+    return None
+
+def bench_echelle(tailles=TAILLES_ECHELLE, fichier_json=FICHIER_ECHELLE, dossier=None, graine=0, repetitions=1,
+                  fichier_reference=None):
+    """
+    Passage à l'échelle d'Analyser(), filtrer_lignes_interessantes(), extraire_informations()
+    et parse_ics() sur des données synthétiques reproductibles (voir generateurs.py).
+
+    :param tailles: Nombres de lignes des fichiers générés
+    :param fichier_json: Fichier JSON où enregistrer les mesures
+    :param dossier: Dossier où garder les fichiers générés (réutilisés d'une exécution à
+                    l'autre), ou None pour un dossier temporaire
+    :param graine: Graine des générateurs
+    :param repetitions: Nombre d'exécutions par mesure (le meilleur temps est gardé)
+    :param fichier_reference: Fichier JSON d'une exécution précédente à comparer, ou None
+    """
+    reference = None
+    if fichier_reference is not None:
+        with open(fichier_reference, "r", encoding="utf-8") as f:
+            reference = json.load(f)
+
+    resultats = {
+        "python": platform.python_version(),
+        "plateforme": platform.platform(),
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "graine": graine,
+        "repetitions": repetitions,
+        "mesures": [],
+    }
+    temporaire = tempfile.TemporaryDirectory() if dossier is None else None
+    dossier = dossier or temporaire.name
+    os.makedirs(dossier, exist_ok=True)
+    try:
+        fonctions = fonctions_echelle(dossier)
+        for taille in tailles:
+            for nom, format_donnees, fonction in fonctions:
+                fichier = donnees_synthetiques(dossier, format_donnees, taille, graine)
+                nb_lignes = compter_lignes(fichier)
+                duree, _ = mesurer(fonction, fichier, repetitions=repetitions)
+                mesure = {"fonction": nom, "taille": taille, "lignes": nb_lignes,
+                          "octets": os.path.getsize(fichier), "duree": duree,
+                          "lignes_par_seconde": nb_lignes / duree}
+                mesure["octets_par_seconde"] = mesure["octets"] / duree
+                rapport = comparer(mesure, reference)
+                print(f"- {nom} ({taille:,} lignes) : {mesure['lignes_par_seconde']:,.0f} lignes/s, "
+                      f"{mesure['octets_par_seconde'] / 1e6:.1f} Mo/s ({duree:.3f} s)"
+                      + (f", x{rapport:.2f} / référence" if rapport is not None else ""))
+                resultats["mesures"].append(mesure)
+    finally:
+        if temporaire is not None:
+            temporaire.cleanup()
+
+    chemin_temporaire = fichier_json + ".tmp"
+    with open(chemin_temporaire, "w", encoding="utf-8") as f:
+        json.dump(resultats, f, indent=2, ensure_ascii=False)
+    os.replace(chemin_temporaire, fichier_json)
+    print(f"Mesures : {fichier_json}")
+
+def compresser(source, destination, compression):
+    """
+    :param source: Fichier à compresser
+    :param destination: Fichier compressé à écrire
+    :param compression: "gz", "bz2", "xz" ou "zst"
+    """
+    with open(source, "rb") as entree, ouvrir_flux(destination, compression, "wb") as sortie:
+        shutil.copyfileobj(entree, sortie, 1 << 20)
+
+def decompresser_puis_analyser(fichier, compression, dossier):
+    """
+    Façon de faire sans lecture compressée : décompression sur disque, puis analyse.
+
+    :return: Même tuple que Analyser()
+    """
+    chemin = os.path.join(dossier, "decompresse.txt")
+    try:
+        with ouvrir_flux(fichier, compression) as entree, open(chemin, "wb") as sortie:
+            shutil.copyfileobj(entree, sortie, 1 << 20)
+        return Analyser(chemin)
+    finally:
+        os.remove(chemin)
+
+def bench_compression(fichier=None, nb_lignes=10**6, formats=tuple(EXTENSIONS), repetitions=3):
+    """
+    Débit de l'analyse d'une capture compressée : décompression seule, lecture en continu
+    avec et sans thread de décompression, et décompression sur disque puis analyse.
+
+    :param fichier: Capture tcpdump, ou None pour une capture synthétique
+    :param nb_lignes: Nombre de lignes de la capture synthétique
+    :param formats: Formats de compression mesurés
+    :param repetitions: Nombre d'exécutions par mesure
+    """
+    with tempfile.TemporaryDirectory() as dossier:
+        if fichier is None:
+            fichier = os.path.join(dossier, "capture.txt")
+            ecrire_lignes(fichier, lignes_tcpdump(nb_lignes))
+        nb_lignes = compter_lignes(fichier)
+        taille = os.path.getsize(fichier)
+        temps_texte, reference = mesurer(Analyser, fichier, repetitions=repetitions)
+        print(f"Fichier : {fichier} ({nb_lignes} lignes, {taille / 1e6:.1f} Mo)")
+        print(f"- Texte : {nb_lignes / temps_texte:,.0f} lignes/s ({temps_texte:.3f} s)")
+
+        for compression in formats:
+            chemin = os.path.join(dossier, "capture.txt" + EXTENSIONS[compression])
+            try:
+                compresser(fichier, chemin, compression)
+            except ImportError as erreur:
+                print(f"- {compression} : ignoré ({erreur})")
+                continue
+            compresse = os.path.getsize(chemin)
+
+            def decompresser_seul():
+                for _ in blocs_decompresses(chemin, compression, profondeur=0):
+                    pass
+
+            def analyser_sans_thread():
+                return agreger_paquets(lire_paquets(lire_entetes_compresses(chemin, compression, profondeur=0)))
+
+            temps_seul, _ = mesurer(decompresser_seul, repetitions=repetitions)
+            temps_serie, resultat_serie = mesurer(analyser_sans_thread, repetitions=repetitions)
+            def analyser_avec_thread():
+                return agreger_paquets(lire_paquets(lire_entetes_compresses(chemin, compression,
+                                                                            profondeur=PROFONDEUR)))
+
+            temps_thread, resultat_thread = mesurer(analyser_avec_thread, repetitions=repetitions)
+            temps_defaut, resultat_defaut = mesurer(Analyser, chemin, repetitions=repetitions)
+            temps_disque, _ = mesurer(decompresser_puis_analyser, chemin, compression, dossier,
+                                      repetitions=repetitions)
+            print(f"- {compression} (x{taille / compresse:.1f}, {compresse / 1e6:.1f} Mo) :")
+            print(f"  décompression seule : {taille / temps_seul / 1e6:.1f} Mo/s ({temps_seul:.3f} s)")
+            print(f"  sans thread : {nb_lignes / temps_serie:,.0f} lignes/s ({temps_serie:.3f} s)")
+            print(f"  avec thread : {nb_lignes / temps_thread:,.0f} lignes/s ({temps_thread:.3f} s), "
+                  f"{compresse / temps_thread / 1e6:.1f} Mo compressés/s, x{temps_serie / temps_thread:.2f} / sans thread")
+            print(f"  Analyser() ({'avec' if profondeur_par_defaut() else 'sans'} thread sur {os.cpu_count()} CPU) : "
+                  f"{nb_lignes / temps_defaut:,.0f} lignes/s ({temps_defaut:.3f} s)")
+            print(f"  décompression sur disque puis analyse : {temps_disque:.3f} s, "
+                  f"x{temps_disque / temps_defaut:.2f} plus lent")
+            print(f"  identique au texte : "
+                  f"{resultat_serie == reference and resultat_thread == reference and resultat_defaut == reference}")
+
+def bench_pcap(nb_lignes=10**6, repetitions=3):
+    """
+    Analyse d'une même capture synthétique en texte tcpdump, en pcap et en pcapng.
+
+    :param nb_lignes: Nombre de lignes de la capture texte
+    :param repetitions: Nombre d'exécutions par format
+    """
+    with tempfile.TemporaryDirectory() as dossier:
+        texte = os.path.join(dossier, "capture.txt")
+        ecrire_lignes(texte, lignes_tcpdump(nb_lignes))
+        binaires = {"pcap": os.path.join(dossier, "capture.pcap"), "pcapng": os.path.join(dossier, "capture.pcapng")}
+        for format_binaire, chemin in binaires.items():
+            ecrire_pcap(chemin, lire_paquets(lire_entetes(texte)), pcapng=format_binaire == "pcapng")
+
+        temps_texte, reference = mesurer(Analyser, texte, repetitions=repetitions)
+        nb_paquets = reference[8]
+        print(f"Capture : {nb_lignes} lignes, {nb_paquets} paquets")
+        print(f"- Texte : {os.path.getsize(texte) / 1e6:.1f} Mo, {nb_paquets / temps_texte:,.0f} paquets/s "
+              f"({temps_texte:.3f} s)")
+        # Les hôtes nommés du texte ("BP-Linux0") reçoivent une adresse dans le binaire :
+        # seuls les compteurs et le nombre d'adresses sont comparables
+        compteurs = [valeur for valeur in reference if not isinstance(valeur, dict)]
+        for format_binaire, chemin in binaires.items():
+            temps, resultat = mesurer(Analyser, chemin, repetitions=repetitions)
+            taille = os.path.getsize(chemin)
+            identique = ([valeur for valeur in resultat if not isinstance(valeur, dict)] == compteurs
+                         and len(resultat[10]) == len(reference[10]))
+            print(f"- {format_binaire} : {taille / 1e6:.1f} Mo, {nb_paquets / temps:,.0f} paquets/s, "
+                  f"{taille / temps / 1e6:.1f} Mo/s ({temps:.3f} s), x{temps_texte / temps:.2f} / texte, "
+                  f"compteurs identiques : {identique}")
+
+def parse_ics_reference(fichier):
+    """
+    Version d'origine de parse_ics() : toutes les lignes du fichier dans une liste
+    (ancienne fonction tab()) puis la liste des événements. Sert de point de comparaison pour bench_calendrier().
+
+    :param fichier: Chemin du fichier ICS
+    :return: Liste de chaînes de caractères formatées
+    """
+    from Programme2 import parse_event
+
+    with open(fichier, "r", encoding="utf-8") as f:
+        lines = [line.strip() for line in f]
+    events = []
+    current_event = []
+    for line in lines:
+        if line == "BEGIN:VEVENT":
+            current_event = []
+        elif line == "END:VEVENT":
+            events.append(parse_event(current_event))
+            current_event = []
+        else:
+            current_event.append(line)
+    return events
+
+def compter_evenements(fichier):
+    """
+    :param fichier: Chemin du fichier ICS
+    :return: Nombre d'événements, consommés un à un par iter_events() sans être conservés
+    """
+    from Programme2 import iter_events
+    return sum(1 for _ in iter_events(fichier))
+
+def bench_calendrier(nb_lignes=2 * 10**6, repetitions=3):
+    """
+    Mémoire et temps de lecture d'un grand calendrier synthétique : parse_ics() d'origine,
+    parse_ics() sur iter_events() (liste des résultats) et iter_events() seul (flux).
+
+    :param nb_lignes: Nombre approximatif de lignes du calendrier
+    :param repetitions: Nombre d'exécutions pour la mesure du temps
+    """
+    ajouter_dossier_tp1()
+    from Programme2 import parse_ics
+
+    fonctions = (
+        ("parse_ics d'origine (tab)", parse_ics_reference),
+        ("parse_ics (iter_events)", parse_ics),
+        ("iter_events (flux)", compter_evenements),
+    )
+    with tempfile.TemporaryDirectory() as dossier:
+        fichier = os.path.join(dossier, "calendrier.ics")
+        ecrire_lignes(fichier, lignes_ics(nb_lignes))
+        print(f"Calendrier : {nb_lignes} lignes, {os.path.getsize(fichier) / 1e6:.1f} Mo")
+        for nom, fonction in fonctions:
+            # Temps sans tracemalloc (qui ralentit chaque allocation), puis pic mémoire
+            temps, resultat = mesurer(fonction, fichier, repetitions=repetitions)
+            nb_evenements = resultat if isinstance(resultat, int) else len(resultat)
+            del resultat
+            tracemalloc.start()
+            fonction(fichier)
+            _, pic = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"- {nom} : {nb_evenements} événements, pic mémoire {pic / 1024:,.0f} Kio, "
+                  f"{nb_evenements / temps:,.0f} événements/s ({temps:.3f} s)")
+
+def recherche_lineaire(evenements, debut, fin):
+    """
+    Même recherche que l'index (séances de TP de R1.07 du groupe A sur une période),
+    par parcours de tous les événements, pour comparaison.
+
+    :param evenements: Liste d'Evenement
+    :param debut: Début de la période (datetime inclus)
+    :param fin: Fin de la période (datetime exclu)
+    :return: Liste des événements retenus
+    """
+    from calendrier_ics import lire_date
+    from index_evenements import cles_evenement
+
+    demandes = {("ressource", "R1.07"), ("type_seance", "TP"), ("groupe", "A")}
+    retenus = []
+    for evenement in evenements:
+        date = lire_date(evenement.get("DTSTART", ""))
+        if date is not None and debut <= date < fin and demandes <= cles_evenement(evenement):
+            retenus.append(evenement)
+    return retenus
+
+def bench_index(nb_lignes=2 * 10**6, repetitions=1000):
+    """
+    Construction du calendrier indexé et temps de quelques recherches, comparés au
+    parcours linéaire des événements.
+
+    :param nb_lignes: Nombre approximatif de lignes du calendrier synthétique
+    :param repetitions: Nombre d'exécutions de chaque recherche
+    """
+    ajouter_dossier_tp1()
+    from calendrier_ics import lire_evenements
+    from index_evenements import CalendrierIndexe
+
+    with tempfile.TemporaryDirectory() as dossier:
+        fichier = os.path.join(dossier, "calendrier.ics")
+        ecrire_lignes(fichier, lignes_ics(nb_lignes))
+        evenements = list(lire_evenements(fichier))
+
+    temps_construction, calendrier = mesurer(CalendrierIndexe, evenements, repetitions=1)
+    print(f"Calendrier : {len(calendrier)} événements, index construit en {temps_construction:.3f} s")
+    # Le calendrier synthétique compte quelques séances par jour : la période est une année universitaire
+    annee = (datetime(2023, 9, 1), datetime(2024, 7, 1))
+    recherches = (
+        ("R1.07, TP, groupe A, 2023-2024",
+         lambda: calendrier.rechercher(*annee, ressource="R1.07", type_seance="TP", groupe="A")),
+        ("salle G_019, 2023-2024", lambda: calendrier.rechercher(*annee, salle="G_019")),
+        ("enseignant, tout le calendrier", lambda: calendrier.rechercher(enseignant=calendrier.valeurs("enseignant")[0])),
+    )
+    for nom, recherche in recherches:
+        temps, resultat = mesurer(recherche, repetitions=repetitions)
+        print(f"- {nom} : {len(resultat)} événements, {temps * 1e3:.3f} ms")
+    temps, resultat = mesurer(recherche_lineaire, evenements, *annee, repetitions=3)
+    print(f"- Parcours linéaire (R1.07, TP, groupe A, 2023-2024) : {len(resultat)} événements, "
+          f"{temps * 1e3:.3f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="Mesures de performance de l'analyse tcpdump")
+    sous_commandes = parser.add_subparsers(dest="mesure", required=True)
+
+    classifieur = sous_commandes.add_parser("classifieur", help="Analyser() d'origine / actuel")
+    classifieur.add_argument("fichier", nargs="?", default=FICHIER_DEFAUT)
+    classifieur.add_argument("-n", "--repetitions", type=int, default=5)
+
+    workers = sous_commandes.add_parser("workers", help="passage à l'échelle du mode --workers")
+    workers.add_argument("fichier", nargs="?", default=FICHIER_DEFAUT)
+    workers.add_argument("--copies", type=int, default=20, help="nombre de copies de la capture (défaut : 20)")
+    workers.add_argument("-n", "--repetitions", type=int, default=3)
+
+    esquisses = sous_commandes.add_parser("esquisses", help="mémoire et précision du mode --approx")
+    esquisses.add_argument("fichier", nargs="?", default=FICHIER_DEFAUT)
+    esquisses.add_argument("--top-k", type=int, default=100)
+
+    vectorise = sous_commandes.add_parser("vectorise", help="Analyser() / version NumPy")
+    vectorise.add_argument("fichier", nargs="?", default=FICHIER_DEFAUT)
+    vectorise.add_argument("-n", "--repetitions", type=int, default=5)
+
+    demarrage = sous_commandes.add_parser("demarrage", help="temps d'import de Traitement_text")
+    demarrage.add_argument("-n", "--repetitions", type=int, default=5)
+
+    generer = sous_commandes.add_parser("generer", help="fichier tcpdump ou ICS synthétique")
+    generer.add_argument("format_donnees", choices=sorted(GENERATEURS))
+    generer.add_argument("lignes", type=int, help="nombre de lignes (approximatif pour ics)")
+    generer.add_argument("fichier")
+    generer.add_argument("--graine", type=int, default=0)
+
+    echelle = sous_commandes.add_parser("echelle", help="passage à l'échelle sur données synthétiques")
+    echelle.add_argument("--tailles", type=int, nargs="+", default=list(TAILLES_ECHELLE), metavar="N",
+                         help="nombres de lignes (défaut : 10000 100000 1000000 ; jusqu'à 100000000)")
+    echelle.add_argument("--sortie", default=FICHIER_ECHELLE, help=f"fichier JSON des mesures "
+                                                                    f"(défaut : {FICHIER_ECHELLE})")
+    echelle.add_argument("--reference", default=None, metavar="JSON",
+                         help="mesures d'une exécution précédente, pour comparer les débits")
+    echelle.add_argument("--dossier", default=None,
+                         help="garder les fichiers générés dans ce dossier et les réutiliser")
+    echelle.add_argument("--graine", type=int, default=0)
+    echelle.add_argument("-n", "--repetitions", type=int, default=1)
+
+    compression = sous_commandes.add_parser("compression", help="analyse de captures compressées")
+    compression.add_argument("fichier", nargs="?", default=None,
+                             help="capture tcpdump (défaut : capture synthétique de --lignes lignes)")
+    compression.add_argument("--lignes", type=int, default=10**6)
+    compression.add_argument("--formats", nargs="+", choices=list(EXTENSIONS), default=list(EXTENSIONS))
+    compression.add_argument("-n", "--repetitions", type=int, default=3)
+
+    pcap = sous_commandes.add_parser("pcap", help="analyse de captures pcap / pcapng / texte")
+    pcap.add_argument("--lignes", type=int, default=10**6, help="lignes de la capture texte synthétique")
+    pcap.add_argument("-n", "--repetitions", type=int, default=3)
+
+    calendrier = sous_commandes.add_parser("calendrier", help="mémoire de la lecture d'un calendrier ICS")
+    calendrier.add_argument("--lignes", type=int, default=2 * 10**6, help="lignes du calendrier synthétique")
+    calendrier.add_argument("-n", "--repetitions", type=int, default=3)
+
+    index = sous_commandes.add_parser("index", help="recherches dans le calendrier indexé")
+    index.add_argument("--lignes", type=int, default=2 * 10**6, help="lignes du calendrier synthétique")
+    index.add_argument("-n", "--repetitions", type=int, default=1000)
+
+    args = parser.parse_args()
+    if args.mesure == "classifieur":
+        bench_classifieur(args.fichier, args.repetitions)
+    elif args.mesure == "workers":
+        bench_workers(args.fichier, args.copies, repetitions=args.repetitions)
+    elif args.mesure == "esquisses":
+        bench_esquisses(args.fichier, args.top_k)
+    elif args.mesure == "vectorise":
+        bench_vectorise(args.fichier, args.repetitions)
+    elif args.mesure == "demarrage":
+        bench_demarrage(args.repetitions)
+    elif args.mesure == "generer":
+        ecrire_lignes(args.fichier, GENERATEURS[args.format_donnees](args.lignes, args.graine))
+    elif args.mesure == "echelle":
+        bench_echelle(args.tailles, args.sortie, args.dossier, args.graine, args.repetitions, args.reference)
+    elif args.mesure == "compression":
+        bench_compression(args.fichier, args.lignes, args.formats, args.repetitions)
+    elif args.mesure == "pcap":
+        bench_pcap(args.lignes, args.repetitions)
+    elif args.mesure == "calendrier":
+        bench_calendrier(args.lignes, args.repetitions)
+    elif args.mesure == "index":
+        bench_index(args.lignes, args.repetitions)
+
+# Point d'entrée du programme
+if __name__ == "__main__":
+    main()
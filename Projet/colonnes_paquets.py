@@ -0,0 +1,304 @@
+# -*- coding: utf-8 -*-
+"""
+Cache binaire des captures déjà analysées, stocké colonne par colonne.
+
+La première analyse d'une capture range chaque champ des paquets dans un tableau
+NumPy (horodatages, identifiants d'hôtes, de ports et de flags, longueurs) et les
+enregistre dans "<capture>.npz". Les analyses suivantes rechargent ces colonnes
+au lieu de relire le texte, et les statistiques d'Analyser() sont recalculées
+par des opérations vectorisées.
+
+Le cache est lié à la taille, à la date de modification et au hachage blake2b de
+la capture : si la taille change, il est reconstruit ; si seule la date change
+(copie, "touch"), le hachage est recalculé pour décider.
+"""
+
+import hashlib
+import os
+from itertools import chain, islice
+from operator import itemgetter
+
+import numpy as np
+
+from lecteur_pcap import lire_capture
+from parseur_tcpdump import Paquet
+from symboles import TableSymboles
+
+# Incrémenté à chaque changement du contenu du cache
+VERSION_CACHE = 1
+
+SECONDES_PAR_JOUR = 86400
+
+PROTOCOLES = ("TCP", "UDP", "ICMP", "IP")
+
+# Champs de Paquet gardés dans le cache (seq, ack et win ne servent pas aux statistiques)
+CHAMPS_CONSERVES = ("horodatage", "source", "port_source", "destination", "port_destination", "protocole", "flags",
+                    "longueur")
+
+# Nombre de paquets lus à la fois lors de la mise en colonnes
+TAILLE_BLOC = 65536
+
+class ColonnesPaquets:
+    """
+    Paquets d'une capture rangés en colonnes. Les chaînes (hôtes, ports, flags)
+    sont remplacées par leur identifiant dans une TableSymboles.
+    """
+    __slots__ = ("horodatage", "source", "destination", "port_source", "port_destination", "protocole",
+                 "flags", "longueur", "hotes", "ports", "libelles_flags")
+
+    COLONNES = ("horodatage", "source", "destination", "port_source", "port_destination", "protocole",
+                "flags", "longueur")
+    TABLES = ("hotes", "ports", "libelles_flags")
+
+    @classmethod
+    def depuis_paquets(cls, paquets):
+        """
+        :param paquets: Itérable de Paquet
+        :return: ColonnesPaquets
+        """
+        # Une colonne (liste) par champ, remplie par map() bloc par bloc puis convertie
+        # d'un coup : aucune boucle Python par paquet, et seul un bloc de Paquet reste
+        # en mémoire (une longue liste de tuples ralentirait le ramasse-miettes)
+        extracteurs = {nom: itemgetter(Paquet._fields.index(nom)) for nom in CHAMPS_CONSERVES}
+        champs = {nom: [] for nom in CHAMPS_CONSERVES}
+        paquets = iter(paquets)
+        while True:
+            bloc = list(islice(paquets, TAILLE_BLOC))
+            if not bloc:
+                break
+            for nom, extraire in extracteurs.items():
+                champs[nom].extend(map(extraire, bloc))
+
+        colonnes = cls()
+        colonnes.hotes, (colonnes.source, colonnes.destination) = interner(champs["source"], champs["destination"])
+        colonnes.ports, (colonnes.port_source, colonnes.port_destination) = interner(champs["port_source"],
+                                                                                    champs["port_destination"])
+        colonnes.libelles_flags, (colonnes.flags,) = interner(champs["flags"])
+        protocoles = {nom: indice for indice, nom in enumerate(PROTOCOLES)}
+        colonnes.protocole = np.fromiter(map(protocoles.__getitem__, champs["protocole"]), dtype="i1",
+                                         count=len(champs["protocole"]))
+        colonnes.horodatage = np.array(champs["horodatage"], dtype="f8")
+        colonnes.longueur = np.array(champs["longueur"], dtype="i4")
+        return colonnes
+
+    def __len__(self):
+        return len(self.horodatage)
+
+    def indice(self, table, valeur):
+        """
+        :param table: Nom de la table de symboles ("hotes", "ports", "libelles_flags")
+        :param valeur: Chaîne recherchée
+        :return: Identifiant de la chaîne, ou -1 si elle n'apparaît pas dans la capture
+        """
+        return getattr(self, table).chercher(valeur)
+
+    def selection(self, masque):
+        """
+        :param masque: Tableau de booléens (un par paquet)
+        :return: ColonnesPaquets réduites aux paquets retenus (tables partagées)
+        """
+        colonnes = ColonnesPaquets()
+        for nom in self.COLONNES:
+            setattr(colonnes, nom, getattr(self, nom)[masque])
+        for nom in self.TABLES:
+            setattr(colonnes, nom, getattr(self, nom))
+        return colonnes
+
+    def paquets(self):
+        """
+        Reconstruit les paquets (seq, ack et win ne sont pas conservés par le cache).
+
+        :return: Générateur de Paquet
+        """
+        hotes, ports, libelles_flags = self.hotes.noms, self.ports.noms, self.libelles_flags.noms
+        for horodatage, source, destination, port_source, port_destination, protocole, flags, longueur in zip(
+                self.horodatage.tolist(), self.source.tolist(), self.destination.tolist(),
+                self.port_source.tolist(), self.port_destination.tolist(), self.protocole.tolist(),
+                self.flags.tolist(), self.longueur.tolist()):
+            yield Paquet(horodatage, hotes[source], ports[port_source], hotes[destination], ports[port_destination],
+                         PROTOCOLES[protocole], libelles_flags[flags], None, None, None, longueur)
+
+def interner(*colonnes_texte):
+    """
+    Table de symboles commune à plusieurs colonnes de chaînes : chaque chaîne reçoit
+    un indice, dans l'ordre de première apparition.
+
+    :param colonnes_texte: Séquences de chaînes
+    :return: Couple (TableSymboles, liste des colonnes d'identifiants en tableaux NumPy)
+    """
+    table = TableSymboles(dict.fromkeys(chain.from_iterable(colonnes_texte)))
+    return table, [np.fromiter(map(table.indices.__getitem__, colonne), dtype="i4", count=len(colonne))
+                   for colonne in colonnes_texte]
+
+def hacher_fichier(fichier):
+    """
+    :param fichier: Chemin du fichier
+    :return: Hachage blake2b du contenu, en hexadécimal
+    """
+    empreinte = hashlib.blake2b()
+    with open(fichier, "rb") as f:
+        for bloc in iter(lambda: f.read(1 << 20), b""):
+            empreinte.update(bloc)
+    return empreinte.hexdigest()
+
+def chemin_cache(fichier):
+    """
+    :param fichier: Chemin de la capture
+    :return: Chemin du cache associé
+    """
+    return fichier + ".npz"
+
+def ecrire_cache(chemin, colonnes, taille, mtime, hachage):
+    """
+    Enregistre les colonnes de façon atomique (fichier temporaire puis renommage).
+
+    :param chemin: Chemin du cache
+    :param colonnes: ColonnesPaquets
+    :param taille: Taille de la capture en octets
+    :param mtime: Date de modification de la capture (st_mtime_ns)
+    :param hachage: Hachage de la capture (hacher_fichier())
+    """
+    tableaux = {nom: getattr(colonnes, nom) for nom in ColonnesPaquets.COLONNES}
+    for nom in ColonnesPaquets.TABLES:
+        tableaux[nom] = np.array(getattr(colonnes, nom).noms, dtype=str)
+    temporaire = chemin + ".tmp"
+    with open(temporaire, "wb") as f:
+        np.savez(f, version=VERSION_CACHE, taille=taille, mtime=mtime, hachage=hachage, **tableaux)
+    os.replace(temporaire, chemin)
+
+def lire_cache(chemin, taille, mtime, fichier):
+    """
+    Relit un cache s'il correspond toujours à la capture.
+
+    :param chemin: Chemin du cache
+    :param taille: Taille actuelle de la capture
+    :param mtime: Date de modification actuelle de la capture
+    :param fichier: Chemin de la capture (hachée seulement si la date a changé)
+    :return: Couple (ColonnesPaquets ou None, hachage calculé ou None)
+    """
+    try:
+        contenu = np.load(chemin)
+    except (FileNotFoundError, ValueError, OSError):
+        return None, None
+
+    with contenu:
+        if int(contenu["version"]) != VERSION_CACHE or int(contenu["taille"]) != taille:
+            return None, None
+        hachage = None
+        if int(contenu["mtime"]) != mtime:
+            hachage = hacher_fichier(fichier)
+            if hachage != str(contenu["hachage"]):
+                return None, hachage
+
+        colonnes = ColonnesPaquets()
+        for nom in ColonnesPaquets.COLONNES:
+            setattr(colonnes, nom, contenu[nom])
+        for nom in ColonnesPaquets.TABLES:
+            setattr(colonnes, nom, TableSymboles(contenu[nom].tolist()))
+
+    if hachage is not None:
+        # Contenu identique, date différente : le cache est gardé avec la nouvelle date
+        ecrire_cache(chemin, colonnes, taille, mtime, hachage)
+    return colonnes, hachage
+
+def charger_colonnes(fichier):
+    """
+    Colonnes d'une capture : relues depuis le cache si possible, sinon analysées puis
+    mises en cache.
+
+    :param fichier: Chemin de la capture
+    :return: ColonnesPaquets de tous les paquets de la capture
+    """
+    infos = os.stat(fichier)
+    chemin = chemin_cache(fichier)
+    colonnes, hachage = lire_cache(chemin, infos.st_size, infos.st_mtime_ns, fichier)
+    if colonnes is None:
+        colonnes = ColonnesPaquets.depuis_paquets(lire_capture(fichier))
+        ecrire_cache(chemin, colonnes, infos.st_size, infos.st_mtime_ns, hachage or hacher_fichier(fichier))
+    return colonnes
+
+def masque_interessants(colonnes, ports_interessants):
+    """
+    Version vectorisée d'est_interessant().
+
+    :param colonnes: ColonnesPaquets
+    :param ports_interessants: Ensemble des ports retenus en plus de TCP et ICMP
+    :return: Tableau de booléens
+    """
+    indices_ports = [colonnes.indice("ports", port) for port in ports_interessants]
+    return (np.isin(colonnes.protocole, (PROTOCOLES.index("TCP"), PROTOCOLES.index("ICMP")))
+            | np.isin(colonnes.port_source, indices_ports)
+            | np.isin(colonnes.port_destination, indices_ports))
+
+def compter_adresses(identifiants):
+    """
+    Compte les occurrences de chaque identifiant, dans l'ordre de première apparition
+    (le même que celui des dictionnaires remplis paquet par paquet).
+
+    :param identifiants: Tableau d'identifiants d'hôtes
+    :return: Couple de tableaux (identifiants présents, nombre d'occurrences de chacun)
+    """
+    if not len(identifiants):
+        return identifiants, identifiants
+    presents, premieres, comptes = np.unique(identifiants, return_index=True, return_counts=True)
+    ordre = np.argsort(premieres)
+    return presents[ordre], comptes[ordre]
+
+def statistiques_colonnes(colonnes):
+    """
+    Version vectorisée de StatistiquesTrafic : mêmes compteurs, calculés par masques
+    booléens et np.unique sur les colonnes (déjà filtrées par masque_interessants()
+    pour reproduire analyser_capture(), telles quelles pour reproduire Analyser()).
+
+    :param colonnes: ColonnesPaquets
+    :return: Même tuple que Analyser()
+    """
+    def sur_un_port(port):
+        indice = colonnes.indice("ports", port)
+        return (colonnes.port_source == indice) | (colonnes.port_destination == indice)
+
+    def avec_flags(protocole, flags):
+        return int(np.count_nonzero((colonnes.protocole == PROTOCOLES.index(protocole))
+                                    & (colonnes.flags == colonnes.indice("libelles_flags", flags))))
+
+    https_masque = sur_un_port("https")
+    https = int(np.count_nonzero(https_masque))
+    http = https + int(np.count_nonzero(sur_un_port("http") & ~https_masque))
+    domaine = int(np.count_nonzero(sur_un_port("domain")))
+    ssh = int(np.count_nonzero(sur_un_port("ssh")))
+    icmp_req = avec_flags("ICMP", "echo request")
+    icmp_rep = avec_flags("ICMP", "echo reply")
+    compteur = len(colonnes)
+
+    # Source puis destination de chaque paquet, comme dans StatistiquesTrafic.ajouter_paquets()
+    adresses, comptes_adresses = compter_adresses(np.column_stack((colonnes.source, colonnes.destination)).ravel())
+    sources, comptes_sources = compter_adresses(colonnes.source[colonnes.port_source
+                                                                != colonnes.indice("ports", "https")])
+
+    moyenne = comptes_sources.mean() if len(comptes_sources) else 0
+    au_dessus = comptes_sources > moyenne
+    # Retour aux noms seulement pour le résultat
+    suspect = colonnes.hotes.traduire(sources[au_dessus].tolist(), comptes_sources[au_dessus].tolist())
+    allip = colonnes.hotes.traduire(adresses.tolist(), comptes_adresses.tolist())
+
+    return (http, https, http - https, domaine, ssh, icmp_req + icmp_rep, icmp_req, icmp_rep, compteur, suspect,
+            allip, avec_flags("TCP", "S"), avec_flags("TCP", "S."), avec_flags("TCP", "F."), avec_flags("TCP", "P."),
+            avec_flags("TCP", "."))
+
+def histogramme_par_seconde(colonnes):
+    """
+    Nombre de paquets par seconde de capture (les horodatages qui repartent de zéro
+    après minuit sont décalés d'un jour).
+
+    :param colonnes: ColonnesPaquets
+    :return: Couple de tableaux (début de chaque seconde depuis minuit, nombre de paquets)
+    """
+    if not len(colonnes):
+        return np.zeros(0), np.zeros(0, dtype=np.int64)
+    horodatages = colonnes.horodatage
+    passages = np.cumsum(np.diff(horodatages, prepend=horodatages[0]) < -SECONDES_PAR_JOUR / 2)
+    horodatages = horodatages + passages * SECONDES_PAR_JOUR
+    debut = np.floor(horodatages.min())
+    fin = np.floor(horodatages.max()) + 1
+    comptes, bornes = np.histogram(horodatages, bins=int(fin - debut), range=(debut, fin))
+    return bornes[:-1], comptes
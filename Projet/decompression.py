@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+"""
+Lecture des captures compressées (.gz, .bz2, .xz, .zst) sans fichier intermédiaire.
+
+Le format est reconnu à ses premiers octets (pas à l'extension). La décompression
+se fait dans un thread qui prépare les blocs suivants pendant que le thread
+principal analyse le bloc courant : zlib, bz2, lzma et zstd relâchent le GIL
+pendant la décompression, les deux travaux se recouvrent donc réellement.
+
+Le module zstd est facultatif : compression.zstd (Python 3.14) ou, à défaut, le
+paquet zstandard. Les autres formats n'utilisent que la bibliothèque standard.
+"""
+
+import os
+import queue
+import re
+import threading
+
+# Premiers octets de chaque format
+MAGIQUES = (
+    (b"\x1f\x8b", "gz"),
+    (b"BZh", "bz2"),
+    (b"\xfd7zXZ\x00", "xz"),
+    (b"\x28\xb5\x2f\xfd", "zst"),
+)
+EXTENSIONS = {"gz": ".gz", "bz2": ".bz2", "xz": ".xz", "zst": ".zst"}
+
+# Taille des lectures du fichier compressé ; chacune donne un bloc décompressé de
+# quelques Mo, obtenu en un seul appel qui relâche le GIL (les lectures par 8 Ko des
+# objets gzip/bz2/lzma.open le reprendraient des centaines de fois par Mo)
+TAILLE_BLOC = 1 << 18
+# Nombre de blocs décompressés d'avance par le thread
+PROFONDEUR = 8
+
+def profondeur_par_defaut():
+    """
+    :return: PROFONDEUR si plusieurs CPU sont disponibles, sinon 0 : sur un seul CPU le
+             thread ne recouvre rien et ne fait qu'ajouter des changements de contexte
+    """
+    disponibles = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count()
+    return PROFONDEUR if (disponibles or 1) > 1 else 0
+
+# Ligne d'en-tête : commence par un chiffre (horodatage) ; les lignes de dump
+# hexadécimal (tabulation) et les autres sont ignorées, comme dans lire_entetes().
+# L'expression part du retour à la ligne qui précède (recherche d'un caractère fixe,
+# bien plus rapide que "^" en mode MULTILINE) et s'arrête avant celui qui suit.
+LIGNE_ENTETE = re.compile(rb'\n([0-9][^\n]*)(?=\n)')
+
+def compression_fichier(fichier):
+    """
+    :param fichier: Chemin du fichier
+    :return: "gz", "bz2", "xz", "zst", ou None pour un fichier non compressé
+    """
+    with open(fichier, "rb") as f:
+        debut = f.read(6)
+    for magique, compression in MAGIQUES:
+        if debut.startswith(magique):
+            return compression
+    return None
+
+def module_zstd():
+    """
+    :return: Module zstd disponible (compression.zstd ou zstandard)
+    :raises ImportError: Si aucun des deux n'est installé
+    """
+    try:
+        from compression import zstd
+        return zstd
+    except ImportError:
+        pass
+    try:
+        import zstandard
+        return zstandard
+    except ImportError:
+        raise ImportError("les captures .zst demandent Python 3.14 ou le paquet zstandard "
+                          "(pip install zstandard)") from None
+
+def ouvrir_flux(fichier, compression, mode="rb"):
+    """
+    :param fichier: Chemin du fichier
+    :param compression: "gz", "bz2", "xz" ou "zst"
+    :param mode: "rb" pour décompresser, "wb" pour compresser
+    :return: Fichier binaire (décompressé à la lecture, compressé à l'écriture)
+    """
+    if compression == "gz":
+        import gzip
+        return gzip.open(fichier, mode)
+    if compression == "bz2":
+        import bz2
+        return bz2.open(fichier, mode)
+    if compression == "xz":
+        import lzma
+        return lzma.open(fichier, mode)
+    if compression == "zst":
+        zstd = module_zstd()
+        if hasattr(zstd, "open"):
+            return zstd.open(fichier, mode)
+        brut = open(fichier, mode)
+        if mode == "rb":
+            return zstd.ZstdDecompressor().stream_reader(brut, closefd=True)
+        return zstd.ZstdCompressor().stream_writer(brut, closefd=True)
+    raise ValueError(f"Compression inconnue : {compression}")
+
+def ouvrir_capture(fichier):
+    """
+    :param fichier: Chemin d'une capture, compressée ou non
+    :return: Fichier binaire du contenu décompressé
+    """
+    compression = compression_fichier(fichier)
+    return open(fichier, "rb") if compression is None else ouvrir_flux(fichier, compression)
+
+def decompresseur(compression):
+    """
+    :param compression: "gz", "bz2", "xz" ou "zst"
+    :return: Objet de décompression incrémentale (méthode decompress(), attributs eof et unused_data)
+    """
+    if compression == "gz":
+        import zlib
+        return zlib.decompressobj(zlib.MAX_WBITS | 16)
+    if compression == "bz2":
+        import bz2
+        return bz2.BZ2Decompressor()
+    if compression == "xz":
+        import lzma
+        return lzma.LZMADecompressor()
+    if compression == "zst":
+        zstd = module_zstd()
+        if hasattr(zstd, "open"):
+            return zstd.ZstdDecompressor()
+        return zstd.ZstdDecompressor().decompressobj()
+    raise ValueError(f"Compression inconnue : {compression}")
+
+def decompresser_fichier(fichier, compression, taille_bloc=TAILLE_BLOC):
+    """
+    :param fichier: Chemin du fichier compressé
+    :param compression: "gz", "bz2", "xz" ou "zst"
+    :param taille_bloc: Taille des lectures du fichier compressé, en octets
+    :return: Générateur de blocs d'octets décompressés
+    :raises EOFError: Si le fichier s'arrête au milieu d'un membre compressé
+    """
+    with open(fichier, "rb") as f:
+        objet = decompresseur(compression)
+        entame = False
+        for brut in iter(lambda: f.read(taille_bloc), b""):
+            while brut:
+                entame = True
+                bloc = objet.decompress(brut)
+                if bloc:
+                    yield bloc
+                if not objet.eof:
+                    break
+                # Fin d'un membre (fichiers concaténés, "cat a.gz b.gz") : le suivant
+                # repart avec un nouvel objet
+                brut = objet.unused_data
+                objet = decompresseur(compression)
+                entame = False
+        if entame:
+            raise EOFError(f"{fichier} : capture compressée tronquée")
+
+def blocs_decompresses(fichier, compression, taille_bloc=TAILLE_BLOC, profondeur=None):
+    """
+    :param fichier: Chemin du fichier compressé
+    :param compression: "gz", "bz2", "xz" ou "zst"
+    :param taille_bloc: Taille des lectures du fichier compressé, en octets
+    :param profondeur: Nombre de blocs préparés d'avance par le thread de décompression,
+                       0 pour décompresser dans le thread appelant, None pour profondeur_par_defaut()
+    :return: Générateur de blocs d'octets décompressés
+    """
+    if profondeur is None:
+        profondeur = profondeur_par_defaut()
+    if profondeur == 0:
+        yield from decompresser_fichier(fichier, compression, taille_bloc)
+        return
+
+    file_blocs = queue.Queue(profondeur)
+    arret = threading.Event()
+
+    def deposer(element):
+        # Attente interrompue si le consommateur abandonne la lecture
+        while not arret.is_set():
+            try:
+                file_blocs.put(element, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def decompresser():
+        try:
+            for bloc in decompresser_fichier(fichier, compression, taille_bloc):
+                if not deposer(bloc):
+                    return
+        except Exception as erreur:
+            deposer(erreur)
+        else:
+            deposer(None)
+
+    thread = threading.Thread(target=decompresser, name="decompression", daemon=True)
+    thread.start()
+    try:
+        while True:
+            element = file_blocs.get()
+            if element is None:
+                return
+            if isinstance(element, Exception):
+                raise element
+            yield element
+    finally:
+        arret.set()
+        thread.join()
+
+def lire_entetes_compresses(fichier, compression, profondeur=None):
+    """
+    Équivalent de lire_entetes() pour une capture compressée : mêmes lignes, lues au
+    fil de la décompression.
+
+    :param fichier: Chemin du fichier compressé
+    :param compression: "gz", "bz2", "xz" ou "zst"
+    :param profondeur: Voir blocs_decompresses()
+    :return: Générateur de lignes d'en-tête, retour à la ligne compris
+    """
+    # Le texte examiné commence toujours par le retour à la ligne qui précède sa
+    # première ligne : "\n" au début du fichier, puis le dernier du bloc précédent
+    reste = b"\n"
+    for bloc in blocs_decompresses(fichier, compression, profondeur=profondeur):
+        # Seules les lignes complètes sont traitées ; la dernière attend le bloc suivant
+        coupure = bloc.rfind(b"\n")
+        if coupure < 0:
+            reste += bloc
+            continue
+        texte = reste + bloc[:coupure + 1]
+        reste = bloc[coupure:]
+        for ligne in LIGNE_ENTETE.findall(texte):
+            if ligne.endswith(b'\r'):
+                ligne = ligne[:-1]
+            yield ligne.decode("utf-8", errors="replace") + "\n"
+    # Dernière ligne sans retour à la ligne final
+    if reste[1:2].isdigit():
+        yield reste[1:].decode("utf-8", errors="replace")
@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""
+Détection des rafales par fenêtres glissantes sur les horodatages tcpdump.
+
+Pour chaque source, des tampons circulaires de `fenetre` cases (une par seconde)
+comptent les paquets, les SYN et les destinations distinctes. Une source est
+signalée dès qu'un de ces débits dépasse son seuil dans la fenêtre. La mémoire
+est bornée : taille fixe par hôte, et les hôtes inactifs les plus anciens sont
+évincés au-delà de `max_hotes`.
+"""
+
+from collections import OrderedDict
+
+SECONDES_PAR_JOUR = 86400
+
+class EtatHote:
+    """
+    Fenêtre glissante d'une source : une case par seconde, réutilisée en anneau.
+    """
+    __slots__ = ("seconde", "paquets", "syn", "destinations", "presence", "total_paquets", "total_syn")
+
+    def __init__(self, fenetre, seconde):
+        self.seconde = seconde               # dernière seconde vue pour cet hôte
+        self.paquets = [0] * fenetre
+        self.syn = [0] * fenetre
+        self.destinations = [set() for _ in range(fenetre)]
+        self.presence = {}                   # destination -> nombre de cases où elle figure
+        self.total_paquets = 0               # sommes courantes sur la fenêtre
+        self.total_syn = 0
+
+    def ajouter_destination(self, case, destination, maximum):
+        """
+        Note une destination dans une case de la fenêtre.
+
+        :param case: Indice de la case (seconde modulo la fenêtre)
+        :param destination: Hôte destination du paquet
+        :param maximum: Taille maximale d'une case
+        """
+        ensemble = self.destinations[case]
+        if destination not in ensemble and len(ensemble) < maximum:
+            ensemble.add(destination)
+            self.presence[destination] = self.presence.get(destination, 0) + 1
+
+    def avancer(self, seconde):
+        """
+        Vide les cases sorties de la fenêtre en avançant jusqu'à `seconde`.
+
+        :param seconde: Nouvelle seconde courante (entière)
+        """
+        fenetre = len(self.paquets)
+        ecart = seconde - self.seconde
+        if ecart <= 0:
+            return
+        if ecart >= fenetre:
+            self.paquets = [0] * fenetre
+            self.syn = [0] * fenetre
+            for ensemble in self.destinations:
+                ensemble.clear()
+            self.presence.clear()
+            self.total_paquets = self.total_syn = 0
+        else:
+            for s in range(self.seconde + 1, seconde + 1):
+                case = s % fenetre
+                self.total_paquets -= self.paquets[case]
+                self.total_syn -= self.syn[case]
+                self.paquets[case] = self.syn[case] = 0
+                ensemble = self.destinations[case]
+                for destination in ensemble:
+                    if self.presence[destination] == 1:
+                        del self.presence[destination]
+                    else:
+                        self.presence[destination] -= 1
+                ensemble.clear()
+        self.seconde = seconde
+
+class MoteurDebit:
+    """
+    Moteur de détection des rafales (paquets/s, SYN/s, destinations distinctes).
+    """
+
+    def __init__(self, fenetre=10, seuil_paquets=100.0, seuil_syn=20.0, seuil_destinations=50, max_hotes=10000):
+        """
+        :param fenetre: Largeur de la fenêtre glissante, en secondes
+        :param seuil_paquets: Débit moyen (paquets/s sur la fenêtre) au-delà duquel une source est signalée
+        :param seuil_syn: Débit moyen de SYN ("Flags [S]") par seconde au-delà duquel une source est signalée
+        :param seuil_destinations: Nombre de destinations distinctes dans la fenêtre au-delà duquel une source est signalée
+        :param max_hotes: Nombre maximal de sources suivies simultanément (éviction LRU)
+        """
+        self.fenetre = fenetre
+        self.seuil_paquets = seuil_paquets
+        self.seuil_syn = seuil_syn
+        self.seuil_destinations = seuil_destinations
+        self.max_hotes = max_hotes
+        self.hotes = OrderedDict()   # source -> EtatHote, du moins au plus récemment actif
+        self.alertes = {}            # source -> valeurs maximales observées au-dessus des seuils
+        self.decalage = 0            # jours ajoutés quand la capture passe minuit
+        self.derniere_seconde = None
+
+    def ajouter(self, paquet):
+        """
+        Met à jour la fenêtre de la source du paquet et enregistre une alerte si besoin.
+
+        :param paquet: Paquet issu de parse_tcpdump_line()
+        """
+        seconde = int(paquet.horodatage) + self.decalage
+        if self.derniere_seconde is not None and seconde < self.derniere_seconde - SECONDES_PAR_JOUR // 2:
+            # Passage de minuit : les horodatages tcpdump repartent de zéro
+            self.decalage += SECONDES_PAR_JOUR
+            seconde += SECONDES_PAR_JOUR
+        if self.derniere_seconde is None or seconde > self.derniere_seconde:
+            self.derniere_seconde = seconde
+
+        source = paquet.source
+        etat = self.hotes.get(source)
+        if etat is None:
+            etat = self.hotes[source] = EtatHote(self.fenetre, seconde)
+            if len(self.hotes) > self.max_hotes:
+                self.hotes.popitem(last=False)
+        else:
+            self.hotes.move_to_end(source)
+            if seconde <= etat.seconde - self.fenetre:
+                return  # paquet trop ancien pour la fenêtre (capture désordonnée)
+            etat.avancer(seconde)
+
+        case = seconde % self.fenetre
+        etat.paquets[case] += 1
+        etat.total_paquets += 1
+        if paquet.protocole == "TCP" and paquet.flags == "S":
+            etat.syn[case] += 1
+            etat.total_syn += 1
+        # Chaque case garde au plus seuil_destinations + 1 destinations : assez pour
+        # savoir que le seuil est dépassé, sans laisser un balayage remplir la mémoire
+        etat.ajouter_destination(case, paquet.destination, self.seuil_destinations + 1)
+
+        self._verifier(source, etat, paquet.horodatage)
+
+    def _verifier(self, source, etat, horodatage):
+        """
+        Compare les débits de la fenêtre d'une source aux seuils.
+
+        :param source: Source concernée
+        :param etat: EtatHote de la source
+        :param horodatage: Horodatage du paquet courant (pour dater l'alerte)
+        """
+        paquets_par_seconde = etat.total_paquets / self.fenetre
+        syn_par_seconde = etat.total_syn / self.fenetre
+        nb_destinations = len(etat.presence)
+        if (paquets_par_seconde <= self.seuil_paquets and syn_par_seconde <= self.seuil_syn
+                and nb_destinations <= self.seuil_destinations):
+            return
+
+        alerte = self.alertes.get(source)
+        if alerte is None:
+            alerte = self.alertes[source] = {"debut": horodatage, "paquets_par_seconde": 0.0,
+                                             "syn_par_seconde": 0.0, "destinations": 0}
+        alerte["paquets_par_seconde"] = max(alerte["paquets_par_seconde"], paquets_par_seconde)
+        alerte["syn_par_seconde"] = max(alerte["syn_par_seconde"], syn_par_seconde)
+        alerte["destinations"] = max(alerte["destinations"], nb_destinations)
+
+    def observer(self, paquets):
+        """
+        Étage de pipeline : met à jour le moteur au passage et retransmet les paquets.
+
+        :param paquets: Itérable de Paquet
+        :return: Générateur des mêmes paquets
+        """
+        for paquet in paquets:
+            self.ajouter(paquet)
+            yield paquet
+
+def formater_horodatage(horodatage):
+    """
+    Convertit des secondes depuis minuit en "HH:MM:SS".
+
+    :param horodatage: Secondes depuis minuit
+    :return: Chaîne "HH:MM:SS"
+    """
+    secondes = int(horodatage) % SECONDES_PAR_JOUR
+    return f"{secondes // 3600:02}:{secondes // 60 % 60:02}:{secondes % 60:02}"
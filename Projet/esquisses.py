@@ -0,0 +1,275 @@
+# -*- coding: utf-8 -*-
+"""
+Esquisses ("sketches") à mémoire fixe pour compter les adresses d'une capture
+sans dictionnaire qui grossit avec le nombre d'adresses distinctes.
+
+- CountMinSketch : estimation du nombre d'occurrences d'une clé. Avec une largeur
+  w et une profondeur d, l'estimation n'est jamais inférieure à la vraie valeur et
+  la dépasse d'au plus (e / w) * N avec une probabilité d'au moins 1 - exp(-d),
+  N étant le nombre total d'ajouts. Mémoire : w * d * 8 octets.
+- PlusFrequents : les k clés les plus fréquentes, avec l'estimation Count-Min de
+  leur compte (même borne d'erreur). Mémoire : celle du Count-Min + k clés.
+- HyperLogLog : nombre de clés distinctes avec m = 2**p registres, erreur
+  relative type 1.04 / sqrt(m) (1,6 % pour p = 12). Mémoire : m octets.
+
+Les trois structures se fusionnent : deux esquisses calculées sur deux morceaux
+d'une capture donnent la même garantie que si tout avait été vu par une seule.
+Le hachage (blake2b) est stable d'un processus à l'autre, contrairement à hash().
+"""
+
+import hashlib
+import heapq
+import math
+from array import array
+from functools import lru_cache
+
+@lru_cache(maxsize=4096)
+def hacher(cle):
+    """
+    Hachage stable sur 64 bits d'une clé.
+
+    :param cle: Chaîne à hacher
+    :return: Entier de 64 bits
+    """
+    return int.from_bytes(hashlib.blake2b(cle.encode("utf-8"), digest_size=8).digest(), "little")
+
+@lru_cache(maxsize=4096)
+def cases(cle, largeur, profondeur):
+    """
+    Cases d'une clé dans chaque ligne d'un Count-Min Sketch, par double hachage :
+    la ligne i utilise h1 + i * h2 (Kirsch et Mitzenmacher).
+
+    :param cle: Clé à placer
+    :param largeur: Nombre de cases par ligne
+    :param profondeur: Nombre de lignes
+    :return: Tuple d'indices, un par ligne
+    """
+    h = hacher(cle)
+    h1 = h & 0xFFFFFFFF
+    h2 = (h >> 32) | 1
+    return tuple((h1 + i * h2) % largeur for i in range(profondeur))
+
+class CountMinSketch:
+    """
+    Tableau de d lignes de w compteurs ; chaque clé incrémente une case par ligne et
+    l'estimation est le minimum de ses d cases.
+    """
+    __slots__ = ("largeur", "profondeur", "lignes", "total")
+
+    def __init__(self, largeur=2048, profondeur=4):
+        self.largeur = largeur
+        self.profondeur = profondeur
+        self.lignes = [array("q", bytes(8 * largeur)) for _ in range(profondeur)]
+        self.total = 0
+
+    def ajouter(self, cle, nombre=1):
+        """
+        :param cle: Clé à compter
+        :param nombre: Nombre d'occurrences à ajouter
+        :return: Nouvelle estimation de la clé
+        """
+        estimation = None
+        for ligne, case in zip(self.lignes, cases(cle, self.largeur, self.profondeur)):
+            valeur = ligne[case] + nombre
+            ligne[case] = valeur
+            if estimation is None or valeur < estimation:
+                estimation = valeur
+        self.total += nombre
+        return estimation
+
+    def estimer(self, cle):
+        """
+        :param cle: Clé recherchée
+        :return: Estimation (par excès) du nombre d'occurrences
+        """
+        return min(ligne[case] for ligne, case in zip(self.lignes, cases(cle, self.largeur, self.profondeur)))
+
+    def fusionner(self, autre):
+        """
+        :param autre: CountMinSketch de mêmes dimensions
+        :return: self
+        """
+        if (self.largeur, self.profondeur) != (autre.largeur, autre.profondeur):
+            raise ValueError("Impossible de fusionner des Count-Min Sketch de dimensions différentes.")
+        for ligne, ligne_autre in zip(self.lignes, autre.lignes):
+            for i, valeur in enumerate(ligne_autre):
+                if valeur:
+                    ligne[i] += valeur
+        self.total += autre.total
+        return self
+
+    def memoire(self):
+        """
+        :return: Taille des compteurs en octets
+        """
+        return sum(ligne.itemsize * len(ligne) for ligne in self.lignes)
+
+    def etat(self):
+        """
+        :return: Dictionnaire sérialisable en JSON
+        """
+        return {"largeur": self.largeur, "profondeur": self.profondeur, "total": self.total,
+                "lignes": [ligne.tolist() for ligne in self.lignes]}
+
+    @classmethod
+    def depuis_etat(cls, etat):
+        """
+        :param etat: Dictionnaire issu de etat()
+        :return: CountMinSketch
+        """
+        esquisse = cls(etat["largeur"], etat["profondeur"])
+        esquisse.lignes = [array("q", ligne) for ligne in etat["lignes"]]
+        esquisse.total = etat["total"]
+        return esquisse
+
+class PlusFrequents:
+    """
+    Les k clés les plus fréquentes : un Count-Min Sketch compte toutes les clés et
+    seules les k meilleures estimations sont gardées comme candidates. Une clé
+    n'entre dans les candidates que si son estimation dépasse la plus faible
+    d'entre elles, ce qui n'arrive presque plus une fois le flux installé.
+
+    La plus faible est tirée d'un tas mis à jour paresseusement : une estimation
+    Count-Min ne fait que croître, l'entrée d'une candidate dans le tas peut donc
+    être en retard sur comptes mais jamais en avance. Mettre à jour une candidate
+    ne touche pas au tas ; seules les entrées en retard arrivées en tête sont
+    corrigées, en O(log k), quand la plus faible est demandée.
+    """
+    __slots__ = ("k", "cms", "comptes", "tas")
+
+    def __init__(self, k=100, largeur=2048, profondeur=4):
+        self.k = k
+        self.cms = CountMinSketch(largeur, profondeur)
+        self.comptes = {}      # clé candidate -> estimation Count-Min
+        self.tas = []          # (estimation notée, clé) de chaque candidate, plus faible en tête
+
+    def ajouter(self, cle, nombre=1):
+        """
+        :param cle: Clé à compter
+        :param nombre: Nombre d'occurrences à ajouter
+        """
+        estimation = self.cms.ajouter(cle, nombre)
+        comptes = self.comptes
+        if cle in comptes:
+            # Son entrée du tas sera corrigée si elle arrive en tête (voir plus_faible())
+            comptes[cle] = estimation
+        elif len(comptes) < self.k:
+            comptes[cle] = estimation
+            heapq.heappush(self.tas, (estimation, cle))
+        elif estimation > self.plus_faible():
+            _, evincee = heapq.heapreplace(self.tas, (estimation, cle))
+            del comptes[evincee]
+            comptes[cle] = estimation
+
+    def plus_faible(self):
+        """
+        :return: Plus faible estimation des candidates (résumé non vide)
+        """
+        tas, comptes = self.tas, self.comptes
+        # Une entrée à jour en tête est la plus faible : les autres ne sont pas en avance
+        while tas[0][0] != comptes[tas[0][1]]:
+            cle = tas[0][1]
+            heapq.heapreplace(tas, (comptes[cle], cle))
+        return tas[0][0]
+
+    def reconstruire_tas(self):
+        """
+        Recrée le tas à partir de comptes (après une fusion ou une relecture).
+        """
+        self.tas = [(estimation, cle) for cle, estimation in self.comptes.items()]
+        heapq.heapify(self.tas)
+
+    def resultats(self):
+        """
+        :return: Dictionnaire clé -> estimation, par estimation décroissante
+        """
+        return dict(sorted(self.comptes.items(), key=lambda item: item[1], reverse=True))
+
+    def fusionner(self, autre):
+        """
+        :param autre: PlusFrequents de mêmes dimensions
+        :return: self
+        """
+        self.cms.fusionner(autre.cms)
+        candidates = {cle: self.cms.estimer(cle) for cle in self.comptes.keys() | autre.comptes.keys()}
+        self.comptes = dict(sorted(candidates.items(), key=lambda item: item[1], reverse=True)[:self.k])
+        self.reconstruire_tas()
+        return self
+
+    def etat(self):
+        """
+        :return: Dictionnaire sérialisable en JSON
+        """
+        return {"k": self.k, "cms": self.cms.etat(), "comptes": self.comptes}
+
+    @classmethod
+    def depuis_etat(cls, etat):
+        """
+        :param etat: Dictionnaire issu de etat()
+        :return: PlusFrequents
+        """
+        esquisse = cls(etat["k"])
+        esquisse.cms = CountMinSketch.depuis_etat(etat["cms"])
+        esquisse.comptes = dict(etat["comptes"])
+        esquisse.reconstruire_tas()
+        return esquisse
+
+class HyperLogLog:
+    """
+    Compteur de cardinalité : chaque registre garde le rang du premier bit à 1 le
+    plus élevé parmi les hachages qui lui sont attribués.
+    """
+    __slots__ = ("p", "registres")
+
+    def __init__(self, p=12):
+        self.p = p
+        self.registres = bytearray(1 << p)
+
+    def ajouter(self, cle):
+        """
+        :param cle: Clé observée
+        """
+        h = hacher(cle)
+        indice = h >> (64 - self.p)
+        reste = h & ((1 << (64 - self.p)) - 1)
+        rang = (64 - self.p) - reste.bit_length() + 1
+        if rang > self.registres[indice]:
+            self.registres[indice] = rang
+
+    def estimer(self):
+        """
+        :return: Estimation du nombre de clés distinctes
+        """
+        m = len(self.registres)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        brute = alpha * m * m / sum(2.0 ** -r for r in self.registres)
+        vides = self.registres.count(0)
+        if brute <= 2.5 * m and vides:
+            return round(m * math.log(m / vides))  # correction des petites cardinalités
+        return round(brute)
+
+    def fusionner(self, autre):
+        """
+        :param autre: HyperLogLog de même précision
+        :return: self
+        """
+        if self.p != autre.p:
+            raise ValueError("Impossible de fusionner des HyperLogLog de précisions différentes.")
+        self.registres = bytearray(max(a, b) for a, b in zip(self.registres, autre.registres))
+        return self
+
+    def etat(self):
+        """
+        :return: Dictionnaire sérialisable en JSON
+        """
+        return {"p": self.p, "registres": list(self.registres)}
+
+    @classmethod
+    def depuis_etat(cls, etat):
+        """
+        :param etat: Dictionnaire issu de etat()
+        :return: HyperLogLog
+        """
+        esquisse = cls(etat["p"])
+        esquisse.registres = bytearray(etat["registres"])
+        return esquisse
@@ -0,0 +1,439 @@
+# -*- coding: utf-8 -*-
+"""
+Données synthétiques de taille quelconque pour les mesures de performance.
+
+- lignes_tcpdump() : capture tcpdump texte ("tcpdump -x") avec dump hexadécimal,
+  une population d'hôtes configurable (postes locaux, machines nommées, serveurs
+  externes, serveurs DNS) dont la popularité suit une loi de Zipf, des sessions
+  TCP complètes (http, https, ssh), des requêtes DNS, des ping, et des attaques :
+  inondation de SYN, balayage de ports et inondation de ping.
+- lignes_ics() : calendrier ICS dans le format de l'export ADE (lignes pliées à
+  75 caractères, virgules et retours à la ligne échappés).
+- ecrire_pcap() : capture binaire pcap ou pcapng des mêmes paquets (trames
+  Ethernet/IPv4), pour comparer la lecture binaire à la lecture du texte.
+
+Les deux générateurs sont déterministes pour une graine donnée : deux mesures
+faites avec la même graine portent sur exactement les mêmes données.
+"""
+
+import itertools
+import random
+import socket
+import struct
+from datetime import datetime, timedelta
+
+from lecteur_pcap import nom_port
+
+SECONDES_PAR_JOUR = 86400
+
+# Nombre de lignes écrites à la fois par ecrire_lignes()
+TAILLE_LOT = 10000
+
+PORTS_SERVICES = ("http", "https", "ssh")
+
+# Options TCP telles qu'affichées par tcpdump
+OPTIONS_SYN = "options [mss 1460,sackOK,TS val {ts} ecr 0,nop,wscale 7]"
+OPTIONS_ACK = "options [nop,nop,TS val {ts} ecr {ecr}]"
+
+def horodatage(secondes):
+    """
+    :param secondes: Secondes depuis minuit (éventuellement au-delà d'un jour)
+    :return: Heure au format tcpdump ("11:42:04.766656")
+    """
+    microsecondes = round(secondes * 1e6) % (SECONDES_PAR_JOUR * 1000000)
+    secondes, micro = divmod(microsecondes, 1000000)
+    heures, reste = divmod(secondes, 3600)
+    minutes, secondes = divmod(reste, 60)
+    return f"{heures:02d}:{minutes:02d}:{secondes:02d}.{micro:06d}"
+
+class GenerateurTcpdump:
+    """
+    Trafic synthétique : chaque scénario (session, requête DNS, ping, attaque) produit
+    ses paquets à la suite, avec des horodatages croissants.
+    """
+    __slots__ = ("alea", "temps", "postes", "serveurs", "dns", "poids_postes", "poids_serveurs",
+                 "proportion_attaques", "dump_hexa", "lignes_hexa")
+
+    def __init__(self, graine=0, nb_hotes=1000, proportion_attaques=0.05, dump_hexa=True, debut=11 * 3600):
+        """
+        :param graine: Graine du générateur pseudo-aléatoire
+        :param nb_hotes: Nombre d'hôtes de la population (postes et serveurs)
+        :param proportion_attaques: Part des scénarios qui sont des attaques
+        :param dump_hexa: True pour ajouter le dump hexadécimal sous chaque paquet
+        :param debut: Heure du premier paquet, en secondes depuis minuit
+        """
+        self.alea = random.Random(graine)
+        self.temps = float(debut)
+        self.proportion_attaques = proportion_attaques
+        self.dump_hexa = dump_hexa
+
+        alea = self.alea
+        nb_postes = max(nb_hotes // 2, 1)
+        nb_serveurs = max(nb_hotes - nb_postes, 1)
+        # Postes locaux : adresses 192.168.x.y et quelques machines nommées
+        self.postes = [f"BP-Linux{i}" if i % 20 == 0 else f"192.168.{alea.randrange(256)}.{alea.randrange(1, 255)}"
+                       for i in range(nb_postes)]
+        # Serveurs externes : noms résolus ou adresses publiques
+        self.serveurs = [f"srv{i}.exemple{i % 97}.net" if i % 3 else
+                         f"{alea.randrange(1, 224)}.{alea.randrange(256)}.{alea.randrange(256)}.{alea.randrange(1, 255)}"
+                         for i in range(nb_serveurs)]
+        self.dns = [f"dns{i}.exemple.net" for i in range(max(nb_hotes // 200, 1))]
+        # Loi de Zipf : le k-ième hôte est choisi avec un poids 1 / k
+        self.poids_postes = list(itertools.accumulate(1 / k for k in range(1, nb_postes + 1)))
+        self.poids_serveurs = list(itertools.accumulate(1 / k for k in range(1, nb_serveurs + 1)))
+        # Lignes de dump toutes faites, tirées au hasard (leur contenu n'est jamais analysé)
+        self.lignes_hexa = [" ".join(f"{alea.getrandbits(16):04x}" for _ in range(8)) for _ in range(256)]
+
+    def poste(self):
+        return self.alea.choices(self.postes, cum_weights=self.poids_postes)[0]
+
+    def serveur(self):
+        return self.alea.choices(self.serveurs, cum_weights=self.poids_serveurs)[0]
+
+    def avancer(self, moyenne=0.002):
+        """
+        :param moyenne: Écart moyen entre deux paquets, en secondes
+        :return: Horodatage du paquet suivant
+        """
+        self.temps += self.alea.expovariate(1 / moyenne)
+        return horodatage(self.temps)
+
+    def paquet(self, entete, longueur_ip):
+        """
+        :param entete: Ligne d'en-tête sans l'horodatage
+        :param longueur_ip: Longueur du datagramme IP (nombre d'octets du dump)
+        :return: Liste de lignes : en-tête puis dump hexadécimal
+        """
+        lignes = [f"{self.avancer()} IP {entete}\n"]
+        if self.dump_hexa:
+            pleines, reste = divmod(longueur_ip, 16)
+            choix = self.alea.choices(self.lignes_hexa, k=pleines + bool(reste))
+            for numero, ligne in enumerate(choix):
+                if numero == pleines:
+                    ligne = ligne[:reste // 2 * 5 + reste % 2 * 2].rstrip()
+                lignes.append(f"\t0x{numero * 16:04x}:  {ligne}\n")
+        return lignes
+
+    def tcp(self, source, destination, flags, seq=None, ack=None, longueur=0, syn=False):
+        """
+        :return: Lignes d'un paquet TCP (en-tête "Flags [...]" et dump)
+        """
+        champs = [f"{source} > {destination}: Flags [{flags}]"]
+        if seq is not None:
+            champs.append(f"seq {seq}:{seq + longueur}" if longueur else f"seq {seq}")
+        if ack is not None:
+            champs.append(f"ack {ack}")
+        ts = self.alea.getrandbits(31)
+        champs.append("win 64240" if syn else "win 502")
+        champs.append(OPTIONS_SYN.format(ts=ts) if syn else OPTIONS_ACK.format(ts=ts, ecr=ts - 17))
+        champs.append(f"length {longueur}")
+        return self.paquet(", ".join(champs), 52 + longueur)
+
+    def session(self):
+        """
+        Session TCP complète : poignée de main, échanges de données, fermeture.
+        """
+        alea = self.alea
+        client = f"{self.poste()}.{alea.randrange(32768, 61000)}"
+        serveur = f"{self.serveur()}.{alea.choice(PORTS_SERVICES)}"
+        seq_client = alea.getrandbits(32)
+        seq_serveur = alea.getrandbits(32)
+        lignes = self.tcp(client, serveur, "S", seq_client, syn=True)
+        lignes += self.tcp(serveur, client, "S.", seq_serveur, seq_client + 1, syn=True)
+        lignes += self.tcp(client, serveur, ".", ack=1)
+        envoye = recu = 1
+        for _ in range(alea.randrange(1, 8)):
+            requete = alea.randrange(40, 600)
+            lignes += self.tcp(client, serveur, "P.", envoye, recu, requete)
+            envoye += requete
+            reponse = alea.randrange(40, 1448)
+            lignes += self.tcp(serveur, client, "P.", recu, envoye, reponse)
+            recu += reponse
+        lignes += self.tcp(client, serveur, "F.", envoye, recu)
+        lignes += self.tcp(serveur, client, "F.", recu, envoye + 1)
+        lignes += self.tcp(client, serveur, ".", ack=recu + 1)
+        return lignes
+
+    def requete_dns(self):
+        alea = self.alea
+        client = f"{self.poste()}.{alea.randrange(32768, 61000)}"
+        resolveur = f"{alea.choice(self.dns)}.domain"
+        identifiant = alea.randrange(65536)
+        nom = f"www.site{alea.randrange(5000)}.fr."
+        taille = len(nom) + 18
+        lignes = self.paquet(f"{client} > {resolveur}: {identifiant}+ A? {nom} ({taille})", 28 + taille)
+        lignes += self.paquet(f"{resolveur} > {client}: {identifiant} 1/0/0 A {self.serveur_ip()} ({taille + 16})",
+                              44 + taille)
+        return lignes
+
+    def serveur_ip(self):
+        alea = self.alea
+        return f"{alea.randrange(1, 224)}.{alea.randrange(256)}.{alea.randrange(256)}.{alea.randrange(1, 255)}"
+
+    def ping(self, source=None, destination=None, nombre=None):
+        alea = self.alea
+        source = source or self.poste()
+        destination = destination or self.serveur()
+        identifiant = alea.randrange(1, 65536)
+        lignes = []
+        for numero in range(1, (nombre or alea.randrange(1, 5)) + 1):
+            lignes += self.paquet(f"{source} > {destination}: ICMP echo request, id {identifiant}, seq {numero}, "
+                                  f"length 64", 84)
+            lignes += self.paquet(f"{destination} > {source}: ICMP echo reply, id {identifiant}, seq {numero}, "
+                                  f"length 64", 84)
+        return lignes
+
+    def inondation_syn(self):
+        """
+        Inondation de SYN : une source envoie des centaines de SYN sans jamais terminer
+        la poignée de main.
+        """
+        alea = self.alea
+        attaquant = self.serveur()
+        cible = f"{self.poste()}.{alea.choice(PORTS_SERVICES)}"
+        lignes = []
+        for _ in range(alea.randrange(200, 2000)):
+            lignes += self.tcp(f"{attaquant}.{alea.randrange(1024, 65536)}", cible, "S", alea.getrandbits(32),
+                               syn=True)
+        return lignes
+
+    def balayage_ports(self):
+        """
+        Balayage de ports : un SYN vers chaque port, la cible répond par un RST.
+        """
+        alea = self.alea
+        attaquant = self.serveur()
+        cible = self.poste()
+        port_source = alea.randrange(32768, 61000)
+        lignes = []
+        for port in range(1, alea.randrange(100, 1025)):
+            # tcpdump affiche le nom du service quand le port en a un ("http", "tcpmux"...)
+            port = nom_port(port, "tcp")
+            seq = alea.getrandbits(32)
+            lignes += self.tcp(f"{attaquant}.{port_source}", f"{cible}.{port}", "S", seq, syn=True)
+            lignes += self.tcp(f"{cible}.{port}", f"{attaquant}.{port_source}", "R.", 0, seq + 1)
+        return lignes
+
+    def inondation_ping(self):
+        return self.ping(self.serveur(), self.poste(), self.alea.randrange(100, 1000))
+
+    def scenario(self):
+        """
+        :return: Lignes d'un scénario tiré au hasard
+        """
+        alea = self.alea
+        if alea.random() < self.proportion_attaques:
+            return alea.choice((self.inondation_syn, self.balayage_ports, self.inondation_ping))()
+        tirage = alea.random()
+        if tirage < 0.7:
+            return self.session()
+        if tirage < 0.9:
+            return self.requete_dns()
+        return self.ping()
+
+    def lignes(self):
+        """
+        :return: Générateur infini de lignes
+        """
+        while True:
+            yield from self.scenario()
+
+def lignes_tcpdump(nb_lignes, graine=0, **options):
+    """
+    :param nb_lignes: Nombre de lignes à produire (dump hexadécimal compris)
+    :param graine: Graine du générateur pseudo-aléatoire
+    :param options: Autres paramètres de GenerateurTcpdump
+    :return: Générateur de lignes tcpdump, retour à la ligne compris
+    """
+    return itertools.islice(GenerateurTcpdump(graine, **options).lignes(), nb_lignes)
+
+# Calendrier ADE : modules, types de séance, salles, groupes et enseignants
+MODULES = ("R1.01", "R1.02", "R1.03", "R1.04", "R1.05", "R1.06", "R1.07", "R1.08", "R1.09", "R1.10", "R1.11",
+           "R1.12", "SAE1.01", "SAE1.02", "SAE1.03", "SAE1.04", "SAE1.05", "SAE1.06")
+TYPES_SEANCE = ("CM", "TD", "TP", "DS", "DS TP")
+SALLES = tuple(f"{batiment}_{numero:03d}" for batiment in "GDE" for numero in range(1, 40))
+GROUPES = ("RT1-S1", "RT1-TD A", "RT1-TD B", "RT1-TP A1", "RT1-TP A2", "RT1-TP B1", "RT1-TP B2")
+NOMS = ("MARTIN", "BERNARD", "DUBOIS", "THOMAS", "ROBERT", "RICHARD", "PETIT", "DURAND", "LEROY", "MOREAU",
+        "SIMON", "LAURENT", "LEFEBVRE", "MICHEL", "GARCIA", "DAVID", "BERTRAND", "ROUX", "VINCENT", "FOURNIER")
+PRENOMS = ("CHRISTOPHE", "NATHALIE", "PHILIPPE", "ISABELLE", "NICOLAS", "SYLVIE", "STEPHANE", "CATHERINE",
+           "FREDERIC", "SANDRINE", "JULIEN", "CELINE")
+
+def plier(ligne, largeur=75):
+    """
+    Plie une ligne de contenu ICS (RFC 5545) : au-delà de `largeur` caractères, la
+    suite est reportée sur des lignes commençant par une espace.
+
+    :param ligne: Ligne sans retour à la ligne
+    :param largeur: Longueur maximale d'une ligne
+    :return: Texte plié, retour à la ligne final compris
+    """
+    if len(ligne) <= largeur:
+        return ligne + "\n"
+    morceaux = [ligne[:largeur]]
+    morceaux += [" " + ligne[i:i + largeur - 1] for i in range(largeur, len(ligne), largeur - 1)]
+    return "\n".join(morceaux) + "\n"
+
+def lignes_ics(nb_lignes, graine=0, debut=datetime(2023, 9, 4)):
+    """
+    :param nb_lignes: Nombre approximatif de lignes (le dernier événement est toujours complet)
+    :param graine: Graine du générateur pseudo-aléatoire
+    :param debut: Premier jour du calendrier
+    :return: Générateur de lignes ICS, retour à la ligne compris
+    """
+    alea = random.Random(graine)
+    export = "20240110T054707Z"
+    enseignants = [f"{nom} {prenom}" for nom in NOMS for prenom in PRENOMS]
+    en_tete = ["BEGIN:VCALENDAR", "METHOD:REQUEST", "PRODID:-//ADE/version 6.0", "VERSION:2.0", "CALSCALE:GREGORIAN"]
+    yield from (ligne + "\n" for ligne in en_tete)
+    produites = len(en_tete) + 1
+    numero = 0
+    while produites < nb_lignes:
+        # Jours ouvrés successifs, quelques séances par jour entre 8 h et 18 h (heure UTC)
+        jour = debut + timedelta(days=numero // 6 // 5 * 7 + numero // 6 % 5)
+        depart = jour + timedelta(hours=alea.randrange(6, 16), minutes=alea.choice((0, 30)))
+        fin = depart + timedelta(minutes=alea.choice((60, 90, 120, 180, 240)))
+        module = alea.choice(MODULES)
+        salles = "\\,".join(alea.sample(SALLES, alea.choice((1, 1, 1, 2, 7))))
+        intervenants = "\\n".join(alea.sample(enseignants, alea.choice((0, 1, 1, 2))))
+        description = f"\\n\\n{alea.choice(GROUPES)}\\n{intervenants + chr(92) + 'n' if intervenants else ''}" \
+                      f"(Exporté le:10/01/2024 06:47)\\n"
+        evenement = (
+            "BEGIN:VEVENT\n"
+            f"DTSTAMP:{export}\n"
+            f"DTSTART:{depart:%Y%m%dT%H%M%S}Z\n"
+            f"DTEND:{fin:%Y%m%dT%H%M%S}Z\n"
+            + plier(f"SUMMARY:{module} {alea.choice(TYPES_SEANCE)}")
+            + plier(f"LOCATION:{salles}")
+            + plier(f"DESCRIPTION:{description}")
+            + f"UID:ADE6{alea.getrandbits(248):062x}\n"
+            "CREATED:19700101T000000Z\n"
+            f"LAST-MODIFIED:{export}\n"
+            "SEQUENCE:2141064567\n"
+            "END:VEVENT\n"
+        )
+        yield evenement
+        produites += evenement.count("\n")
+        numero += 1
+    yield "END:VCALENDAR\n"
+
+def ecrire_lignes(fichier, lignes):
+    """
+    :param fichier: Fichier à écrire
+    :param lignes: Itérable de lignes (ou de blocs de lignes), retours à la ligne compris
+    """
+    with open(fichier, "w", encoding="utf-8") as sortie:
+        while True:
+            lot = list(itertools.islice(lignes, TAILLE_LOT))
+            if not lot:
+                break
+            sortie.writelines(lot)
+
+# Flags TCP de tcpdump -> bits de l'en-tête
+BITS_FLAGS = {"F": 0x01, "S": 0x02, "R": 0x04, "P": 0x08, ".": 0x10, "U": 0x20, "E": 0x40, "W": 0x80}
+TYPES_ICMP = {"echo reply": 0, "echo request": 8}
+PROTOCOLES_IP = {"TCP": 6, "UDP": 17, "ICMP": 1}
+ETHERNET = bytes(12) + b"\x08\x00"
+
+def numero_port(port, protocole):
+    """
+    :param port: Port tel qu'affiché par tcpdump ("http", "50019")
+    :param protocole: "tcp" ou "udp"
+    :return: Numéro du port
+    """
+    if port.isdigit():
+        return int(port)
+    return socket.getservbyname(port, protocole)
+
+class EncodeurTrames:
+    """
+    Paquet -> trame Ethernet/IPv4. Les hôtes nommés ("BP-Linux0") reçoivent une
+    adresse 10.x.y.z, toujours la même pour un même nom.
+    """
+    __slots__ = ("adresses", "ports")
+
+    def __init__(self):
+        self.adresses = {}
+        self.ports = {}
+
+    def adresse(self, hote):
+        adresse = self.adresses.get(hote)
+        if adresse is None:
+            try:
+                adresse = socket.inet_aton(hote)
+            except OSError:
+                numero = len(self.adresses) + 1
+                adresse = bytes((10, numero >> 16 & 255, numero >> 8 & 255, numero & 255))
+            self.adresses[hote] = adresse
+        return adresse
+
+    def port(self, port, protocole):
+        cle = (port, protocole)
+        numero = self.ports.get(cle)
+        if numero is None:
+            numero = self.ports[cle] = numero_port(port, protocole)
+        return numero
+
+    def trame(self, paquet):
+        """
+        :param paquet: Paquet (voir parseur_tcpdump.py)
+        :return: Octets de la trame, charge utile remplie de zéros
+        """
+        if paquet.protocole == "TCP":
+            flags = 0
+            for lettre in paquet.flags:
+                flags |= BITS_FLAGS.get(lettre, 0)
+            transport = struct.pack(">HHIIBBHHH", self.port(paquet.port_source, "tcp"),
+                                    self.port(paquet.port_destination, "tcp"), paquet.seq or 0, paquet.ack or 0,
+                                    5 << 4, flags, paquet.win or 0, 0, 0)
+        elif paquet.protocole == "UDP":
+            transport = struct.pack(">HHHH", self.port(paquet.port_source, "udp"),
+                                    self.port(paquet.port_destination, "udp"), paquet.longueur + 8, 0)
+        elif paquet.protocole == "ICMP":
+            transport = struct.pack(">BBH", TYPES_ICMP.get(paquet.flags, 3), 0, 0)
+        else:
+            transport = b""
+        # La longueur affichée par tcpdump est la charge au-delà de l'en-tête de transport,
+        # sauf pour ICMP (en-tête compris)
+        charge = bytes(paquet.longueur - len(transport) if paquet.protocole == "ICMP" else paquet.longueur)
+        ip = struct.pack(">BBHHHBBH4s4s", 0x45, 0, 20 + len(transport) + len(charge), 0, 0, 64,
+                         PROTOCOLES_IP.get(paquet.protocole, 47), 0, self.adresse(paquet.source),
+                         self.adresse(paquet.destination))
+        return ETHERNET + ip + transport + charge
+
+def ecrire_pcap(fichier, paquets, pcapng=False, jour=datetime(2024, 1, 10)):
+    """
+    :param fichier: Fichier à écrire
+    :param paquets: Itérable de Paquet
+    :param pcapng: True pour le format pcapng, False pour pcap
+    :param jour: Jour de la capture (les horodatages des paquets sont relatifs à son minuit, heure locale)
+    :return: Nombre de paquets écrits
+    """
+    minuit = jour.timestamp()
+    encodeur = EncodeurTrames()
+    nombre = 0
+    with open(fichier, "wb") as sortie:
+        if pcapng:
+            sortie.write(struct.pack("<IIIHHqI", 0x0A0D0D0A, 28, 0x1A2B3C4D, 1, 0, -1, 28))
+            sortie.write(struct.pack("<IIHHIHHBxxxII", 1, 32, 1, 0, 65535, 9, 1, 9, 0, 32))  # if_tsresol = 10^-9
+        else:
+            sortie.write(struct.pack("<IHHiIII", 0xA1B2C3D4, 2, 4, 0, 0, 65535, 1))
+        lot = []
+        for paquet in paquets:
+            trame = encodeur.trame(paquet)
+            if pcapng:
+                nanosecondes = round((minuit + paquet.horodatage) * 1e9)
+                longueur = 32 + (len(trame) + 3) // 4 * 4
+                lot.append(struct.pack("<IIIIIII", 6, longueur, 0, nanosecondes >> 32, nanosecondes & 0xFFFFFFFF,
+                                       len(trame), len(trame)))
+                lot.append(trame + bytes(-len(trame) % 4) + struct.pack("<I", longueur))
+            else:
+                microsecondes = round((minuit + paquet.horodatage) * 1e6)
+                secondes, micro = divmod(microsecondes, 1000000)
+                lot.append(struct.pack("<IIII", secondes, micro, len(trame), len(trame)))
+                lot.append(trame)
+            nombre += 1
+            if len(lot) >= TAILLE_LOT:
+                sortie.writelines(lot)
+                lot = []
+        sortie.writelines(lot)
+    return nombre
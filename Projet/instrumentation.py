@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+"""
+Instrumentation facultative de l'analyse : où passe le temps, combien de lignes,
+d'octets et de paquets traverse chaque étage, et quelle mémoire est utilisée.
+
+- Étages chaînés : chaque étage du pipeline de générateurs est enveloppé par
+  flux(), qui mesure le temps passé à lui demander l'élément suivant. Ce temps
+  comprend celui des étages en amont ; la durée propre d'un étage est donc sa
+  durée cumulée moins celle de l'étage précédent.
+- Étapes : durées indépendantes (rendu d'un rapport...), mesurées par etape().
+- Motifs : compteurs libres (branches de l'expression tcpdump, ports...).
+- cProfile et tracemalloc, sur demande : profil par fonction du thread principal,
+  pic de mémoire allouée par Python et lignes qui retiennent le plus de mémoire.
+- Pic de mémoire résidente (RSS) du processus, là où le module resource existe.
+
+Sans instrumentation, rien de tout cela n'est exécuté : le pipeline reste celui de
+pipeline_capture().
+"""
+
+import contextlib
+import cProfile
+import io
+import json
+import os
+import platform
+import pstats
+import sys
+import time
+import tracemalloc
+from collections import Counter
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+VERSION_RESUME = 2
+
+def rss_max():
+    """
+    :return: Pic de mémoire résidente du processus en octets, ou None si inconnu
+    """
+    if resource is None:
+        return None
+    pic = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss est en kilo-octets sous Linux, en octets sous macOS
+    return pic if sys.platform == "darwin" else pic * 1024
+
+class Instrumentation:
+    """
+    Mesures d'une exécution, rassemblées par resume() dans un dictionnaire
+    sérialisable en JSON.
+    """
+    __slots__ = ("etages", "etapes", "motifs", "profileur", "memoire", "debut", "duree")
+
+    def __init__(self, cprofile=False, memoire=False):
+        """
+        :param cprofile: True pour profiler les fonctions appelées (cProfile)
+        :param memoire: True pour suivre les allocations (tracemalloc)
+        """
+        self.etages = []        # [nom, durée cumulée, éléments], dans l'ordre du pipeline
+        self.etapes = {}        # nom -> durée en secondes
+        self.motifs = Counter()
+        self.profileur = cProfile.Profile() if cprofile else None
+        self.memoire = memoire
+        self.debut = None
+        self.duree = None
+
+    def demarrer(self):
+        if self.memoire:
+            tracemalloc.start()
+        if self.profileur is not None:
+            self.profileur.enable()
+        self.debut = time.perf_counter()
+
+    def arreter(self):
+        self.duree = time.perf_counter() - self.debut
+        if self.profileur is not None:
+            self.profileur.disable()
+
+    def flux(self, nom, iterable):
+        """
+        Étage chronométré : retransmet les éléments en mesurant le temps passé à les obtenir.
+
+        :param nom: Nom de l'étage
+        :param iterable: Étage précédent (ou source) du pipeline
+        :return: Générateur des mêmes éléments
+        """
+        # Enregistré dès la construction du pipeline (un générateur ne s'exécute qu'au
+        # premier élément demandé, donc de l'aval vers l'amont) pour garder l'ordre des étages
+        etage = [nom, 0.0, 0]
+        self.etages.append(etage)
+
+        def chronometrer():
+            horloge = time.perf_counter
+            iterateur = iter(iterable)
+            duree = 0.0
+            elements = 0
+            try:
+                while True:
+                    debut = horloge()
+                    try:
+                        element = next(iterateur)
+                    except StopIteration:
+                        duree += horloge() - debut
+                        break
+                    duree += horloge() - debut
+                    elements += 1
+                    yield element
+            finally:
+                etage[1] = duree
+                etage[2] = elements
+
+        return chronometrer()
+
+    @contextlib.contextmanager
+    def etage_final(self, nom):
+        """
+        Dernier étage chaîné : le consommateur du pipeline (agrégation), qui traite
+        tous les éléments sortis de l'étage précédent.
+
+        :param nom: Nom de l'étage
+        """
+        debut = time.perf_counter()
+        try:
+            yield
+        finally:
+            duree = time.perf_counter() - debut
+            self.etages.append([nom, duree, self.etages[-1][2] if self.etages else 0])
+
+    @contextlib.contextmanager
+    def etape(self, nom):
+        """
+        Durée d'une étape indépendante, ajoutée à celle des appels précédents de même nom.
+
+        :param nom: Nom de l'étape
+        """
+        debut = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.ajouter_etape(nom, time.perf_counter() - debut)
+
+    def ajouter_etape(self, nom, duree):
+        """
+        :param nom: Nom de l'étape
+        :param duree: Durée en secondes (ajoutée à celle déjà notée)
+        """
+        self.etapes[nom] = self.etapes.get(nom, 0.0) + duree
+
+    def elements(self, nom):
+        """
+        :param nom: Nom d'un étage chaîné
+        :return: Nombre d'éléments sortis de cet étage
+        """
+        return next(etage[2] for etage in self.etages if etage[0] == nom)
+
+    def resume_etages(self):
+        """
+        :return: Liste de dictionnaires "nom", "duree" (propre), "duree_cumulee", "elements",
+                 "par_seconde", dans l'ordre du pipeline
+        """
+        resume = []
+        precedente = 0.0
+        for nom, cumulee, elements in self.etages:
+            propre = max(cumulee - precedente, 0.0)
+            resume.append({"nom": nom, "duree": propre, "duree_cumulee": cumulee, "elements": elements,
+                           "par_seconde": elements / propre if propre and elements else None})
+            precedente = cumulee
+        return resume
+
+    def resume_profil(self, fichier_profil=None, nombre=20):
+        """
+        :param fichier_profil: Fichier .prof où enregistrer le profil complet (pstats), ou None
+        :param nombre: Nombre de fonctions gardées, par durée propre décroissante
+        :return: Dictionnaire "fichier" et "fonctions", ou None sans cProfile
+        """
+        if self.profileur is None:
+            return None
+        if fichier_profil is not None:
+            self.profileur.dump_stats(fichier_profil)
+        statistiques = pstats.Stats(self.profileur, stream=io.StringIO())
+        fonctions = sorted(statistiques.stats.items(), key=lambda item: item[1][2], reverse=True)[:nombre]
+        return {
+            "fichier": fichier_profil,
+            "fonctions": [{"fonction": f"{os.path.basename(fichier)}:{ligne}({nom})", "appels": appels,
+                           "duree_propre": propre, "duree_cumulee": cumulee}
+                          for (fichier, ligne, nom), (_, appels, propre, cumulee, _) in fonctions],
+        }
+
+    def resume_memoire(self, nombre=10):
+        """
+        :param nombre: Nombre de lignes de code gardées, par mémoire retenue décroissante
+        :return: Dictionnaire "rss_max", et avec tracemalloc "tracemalloc_pic" et "allocations"
+        """
+        memoire = {"rss_max": rss_max()}
+        if self.memoire and tracemalloc.is_tracing():
+            _, pic = tracemalloc.get_traced_memory()
+            lignes = tracemalloc.take_snapshot().statistics("lineno")[:nombre]
+            tracemalloc.stop()
+            memoire["tracemalloc_pic"] = pic
+            memoire["allocations"] = [{"ligne": f"{os.path.basename(ligne.traceback[0].filename)}:"
+                                                f"{ligne.traceback[0].lineno}",
+                                       "octets": ligne.size, "nombre": ligne.count} for ligne in lignes]
+        return memoire
+
+    def apercu(self, mesure=None):
+        """
+        Mesures disponibles en cours d'exécution, sans arrêter cProfile ni tracemalloc
+        (section "Performances" du compte rendu).
+
+        :param mesure: Mesure de la capture (paquets, octets, durée), ou None
+        :return: Dictionnaire "etages", "motifs", "rss_max" et, avec une mesure, "capture"
+        """
+        apercu = {"etages": self.resume_etages(), "motifs": dict(self.motifs), "rss_max": rss_max()}
+        if mesure is not None:
+            duree = mesure["duree"]
+            apercu["capture"] = dict(mesure, paquets_par_seconde=mesure["paquets"] / duree if duree else None,
+                                     octets_par_seconde=mesure["octets"] / duree if duree else None)
+        return apercu
+
+    def resume(self, mesure=None, fichier_profil=None):
+        """
+        Bilan complet, à appeler une fois arreter() fait (tracemalloc est arrêté au passage).
+
+        :param mesure: Mesure de la capture (paquets, octets, durée), ou None
+        :param fichier_profil: Fichier .prof où enregistrer le profil cProfile, ou None
+        :return: Dictionnaire sérialisable en JSON
+        """
+        apercu = self.apercu(mesure)
+        return {
+            "version": VERSION_RESUME,
+            "python": platform.python_version(),
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "duree": self.duree,
+            "capture": apercu.get("capture"),
+            "etages": apercu["etages"],
+            "etapes": dict(self.etapes),
+            "motifs": apercu["motifs"],
+            "memoire": self.resume_memoire(),
+            "profil": self.resume_profil(fichier_profil),
+        }
+
+def ecrire_resume(resume, fichier):
+    """
+    :param resume: Dictionnaire retourné par Instrumentation.resume()
+    :param fichier: Fichier JSON à écrire
+    """
+    temporaire = fichier + ".tmp"
+    with open(temporaire, "w", encoding="utf-8") as f:
+        json.dump(resume, f, indent=2, ensure_ascii=False)
+    os.replace(temporaire, fichier)
@@ -0,0 +1,436 @@
+# -*- coding: utf-8 -*-
+"""
+Lecture directe des captures binaires pcap et pcapng, sans passer par le texte de
+tcpdump.
+
+Les en-têtes Ethernet (VLAN compris), Linux « cooked » (SLL, SLL2), loopback et IP
+brut, puis IPv4/IPv6 et TCP/UDP/ICMP sont décodés avec struct sur des memoryview
+du fichier lu par blocs, sans copie des paquets. Chaque paquet devient le même
+enregistrement Paquet que celui de parse_tcpdump_line() pour la ligne que tcpdump
+aurait affichée : les ports connus sont nommés ("http", "domain"...), les flags TCP
+suivent la notation de tcpdump ("S", "S.", "P."...) et l'horodatage est compté en
+secondes depuis minuit, heure locale. Les numéros de séquence sont absolus (ceux
+de "tcpdump -S").
+
+Comme lire_entetes() -> lire_paquets() pour le texte, la lecture se fait en deux
+étages : lire_enregistrements() -> decoder_paquets().
+"""
+
+import os
+import socket
+import struct
+import sys
+from datetime import datetime
+from functools import lru_cache
+
+from decompression import ouvrir_capture
+from parseur_tcpdump import Paquet, lire_entetes, lire_paquets
+
+TAILLE_BLOC = 1 << 22
+
+# Nombre magique (4 premiers octets) -> (ordre des octets, unités d'horodatage par seconde)
+MAGIQUES_PCAP = {
+    b"\xd4\xc3\xb2\xa1": ("<", 10**6),
+    b"\xa1\xb2\xc3\xd4": (">", 10**6),
+    b"\x4d\x3c\xb2\xa1": ("<", 10**9),
+    b"\xa1\xb2\x3c\x4d": (">", 10**9),
+}
+MAGIQUE_PCAPNG = b"\x0a\x0d\x0d\x0a"
+
+# Blocs pcapng utiles
+BLOC_INTERFACE = 1
+BLOC_PAQUET_OBSOLETE = 2
+BLOC_PAQUET_SIMPLE = 3
+BLOC_PAQUET = 6
+OPTION_RESOLUTION = 9  # if_tsresol
+
+# Types de lien (LINKTYPE_*)
+LIEN_NULL = 0
+LIEN_ETHERNET = 1
+LIEN_LOOP = 108
+LIEN_LINUX_SLL = 113
+LIEN_LINUX_SLL2 = 276
+LIENS_IP_BRUT = {12, 14, 101, 228, 229}
+
+ETHERTYPE_IPV4 = 0x0800
+ETHERTYPE_IPV6 = 0x86DD
+ETHERTYPES_VLAN = {0x8100, 0x88A8, 0x9100}
+
+# En-têtes d'extension IPv6 sautés pour atteindre TCP/UDP/ICMP
+EXTENSIONS_IPV6 = {0, 43, 60}
+FRAGMENT_IPV6 = 44
+
+ENTIER_16 = struct.Struct(">H")
+IPV4 = struct.Struct(">BxHxxHxBxxII")     # version/IHL, longueur totale, fragment, protocole, adresses
+IPV6 = struct.Struct(">4xHBx16s16s")      # longueur de la charge, en-tête suivant, adresses
+TCP = struct.Struct(">HHIIBBH")           # ports, seq, ack, longueur de l'en-tête, flags, fenêtre
+UDP = struct.Struct(">HHH")               # ports, longueur
+
+# Flags TCP dans l'ordre d'affichage de tcpdump ; "." pour ACK
+ORDRE_FLAGS = ((0x01, "F"), (0x02, "S"), (0x04, "R"), (0x08, "P"), (0x10, "."), (0x20, "U"), (0x40, "E"),
+               (0x80, "W"))
+FLAGS_TCP = [sys.intern("".join(lettre for bit, lettre in ORDRE_FLAGS if octet & bit) or "none")
+             for octet in range(256)]
+SYN_FIN_RST = 0x07
+ACK = 0x10
+
+# Types ICMP, libellés comme chez tcpdump
+TYPES_ICMP = {0: "echo reply", 3: "unreachable", 4: "source quench", 5: "redirect", 8: "echo request",
+              11: "time exceeded in-transit", 12: "parameter problem", 13: "time stamp query",
+              14: "time stamp reply"}
+TYPES_ICMP6 = {128: "echo request", 129: "echo reply"}
+
+# Ports nommés par tcpdump même sans /etc/services (ceux que comptent les statistiques)
+PORTS_CONNUS = {22: "ssh", 53: "domain", 80: "http", 443: "https"}
+
+def format_capture(fichier):
+    """
+    :param fichier: Chemin d'une capture (éventuellement compressée)
+    :return: "pcap", "pcapng", ou None pour une capture texte
+    """
+    with ouvrir_capture(fichier) as flux:
+        magique = flux.read(4)
+    if magique in MAGIQUES_PCAP:
+        return "pcap"
+    if magique == MAGIQUE_PCAPNG:
+        return "pcapng"
+    return None
+
+# Table des services du système (comme tcpdump, qui la charge une fois au démarrage)
+FICHIERS_SERVICES = ("/etc/services", os.path.join(os.environ.get("SYSTEMROOT", "C:\\Windows"),
+                                                   "System32", "drivers", "etc", "services"))
+
+@lru_cache(maxsize=None)
+def table_services():
+    """
+    :return: Dictionnaire (port, "tcp" ou "udp") -> nom du service ; le premier nom lu l'emporte
+    """
+    table = {}
+    for chemin in FICHIERS_SERVICES:
+        try:
+            with open(chemin, "r", encoding="utf-8", errors="replace") as f:
+                for ligne in f:
+                    champs = ligne.split("#", 1)[0].split()
+                    if len(champs) < 2 or "/" not in champs[1]:
+                        continue
+                    port, _, protocole = champs[1].partition("/")
+                    if port.isdigit():
+                        table.setdefault((int(port), protocole), champs[0])
+            break
+        except OSError:
+            continue
+    return table
+
+@lru_cache(maxsize=65536)
+def nom_port(port, protocole):
+    """
+    :param port: Numéro de port
+    :param protocole: "tcp" ou "udp"
+    :return: Nom du service comme l'affiche tcpdump ("http"), sinon le numéro
+    """
+    nom = PORTS_CONNUS.get(port) or table_services().get((port, protocole)) or str(port)
+    return sys.intern(nom)
+
+@lru_cache(maxsize=65536)
+def adresse_ipv4(adresse):
+    """
+    :param adresse: Adresse IPv4 sous forme d'entier
+    :return: Adresse "a.b.c.d" (un seul objet par adresse)
+    """
+    return sys.intern(f"{adresse >> 24}.{adresse >> 16 & 255}.{adresse >> 8 & 255}.{adresse & 255}")
+
+@lru_cache(maxsize=65536)
+def adresse_ipv6(adresse):
+    """
+    :param adresse: Adresse IPv6 (16 octets)
+    :return: Adresse sous forme abrégée ("fe80::1")
+    """
+    return sys.intern(socket.inet_ntop(socket.AF_INET6, adresse))
+
+@lru_cache(maxsize=1024)
+def decalage_local(heure):
+    """
+    :param heure: Heure UTC en heures depuis l'époque Unix
+    :return: Décalage de l'heure locale en secondes à cette heure-là (heure d'été comprise)
+    """
+    return datetime.fromtimestamp(heure * 3600).astimezone().utcoffset().total_seconds()
+
+def secondes_depuis_minuit(secondes, fraction=0.0):
+    """
+    :param secondes: Secondes entières depuis l'époque Unix
+    :param fraction: Fraction de seconde
+    :return: Secondes depuis minuit, heure locale (comme l'affiche tcpdump) ; la partie
+             entière est calculée à part pour ne pas perdre les microsecondes
+    """
+    return (secondes + int(decalage_local(secondes // 3600))) % 86400 + fraction
+
+def enregistrements_pcap(flux, donnees, taille_bloc=TAILLE_BLOC):
+    """
+    :param flux: Fichier binaire, positionné après les octets déjà lus
+    :param donnees: Octets déjà lus (au moins l'en-tête global de 24 octets)
+    :param taille_bloc: Taille des lectures
+    :return: Générateur de triplets (secondes depuis minuit, type de lien, memoryview du paquet)
+    """
+    ordre, par_seconde = MAGIQUES_PCAP[bytes(donnees[:4])]
+    entete = struct.Struct(ordre + "IIII")
+    # Les 4 bits de poids fort du type de lien décrivent la FCS éventuelle
+    type_lien = struct.unpack_from(ordre + "I", donnees, 20)[0] & 0x0FFFFFFF
+    position = 24
+    vue = memoryview(donnees)
+    while True:
+        if len(donnees) - position < 16:
+            donnees = donnees[position:] + flux.read(taille_bloc)
+            vue, position = memoryview(donnees), 0
+            if len(donnees) < 16:
+                return
+        secondes, fraction, capture, _ = entete.unpack_from(donnees, position)
+        fin = position + 16 + capture
+        if fin > len(donnees):
+            donnees = donnees[position:] + flux.read(max(taille_bloc, fin - position))
+            vue, position = memoryview(donnees), 0
+            fin = 16 + capture
+            if fin > len(donnees):
+                return  # dernier paquet tronqué
+        yield secondes_depuis_minuit(secondes, fraction / par_seconde), type_lien, vue[position + 16:fin]
+        position = fin
+
+def options_interface(donnees, debut, fin, ordre):
+    """
+    :param donnees: Octets du bloc de description d'interface
+    :param debut: Position de la première option
+    :param fin: Position de la fin des options
+    :param ordre: Ordre des octets de la section ("<" ou ">")
+    :return: Nombre d'unités d'horodatage de l'interface par seconde
+    """
+    option = struct.Struct(ordre + "HH")
+    while debut + 4 <= fin:
+        code, longueur = option.unpack_from(donnees, debut)
+        if code == 0:
+            break
+        if code == OPTION_RESOLUTION and longueur >= 1:
+            valeur = donnees[debut + 4]
+            return 2 ** (valeur & 0x7F) if valeur & 0x80 else 10 ** valeur
+        debut += 4 + (longueur + 3) // 4 * 4
+    return 10**6
+
+def enregistrements_pcapng(flux, donnees, taille_bloc=TAILLE_BLOC):
+    """
+    :param flux: Fichier binaire, positionné après les octets déjà lus
+    :param donnees: Octets déjà lus (au moins le début du premier bloc)
+    :param taille_bloc: Taille des lectures
+    :return: Générateur de triplets (secondes depuis minuit, type de lien, memoryview du paquet)
+    """
+    position = 0
+    vue = memoryview(donnees)
+    ordre = "<"
+    interfaces = []  # (type de lien, unités d'horodatage par seconde), dans l'ordre des blocs
+    while True:
+        if len(donnees) - position < 12:
+            donnees = donnees[position:] + flux.read(taille_bloc)
+            vue, position = memoryview(donnees), 0
+            if len(donnees) < 12:
+                return
+        if donnees[position:position + 4] == MAGIQUE_PCAPNG:
+            # Nouvelle section : son ordre des octets est donné par le nombre magique 0x1A2B3C4D
+            ordre = "<" if donnees[position + 8:position + 12] == b"\x4d\x3c\x2b\x1a" else ">"
+            interfaces = []
+        type_bloc, longueur = struct.unpack_from(ordre + "II", donnees, position)
+        fin = position + longueur
+        if fin > len(donnees):
+            donnees = donnees[position:] + flux.read(max(taille_bloc, longueur))
+            vue, position = memoryview(donnees), 0
+            fin = longueur
+            if fin > len(donnees):
+                return  # dernier bloc tronqué
+        if longueur < 12:
+            raise ValueError(f"Bloc pcapng invalide (longueur {longueur})")
+
+        if type_bloc == BLOC_PAQUET:
+            interface, haut, bas, capture = struct.unpack_from(ordre + "IIII", donnees, position + 8)
+            type_lien, par_seconde = interfaces[interface]
+            secondes, reste = divmod(haut << 32 | bas, par_seconde)
+            yield (secondes_depuis_minuit(secondes, reste / par_seconde), type_lien,
+                   vue[position + 28:position + 28 + capture])
+        elif type_bloc == BLOC_PAQUET_SIMPLE:
+            # Pas d'horodatage dans ce bloc ; la longueur capturée se déduit de celle du bloc
+            origine, = struct.unpack_from(ordre + "I", donnees, position + 8)
+            type_lien, _ = interfaces[0]
+            yield 0.0, type_lien, vue[position + 12:position + 12 + min(origine, longueur - 16)]
+        elif type_bloc == BLOC_PAQUET_OBSOLETE:
+            interface, haut, bas, capture = struct.unpack_from(ordre + "H2xIII", donnees, position + 8)
+            type_lien, par_seconde = interfaces[interface]
+            secondes, reste = divmod(haut << 32 | bas, par_seconde)
+            yield (secondes_depuis_minuit(secondes, reste / par_seconde), type_lien,
+                   vue[position + 28:position + 28 + capture])
+        elif type_bloc == BLOC_INTERFACE:
+            type_lien, = struct.unpack_from(ordre + "H", donnees, position + 8)
+            interfaces.append((type_lien, options_interface(donnees, position + 16, fin - 4, ordre)))
+        position = fin
+
+def lire_enregistrements(fichier, taille_bloc=TAILLE_BLOC):
+    """
+    Premier étage de la lecture binaire : les paquets bruts, sans décodage.
+
+    :param fichier: Chemin d'une capture pcap ou pcapng (éventuellement compressée)
+    :param taille_bloc: Taille des lectures
+    :return: Générateur de triplets (secondes depuis minuit, type de lien, memoryview du paquet) ;
+             la memoryview n'est à utiliser qu'avant de demander l'élément suivant
+    :raises ValueError: Si le fichier n'est ni un pcap ni un pcapng
+    """
+    with ouvrir_capture(fichier) as flux:
+        donnees = flux.read(taille_bloc)
+        if donnees[:4] in MAGIQUES_PCAP:
+            yield from enregistrements_pcap(flux, donnees, taille_bloc)
+        elif donnees[:4] == MAGIQUE_PCAPNG:
+            yield from enregistrements_pcapng(flux, donnees, taille_bloc)
+        else:
+            raise ValueError(f"{fichier} n'est pas une capture pcap ou pcapng")
+
+def decoder_paquet(horodatage, type_lien, donnees):
+    """
+    :param horodatage: Secondes depuis minuit
+    :param type_lien: Type de lien de l'interface (LINKTYPE_*)
+    :param donnees: Octets capturés du paquet
+    :return: Paquet, ou None si ce n'est pas un paquet IP (ARP...) ou s'il est trop tronqué
+    """
+    taille = len(donnees)
+    # Couche liaison : position de l'en-tête IP
+    if type_lien == LIEN_ETHERNET:
+        if taille < 14:
+            return None
+        ethertype, = ENTIER_16.unpack_from(donnees, 12)
+        debut = 14
+        while ethertype in ETHERTYPES_VLAN and taille >= debut + 4:
+            ethertype, = ENTIER_16.unpack_from(donnees, debut + 2)
+            debut += 4
+        if ethertype != ETHERTYPE_IPV4 and ethertype != ETHERTYPE_IPV6:
+            return None
+    elif type_lien in LIENS_IP_BRUT:
+        debut = 0
+    elif type_lien == LIEN_LINUX_SLL:
+        debut = 16
+    elif type_lien == LIEN_LINUX_SLL2:
+        debut = 20
+    elif type_lien == LIEN_NULL or type_lien == LIEN_LOOP:
+        debut = 4
+    else:
+        return None
+    if taille < debut + 20:
+        return None
+
+    # Couche réseau
+    version = donnees[debut] >> 4
+    if version == 4:
+        version_ihl, longueur_totale, fragment, protocole, source, destination = IPV4.unpack_from(donnees, debut)
+        source = adresse_ipv4(source)
+        destination = adresse_ipv4(destination)
+        entete_ip = (version_ihl & 0x0F) * 4
+        charge = longueur_totale - entete_ip
+        debut += entete_ip
+        if fragment & 0x1FFF:
+            # Fragment suivant : pas d'en-tête de transport (tcpdump n'affiche pas de longueur)
+            return Paquet(horodatage, source, '', destination, '', "IP", '', None, None, None, 0)
+    elif version == 6:
+        if taille < debut + 40:
+            return None
+        charge, protocole, source, destination = IPV6.unpack_from(donnees, debut)
+        source = adresse_ipv6(source)
+        destination = adresse_ipv6(destination)
+        debut += 40
+        while protocole in EXTENSIONS_IPV6 and taille >= debut + 8:
+            longueur = (donnees[debut + 1] + 1) * 8
+            protocole = donnees[debut]
+            debut += longueur
+            charge -= longueur
+        if protocole == FRAGMENT_IPV6 and taille >= debut + 8:
+            premier = not ENTIER_16.unpack_from(donnees, debut + 2)[0] & 0xFFF8
+            protocole = donnees[debut]
+            debut += 8
+            charge -= 8
+            if not premier:
+                return Paquet(horodatage, source, '', destination, '', "IP", '', None, None, None, 0)
+    else:
+        return None
+
+    # Couche transport
+    if protocole == 6 and taille >= debut + 16:
+        port_source, port_destination, seq, ack, decalage, flags, win = TCP.unpack_from(donnees, debut)
+        longueur = max(charge - (decalage >> 4) * 4, 0)
+        return Paquet(
+            horodatage, source, nom_port(port_source, "tcp"), destination, nom_port(port_destination, "tcp"),
+            "TCP", FLAGS_TCP[flags],
+            # Comme tcpdump : seq n'est affiché qu'avec des données ou SYN/FIN/RST, ack qu'avec ACK
+            seq if longueur or flags & SYN_FIN_RST else None,
+            ack if flags & ACK else None,
+            win,
+            longueur,
+        )
+    if protocole == 17 and taille >= debut + 8:
+        port_source, port_destination, longueur = UDP.unpack_from(donnees, debut)
+        return Paquet(horodatage, source, nom_port(port_source, "udp"), destination, nom_port(port_destination, "udp"),
+                      "UDP", '', None, None, None, max(longueur - 8, 0))
+    if (protocole == 1 or protocole == 58) and taille > debut:
+        type_icmp = donnees[debut]
+        libelle = (TYPES_ICMP if protocole == 1 else TYPES_ICMP6).get(type_icmp) or f"type-#{type_icmp}"
+        return Paquet(horodatage, source, '', destination, '', "ICMP", libelle, None, None, None, charge)
+    return Paquet(horodatage, source, '', destination, '', "IP", '', None, None, None, charge)
+
+def decoder_paquets(enregistrements):
+    """
+    Deuxième étage de la lecture binaire, équivalent de lire_paquets() pour le texte.
+
+    :param enregistrements: Itérable de triplets de lire_enregistrements()
+    :return: Générateur de Paquet (les paquets non IP sont ignorés)
+    """
+    for horodatage, type_lien, donnees in enregistrements:
+        paquet = decoder_paquet(horodatage, type_lien, donnees)
+        if paquet is not None:
+            yield paquet
+
+def lire_pcap(fichier):
+    """
+    :param fichier: Chemin d'une capture pcap ou pcapng (éventuellement compressée)
+    :return: Générateur de Paquet
+    """
+    return decoder_paquets(lire_enregistrements(fichier))
+
+def lire_capture(fichier):
+    """
+    :param fichier: Chemin d'une capture texte, pcap ou pcapng (éventuellement compressée)
+    :return: Générateur de Paquet, quel que soit le format
+    """
+    if format_capture(fichier) is not None:
+        return lire_pcap(fichier)
+    return lire_paquets(lire_entetes(fichier))
+
+def ligne_tcpdump(paquet):
+    """
+    Ligne d'en-tête que tcpdump aurait affichée pour un paquet (sans les options TCP) ;
+    parse_tcpdump_line() en redonne le même Paquet.
+
+    :param paquet: Paquet
+    :return: Ligne, retour à la ligne compris
+    """
+    microsecondes = round(paquet.horodatage * 1e6)
+    secondes, micro = divmod(microsecondes, 1000000)
+    heure = f"{secondes // 3600 % 24:02}:{secondes // 60 % 60:02}:{secondes % 60:02}.{micro:06}"
+    ip = "IP6" if ":" in paquet.source else "IP"
+    source = f"{paquet.source}.{paquet.port_source}" if paquet.port_source else paquet.source
+    destination = f"{paquet.destination}.{paquet.port_destination}" if paquet.port_destination else paquet.destination
+
+    if paquet.protocole == "TCP":
+        champs = [f"Flags [{paquet.flags}]"]
+        if paquet.seq is not None:
+            champs.append(f"seq {paquet.seq}:{paquet.seq + paquet.longueur}" if paquet.longueur else f"seq {paquet.seq}")
+        if paquet.ack is not None:
+            champs.append(f"ack {paquet.ack}")
+        champs.append(f"win {paquet.win}")
+        champs.append(f"length {paquet.longueur}")
+        details = ", ".join(champs)
+    elif paquet.protocole == "UDP":
+        details = f"UDP, length {paquet.longueur}"
+    elif paquet.protocole == "ICMP":
+        details = f"ICMP {paquet.flags}, length {paquet.longueur}"
+    else:
+        details = f"ip-proto, length {paquet.longueur}" if paquet.longueur else "ip-proto"
+    return f"{heure} {ip} {source} > {destination}: {details}\n"
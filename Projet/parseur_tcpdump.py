@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""
+Lecture structurée des lignes d'une capture tcpdump.
+
+Chaque ligne d'en-tête ("11:42:04.766656 IP src.port > dst.port: ...") est
+analysée une seule fois et transformée en enregistrement Paquet ; les autres
+lignes (dump hexadécimal, lignes vides...) sont ignorées.
+"""
+
+import mmap
+import os
+import re
+import sys
+from collections import namedtuple
+from functools import lru_cache
+
+from decompression import compression_fichier, lire_entetes_compresses
+
+# Enregistrement compact d'un paquet (namedtuple : pas de dictionnaire par instance)
+#  - horodatage : secondes depuis minuit (float)
+#  - protocole : "TCP", "UDP", "ICMP" ou "IP" si rien ne permet de le deviner
+#  - flags : flags TCP ("S", "S.", "P."...) ou type du message ICMP ("echo request")
+#  - seq, ack, win : entiers, ou None s'ils sont absents de la ligne
+#  - longueur : longueur annoncée par tcpdump ("length N" ou "(N)"), 0 si absente
+Paquet = namedtuple("Paquet", [
+    "horodatage", "source", "port_source", "destination", "port_destination",
+    "protocole", "flags", "seq", "ack", "win", "longueur",
+])
+
+# Une seule expression pour toute la ligne d'en-tête ; la destination se termine au
+# premier ":" suivi d'un espace (les adresses IPv6 contiennent elles-mêmes des ":")
+LIGNE_TCPDUMP = re.compile(
+    r'(\d\d):(\d\d):(\d\d(?:\.\d+)?) IP6? (?P<source>\S+) > (?P<destination>\S+?):(?= |$)'
+    r'(?: Flags \[(?P<flags>[^\]]*)\](?:, seq (?P<seq>\d+)(?::\d+)?)?(?:, ack (?P<ack>\d+))?(?:, win (?P<win>\d+))?'
+    r'| ICMP (?P<icmp>[^,\n]+))?'
+    r'(?:.*length (?P<longueur>\d+)|.*\((?P<longueur_dns>\d+)\)$)?'
+)
+
+# Fin d'un bloc de lignes de suite (dump hexadécimal "\t0x0000:  4512 ...") : ces
+# lignes commencent par une tabulation ou un espace, le bloc s'arrête à la première
+# ligne qui ne commence pas ainsi. Le bloc est sauté d'un coup, sans être décodé.
+FIN_BLOC_SUITE = re.compile(rb'\n[^\t ]')
+
+@lru_cache(maxsize=65536)
+def separer_port(jeton):
+    """
+    Sépare l'hôte et le port d'un jeton tcpdump ("BP-Linux8.ssh", "192.168.1.2.50019").
+
+    :param jeton: Adresse telle qu'affichée par tcpdump
+    :return: Couple (hôte, port) ; le port vaut "" si le jeton n'en contient pas
+    """
+    hote, point, port = jeton.rpartition('.')
+    if not point:
+        return sys.intern(jeton), ''
+    # Adresse IPv4 seule (a.b.c.d) : le dernier octet n'est pas un port
+    if port.isdigit() and hote.count('.') == 2 and hote.replace('.', '').isdigit():
+        return sys.intern(jeton), ''
+    # Un seul objet par hôte, quel que soit le port : les dictionnaires indexés par
+    # hôte comparent alors les clés par identité, et chaque nom n'est gardé qu'une fois
+    return sys.intern(hote), port
+
+def parse_tcpdump_line(ligne):
+    """
+    Analyse une ligne tcpdump et retourne l'enregistrement du paquet correspondant.
+
+    :param ligne: Ligne brute du fichier tcpdump
+    :return: Paquet, ou None si la ligne n'est pas une ligne d'en-tête IP
+    """
+    match = LIGNE_TCPDUMP.match(ligne)
+    if match is None:
+        return None
+
+    (heures, minutes, secondes, source, destination, flags, seq, ack, win, icmp,
+     longueur, longueur_dns) = match.groups()
+    longueur = int(longueur or longueur_dns or 0)
+    horodatage = int(heures) * 3600 + int(minutes) * 60 + float(secondes)
+
+    if icmp is not None:
+        # Pas de port en ICMP : le dernier octet d'une adresse ne doit pas être coupé
+        return Paquet(horodatage, sys.intern(source), '', sys.intern(destination), '', "ICMP", icmp, None, None, None,
+                      longueur)
+
+    source, port_source = separer_port(source)
+    destination, port_destination = separer_port(destination)
+    if flags is not None:
+        protocole = "TCP"
+    elif port_destination:
+        protocole = "UDP"
+    else:
+        protocole = "IP"
+
+    return Paquet(
+        horodatage, source, port_source, destination, port_destination, protocole, flags or '',
+        int(seq) if seq else None,
+        int(ack) if ack else None,
+        int(win) if win else None,
+        longueur,
+    )
+
+def lire_entetes(fichier, debut=0, fin=None):
+    """
+    Lit les lignes d'en-tête d'une capture via mmap, sans passer par un fichier texte :
+    les blocs de dump hexadécimal sont sautés sans être décodés et seules les lignes
+    commençant par un chiffre (horodatage) sont converties en str. Une capture
+    compressée (gz, bz2, xz, zst) est décompressée au fil de la lecture.
+
+    :param fichier: Chemin du fichier tcpdump
+    :param debut: Position de début en octets (début de ligne)
+    :param fin: Position de fin en octets (début de ligne), None pour la fin du fichier
+    :return: Générateur de lignes d'en-tête, retour à la ligne compris
+    :raises ValueError: Si une tranche (debut, fin) est demandée dans une capture compressée
+    """
+    compression = compression_fichier(fichier)
+    if compression is not None:
+        if debut or fin is not None:
+            raise ValueError(f"{fichier} : une capture compressée ({compression}) ne se lit pas par tranches")
+        yield from lire_entetes_compresses(fichier, compression)
+        return
+
+    with open(fichier, "rb") as f:
+        taille = os.fstat(f.fileno()).st_size
+        fin = taille if fin is None else min(fin, taille)
+        if debut >= fin:
+            return  # mmap refuse les fichiers vides
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if hasattr(mmap, "MADV_SEQUENTIAL"):
+                mm.madvise(mmap.MADV_SEQUENTIAL)
+
+            position = debut
+            while position < fin:
+                octet = mm[position]
+                if octet == 9 or octet == 32:
+                    suite = FIN_BLOC_SUITE.search(mm, position, fin)
+                    position = suite.start() + 1 if suite else fin
+                    continue
+
+                suivante = mm.find(b'\n', position, fin) + 1 or fin
+                if 48 <= octet <= 57:
+                    ligne = mm[position:suivante]
+                    if ligne.endswith(b'\r\n'):
+                        ligne = ligne[:-2] + b'\n'
+                    yield ligne.decode("utf-8", errors="replace")
+                position = suivante
+
+def lire_paquets(lignes):
+    """
+    Transforme un flux de lignes tcpdump en flux de paquets.
+
+    :param lignes: Itérable de lignes (fichier ouvert, liste...)
+    :return: Générateur de Paquet, un par ligne d'en-tête
+    """
+    for ligne in lignes:
+        paquet = parse_tcpdump_line(ligne)
+        if paquet is not None:
+            yield paquet
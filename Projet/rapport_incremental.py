@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+"""
+Écriture incrémentale des rapports.
+
+Un rapport est une suite de sections ; chacune a une clé, l'empreinte des données
+dont elle est tirée et un producteur qui en donne le texte morceau par morceau.
+L'instantané du rendu précédent garde, pour chaque fichier, sa taille, sa date de
+modification et l'empreinte et la position (en octets) de chacune de ses sections.
+Au rendu suivant :
+
+- si aucune empreinte n'a changé et que le fichier est intact, il n'est pas réécrit ;
+- sinon seules les sections modifiées sont produites, les autres sont recopiées
+  telles quelles depuis l'ancien fichier.
+
+Le texte est écrit au fil de l'eau dans un fichier temporaire qui remplace l'ancien
+à la fin : aucun document complet n'est construit en mémoire.
+"""
+
+import hashlib
+import json
+import os
+
+TAILLE_BLOC = 1 << 20
+
+def hacher(hachage, donnee):
+    """
+    Ajoute une donnée au hachage élément par élément, sans construire sa représentation
+    complète en mémoire. Les dictionnaires sont parcourus dans leur ordre, qui est aussi
+    celui des rapports.
+
+    :param hachage: Objet de hashlib
+    :param donnee: Dictionnaire, liste, tuple ou valeur simple (hachée par son repr)
+    """
+    if isinstance(donnee, dict):
+        hachage.update(b"{")
+        for cle, valeur in donnee.items():
+            hacher(hachage, cle)
+            hachage.update(b":")
+            hacher(hachage, valeur)
+            hachage.update(b",")
+        hachage.update(b"}")
+    elif isinstance(donnee, (list, tuple)):
+        hachage.update(b"[")
+        for valeur in donnee:
+            hacher(hachage, valeur)
+            hachage.update(b",")
+        hachage.update(b"]")
+    else:
+        hachage.update(repr(donnee).encode("utf-8"))
+
+def empreinte_donnees(*donnees):
+    """
+    :param donnees: Données d'entrée d'une section (seulement celles qu'elle lit : une
+                    section ne change pas quand un autre compteur change)
+    :return: Hachage de ces données
+    """
+    hachage = hashlib.blake2b(digest_size=16)
+    hacher(hachage, donnees)
+    return hachage.hexdigest()
+
+def joindre_lignes(lignes):
+    """
+    Équivalent en flux de "\\n".join(lignes).
+
+    :param lignes: Itérable de chaînes
+    :return: Générateur des lignes, séparées par des retours à la ligne
+    """
+    for numero, ligne in enumerate(lignes):
+        yield "\n" + ligne if numero else ligne
+
+def lire_instantane(fichier):
+    """
+    :param fichier: Fichier JSON de l'instantané
+    :return: Dictionnaire chemin -> entrée (voir ecrire_sections()), vide si absent ou illisible
+    """
+    try:
+        with open(fichier, "r", encoding="utf-8") as f:
+            instantane = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+    # Les entrées d'un autre format (anciennes versions) sont ignorées
+    return {chemin: entree for chemin, entree in instantane.items() if isinstance(entree, dict)}
+
+def ecrire_instantane(fichier, instantane):
+    """
+    :param fichier: Fichier JSON de l'instantané (remplacé atomiquement)
+    :param instantane: Dictionnaire chemin -> entrée
+    """
+    temporaire = fichier + ".tmp"
+    with open(temporaire, "w", encoding="utf-8") as f:
+        json.dump(instantane, f)
+    os.replace(temporaire, fichier)
+
+def fichier_intact(chemin, precedent):
+    """
+    :param chemin: Fichier de rapport
+    :param precedent: Entrée de l'instantané pour ce fichier, ou None
+    :return: True si le fichier n'a pas été modifié depuis qu'il a été écrit
+    """
+    if precedent is None:
+        return False
+    try:
+        etat = os.stat(chemin)
+    except FileNotFoundError:
+        return False
+    return etat.st_size == precedent["taille"] and etat.st_mtime_ns == precedent["mtime_ns"]
+
+def sections_inchangees(chemin, sections, precedent):
+    """
+    :param chemin: Fichier de rapport
+    :param sections: Liste de triplets (clé, empreinte, producteur)
+    :param precedent: Entrée de l'instantané pour ce fichier, ou None
+    :return: True si le fichier peut être gardé tel quel
+    """
+    return (fichier_intact(chemin, precedent)
+            and [[cle, empreinte] for cle, empreinte, _ in sections]
+            == [section[:2] for section in precedent["sections"]])
+
+def recopier(source, destination, debut, fin):
+    """
+    :param source: Fichier ouvert en lecture binaire
+    :param destination: Fichier ouvert en écriture binaire
+    :param debut: Position du premier octet à recopier
+    :param fin: Position suivant le dernier octet à recopier
+    """
+    source.seek(debut)
+    reste = fin - debut
+    while reste > 0:
+        bloc = source.read(min(reste, TAILLE_BLOC))
+        if not bloc:
+            raise EOFError(f"{source.name} est plus court que prévu")
+        destination.write(bloc)
+        reste -= len(bloc)
+
+def ecrire_sections(chemin, sections, precedent=None, separateur="", encodage="utf-8"):
+    """
+    Écrit un rapport section par section, en recopiant depuis l'ancien fichier les
+    sections dont l'empreinte n'a pas changé.
+
+    :param chemin: Fichier de rapport
+    :param sections: Liste de triplets (clé, empreinte, producteur) ; producteur() renvoie
+                     un itérable de morceaux (str, ou bytes pour un contenu binaire)
+    :param precedent: Entrée de l'instantané pour ce fichier, ou None
+    :param separateur: Texte inséré entre deux sections
+    :param encodage: Encodage des morceaux de texte
+    :return: Couple (entrée de l'instantané pour le nouveau fichier, nombre de sections produites)
+    :raises OSError: Si le rapport ne peut pas être écrit ; le fichier temporaire est supprimé,
+                     comme pour une erreur d'un producteur
+    """
+    anciennes = {}
+    if fichier_intact(chemin, precedent):
+        anciennes = {cle: (empreinte, debut, fin) for cle, empreinte, debut, fin in precedent["sections"]}
+
+    table = []
+    produites = 0
+    temporaire = chemin + ".tmp"
+    ancien = open(chemin, "rb") if anciennes else None
+    try:
+        try:
+            with open(temporaire, "wb") as sortie:
+                for numero, (cle, empreinte, producteur) in enumerate(sections):
+                    if numero and separateur:
+                        sortie.write(separateur.encode(encodage))
+                    debut = sortie.tell()
+                    ancienne = anciennes.get(cle)
+                    if ancienne is not None and ancienne[0] == empreinte:
+                        recopier(ancien, sortie, ancienne[1], ancienne[2])
+                    else:
+                        for morceau in producteur():
+                            sortie.write(morceau if isinstance(morceau, bytes) else morceau.encode(encodage))
+                        produites += 1
+                    table.append([cle, empreinte, debut, sortie.tell()])
+        finally:
+            if ancien is not None:
+                ancien.close()
+        os.replace(temporaire, chemin)
+    except BaseException:
+        # Producteur en erreur, disque plein... : pas de fichier temporaire laissé derrière
+        try:
+            os.remove(temporaire)
+        except OSError:
+            pass
+        raise
+
+    etat = os.stat(chemin)
+    return {"taille": etat.st_size, "mtime_ns": etat.st_mtime_ns, "sections": table}, produites
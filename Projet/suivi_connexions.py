@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+"""
+Suivi des connexions TCP d'une capture tcpdump.
+
+Chaque flux est identifié par ses deux extrémités (hôte, port), dans un sens comme
+dans l'autre, et suit une petite machine à états :
+
+    SYN_ENVOYE --SYN+ACK--> SYN_RECU --ACK--> ETABLIE --FIN--> FERMETURE --FIN--> FERMEE
+
+Un RST mène à REINITIALISEE depuis n'importe quel état ; un flux dont le premier
+paquet n'est pas un SYN (connexion ouverte avant la capture) démarre EN_COURS.
+La table est bornée : les flux inactifs depuis `delai_inactivite` secondes sont
+retirés et comptés dans le bilan, et au-delà de `max_connexions` le flux le moins
+récemment actif est retiré.
+"""
+
+import heapq
+from collections import OrderedDict
+
+SECONDES_PAR_JOUR = 86400
+
+SYN_ENVOYE = "SYN_ENVOYE"
+SYN_RECU = "SYN_RECU"
+ETABLIE = "ETABLIE"
+FERMETURE = "FERMETURE"
+FERMEE = "FERMEE"
+REINITIALISEE = "REINITIALISEE"
+EN_COURS = "EN_COURS"
+
+# Statut d'un flux dans le bilan, et libellé correspondant dans le compte rendu
+LIBELLES_STATUTS = {
+    "terminee": "Terminées (poignée de main puis FIN des deux côtés)",
+    "etablie": "Établies sans fermeture",
+    "semi_ouverte": "Semi-ouvertes (SYN sans établissement)",
+    "refusee": "Refusées (RST avant établissement)",
+    "reinitialisee": "Réinitialisées (RST après établissement)",
+    "en_cours": "Déjà ouvertes au début de la capture",
+}
+
+class Connexion:
+    """
+    Flux TCP : le client est l'extrémité qui a envoyé le premier paquet vu.
+    """
+    __slots__ = ("client", "port_client", "serveur", "port_serveur", "etat", "syn_vu", "etablie", "fin_client",
+                 "fin_serveur", "debut", "fin", "paquets", "octets")
+
+    def __init__(self, paquet, horodatage):
+        self.client = paquet.source
+        self.port_client = paquet.port_source
+        self.serveur = paquet.destination
+        self.port_serveur = paquet.port_destination
+        self.syn_vu = paquet.flags == "S"   # ouverture observée dans la capture
+        self.etat = SYN_ENVOYE if self.syn_vu else EN_COURS
+        self.etablie = False      # poignée de main complète observée
+        self.fin_client = False   # FIN envoyé par chaque extrémité
+        self.fin_serveur = False
+        self.debut = self.fin = horodatage
+        self.paquets = 0
+        self.octets = 0
+
+    def avancer(self, flags, du_client):
+        """
+        Fait évoluer l'état du flux selon les flags d'un paquet.
+
+        :param flags: Flags TCP tels qu'affichés par tcpdump ("S", "S.", "P.", "F.", "R"...)
+        :param du_client: True si le paquet va du client vers le serveur
+        """
+        etat = self.etat
+        if "R" in flags:
+            self.etat = REINITIALISEE
+            return
+        if etat == SYN_ENVOYE:
+            if "S" in flags and "." in flags and not du_client:
+                self.etat = SYN_RECU
+        elif etat == SYN_RECU:
+            if du_client and "." in flags and "S" not in flags:
+                self.etat = ETABLIE
+                self.etablie = True
+        if "F" in flags and self.etat in (ETABLIE, EN_COURS, FERMETURE):
+            if du_client:
+                self.fin_client = True
+            else:
+                self.fin_serveur = True
+            self.etat = FERMEE if self.fin_client and self.fin_serveur else FERMETURE
+
+    def statut(self):
+        """
+        :return: Clé de LIBELLES_STATUTS décrivant le flux
+        """
+        if self.etat == REINITIALISEE:
+            return "refusee" if self.syn_vu and not self.etablie else "reinitialisee"
+        if self.etablie:
+            return "terminee" if self.etat == FERMEE else "etablie"
+        if self.etat in (SYN_ENVOYE, SYN_RECU):
+            return "semi_ouverte"
+        return "en_cours"
+
+    def resume(self):
+        """
+        :return: Dictionnaire décrivant le flux (pour les rapports)
+        """
+        return {"client": f"{self.client}.{self.port_client}", "serveur": f"{self.serveur}.{self.port_serveur}",
+                "statut": self.statut(), "debut": self.debut, "duree": self.fin - self.debut,
+                "paquets": self.paquets, "octets": self.octets}
+
+class SuiviConnexions:
+    """
+    Table des flux TCP actifs et bilan des flux terminés.
+    """
+
+    def __init__(self, delai_inactivite=300.0, max_connexions=100000, nb_plus_volumineuses=10):
+        """
+        :param delai_inactivite: Secondes sans paquet après lesquelles un flux est retiré de la table
+        :param max_connexions: Nombre maximal de flux suivis simultanément (éviction LRU)
+        :param nb_plus_volumineuses: Nombre de flux les plus volumineux gardés pour le compte rendu
+        """
+        self.delai_inactivite = delai_inactivite
+        self.max_connexions = max_connexions
+        self.nb_plus_volumineuses = nb_plus_volumineuses
+        self.connexions = OrderedDict()   # clé du flux -> Connexion, du moins au plus récemment actif
+        self.statuts = dict.fromkeys(LIBELLES_STATUTS, 0)
+        self.octets = 0                   # octets des flux retirés de la table
+        self.duree_totale = 0.0
+        self.plus_volumineuses = []       # tas (octets, numéro, résumé) des plus gros flux retirés
+        self.nb_retirees = 0
+        self.decalage = 0                 # jours ajoutés quand la capture passe minuit
+        self.dernier_horodatage = None
+
+    def ajouter(self, paquet):
+        """
+        Met à jour le flux d'un paquet TCP (les autres paquets sont ignorés).
+
+        :param paquet: Paquet issu de parse_tcpdump_line()
+        """
+        if paquet.protocole != "TCP":
+            return
+
+        horodatage = paquet.horodatage + self.decalage
+        if self.dernier_horodatage is not None and horodatage < self.dernier_horodatage - SECONDES_PAR_JOUR / 2:
+            # Passage de minuit : les horodatages tcpdump repartent de zéro
+            self.decalage += SECONDES_PAR_JOUR
+            horodatage += SECONDES_PAR_JOUR
+        if self.dernier_horodatage is None or horodatage > self.dernier_horodatage:
+            self.dernier_horodatage = horodatage
+            self.expirer(horodatage)
+
+        aller = (paquet.source, paquet.port_source, paquet.destination, paquet.port_destination)
+        retour = (paquet.destination, paquet.port_destination, paquet.source, paquet.port_source)
+        cle = min(aller, retour)
+
+        connexion = self.connexions.get(cle)
+        if connexion is not None and paquet.flags == "S" and connexion.etat in (FERMEE, REINITIALISEE):
+            # Nouveau SYN sur un flux terminé : réutilisation des mêmes ports
+            self.retirer(cle)
+            connexion = None
+        if connexion is None:
+            connexion = self.connexions[cle] = Connexion(paquet, horodatage)
+            if len(self.connexions) > self.max_connexions:
+                self.retirer(next(iter(self.connexions)))
+        else:
+            self.connexions.move_to_end(cle)
+
+        du_client = paquet.source == connexion.client and paquet.port_source == connexion.port_client
+        connexion.avancer(paquet.flags, du_client)
+        connexion.paquets += 1
+        connexion.octets += paquet.longueur
+        if horodatage > connexion.fin:
+            connexion.fin = horodatage
+
+    def expirer(self, horodatage):
+        """
+        Retire les flux inactifs depuis plus de delai_inactivite secondes.
+
+        :param horodatage: Horodatage courant de la capture
+        """
+        limite = horodatage - self.delai_inactivite
+        connexions = self.connexions
+        # L'ordre de la table est celui de la dernière activité : seuls les premiers flux peuvent expirer
+        while connexions:
+            cle, connexion = next(iter(connexions.items()))
+            if connexion.fin >= limite:
+                break
+            self.retirer(cle)
+
+    def retirer(self, cle):
+        """
+        Retire un flux de la table et l'ajoute au bilan.
+
+        :param cle: Clé du flux
+        """
+        connexion = self.connexions.pop(cle)
+        self.statuts[connexion.statut()] += 1
+        self.octets += connexion.octets
+        self.duree_totale += connexion.fin - connexion.debut
+        self.nb_retirees += 1
+        entree = (connexion.octets, self.nb_retirees, connexion.resume())
+        if len(self.plus_volumineuses) < self.nb_plus_volumineuses:
+            heapq.heappush(self.plus_volumineuses, entree)
+        elif entree > self.plus_volumineuses[0]:
+            heapq.heapreplace(self.plus_volumineuses, entree)
+
+    def observer(self, paquets):
+        """
+        Étage de pipeline : met à jour la table au passage et retransmet les paquets.
+
+        :param paquets: Itérable de Paquet
+        :return: Générateur des mêmes paquets
+        """
+        for paquet in paquets:
+            self.ajouter(paquet)
+            yield paquet
+
+    def bilan(self):
+        """
+        Bilan de tous les flux vus, ceux encore dans la table compris (sans les retirer).
+
+        :return: Dictionnaire avec "statuts" (statut -> nombre de flux), "actives",
+                 "octets", "duree_moyenne" et "plus_volumineuses" (résumés, du plus gros au plus petit)
+        """
+        statuts = dict(self.statuts)
+        octets = self.octets
+        duree_totale = self.duree_totale
+        plus_volumineuses = list(self.plus_volumineuses)
+        for numero, connexion in enumerate(self.connexions.values(), self.nb_retirees + 1):
+            statuts[connexion.statut()] += 1
+            octets += connexion.octets
+            duree_totale += connexion.fin - connexion.debut
+            entree = (connexion.octets, numero, connexion.resume())
+            if len(plus_volumineuses) < self.nb_plus_volumineuses:
+                heapq.heappush(plus_volumineuses, entree)
+            elif entree > plus_volumineuses[0]:
+                heapq.heapreplace(plus_volumineuses, entree)
+
+        total = sum(statuts.values())
+        return {
+            "statuts": statuts,
+            "total": total,
+            "actives": len(self.connexions),
+            "octets": octets,
+            "duree_moyenne": duree_totale / total if total else 0.0,
+            "plus_volumineuses": [resume for _, _, resume in sorted(plus_volumineuses, reverse=True)],
+        }
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""
+Table de symboles : chaque nom d'hôte, port ou flag reçoit une seule fois un petit
+entier, et les compteurs travaillent ensuite sur ces entiers (colonnes NumPy, listes
+de StatistiquesTrafic) plutôt que sur des dictionnaires indexés par chaînes. Les noms
+ne sont retrouvés qu'au moment d'écrire les rapports, avec traduire().
+"""
+
+class TableSymboles:
+    """
+    Correspondance nom <-> identifiant, les identifiants étant attribués dans l'ordre
+    de première apparition (0, 1, 2...).
+    """
+    __slots__ = ("indices", "noms")
+
+    def __init__(self, noms=()):
+        """
+        :param noms: Noms déjà connus, dans l'ordre de leurs identifiants (sans doublon)
+        """
+        self.noms = list(noms)   # identifiant -> nom
+        self.indices = {nom: indice for indice, nom in enumerate(self.noms)}   # nom -> identifiant
+
+    def __len__(self):
+        return len(self.noms)
+
+    def __getitem__(self, identifiant):
+        return self.noms[identifiant]
+
+    def identifiant(self, nom):
+        """
+        :param nom: Nom d'hôte ou adresse
+        :return: Identifiant du nom (attribué s'il est nouveau)
+        """
+        indice = self.indices.get(nom)
+        if indice is None:
+            indice = self.indices[nom] = len(self.noms)
+            self.noms.append(nom)
+        return indice
+
+    def chercher(self, nom):
+        """
+        :param nom: Nom recherché
+        :return: Identifiant du nom, ou -1 s'il n'a jamais été vu
+        """
+        return self.indices.get(nom, -1)
+
+    def traduire(self, identifiants, valeurs):
+        """
+        Retrouve les noms pour les rapports.
+
+        :param identifiants: Itérable d'identifiants, dans l'ordre voulu
+        :param valeurs: Itérable des valeurs associées, dans le même ordre
+        :return: Dictionnaire nom -> valeur
+        """
+        noms = self.noms
+        return {noms[i]: valeur for i, valeur in zip(identifiants, valeurs)}
@@ -5,86 +5,63 @@ Created on Fri Dec 13 11:11:35 2024
 @author: aciac
 """
 import re
+from functools import lru_cache
 
-def tab(file_path):
-    """
-    Fonction pour lire un fichier ICS ligne par ligne et stocker chaque ligne dans un tableau.
+from calendrier_ics import CACHE_DATES, blocs_evenements, formater_duree, lire_date, lire_proprietes
+
+# Propriétés utilisées par parse_event()
+CHAMPS = ("UID", "DTSTART", "DTEND", "SUMMARY", "LOCATION", "DESCRIPTION")
+
+# Motifs de la description : semestre ("RT1-S1") et enseignants ("NOM PRENOM")
+SESSION = re.compile(r"RT1-(S\d)")
+ENSEIGNANTS = re.compile(r"([A-Z]+ [A-Z]+)")
 
-    :param file_path: Le chemin du fichier .ics
-    :return: Liste contenant les lignes du fichier.
+@lru_cache(maxsize=CACHE_DATES)
+def date_et_heure(valeur):
     """
-    lines = []  # Initialisation de la liste pour stocker les lignes
-    try:
-        with open(file_path, 'r', encoding='utf-8') as file:
-            # Lire le fichier ligne par ligne et ajouter chaque ligne à la liste
-            for line in file:
-                lines.append(line.strip())  # Ajouter la ligne après suppression des espaces et retours à la ligne
-    except FileNotFoundError:
-        print(f"Erreur: Le fichier '{file_path}' n'a pas été trouvé.")
-    except IOError:
-        print(f"Erreur: Impossible d'ouvrir le fichier '{file_path}'.")
+    :param valeur: DTSTART de l'événement
+    :return: Couple ("JJ-MM-AAAA", "HH:MM"), ou None si la valeur n'est pas une date
+    """
+    start = lire_date(valeur)
+    if start is None:
+        return None
+    return f"{start.day:02}-{start.month:02}-{start.year}", f"{start.hour:02}:{start.minute:02}"
 
-    return lines
+@lru_cache(maxsize=CACHE_DATES)
+def duree(debut, fin):
+    """
+    :param debut: DTSTART de l'événement
+    :param fin: DTEND de l'événement
+    :return: Durée "HH:MM" calculée sur les dates complètes (correcte à cheval sur minuit ou
+             sur plusieurs jours), ou None si une date manque ou si la fin précède le début
+    """
+    start, end = lire_date(debut), lire_date(fin)
+    if start is None or end is None or end < start:
+        return None
+    return formater_duree(end - start)
 
 def parse_event(lines):
     """
     Analyse les lignes d'un fichier ICS pour extraire les informations d'un événement unique.
 
-    :param lines: Liste des lignes représentant un événement ICS
+    :param lines: Liste des lignes logiques (dépliées) représentant un événement ICS
     :return: Chaîne formatée selon les spécifications ou "vide" pour les champs manquants.
     """
-    # Dictionnaire pour stocker les données d'événement
-    event_data = {
-        "UID": "vide",
-        "DTSTART": "vide",
-        "DTEND": "vide",
-        "SUMMARY": "vide",
-        "LOCATION": "vide",
-        "DESCRIPTION": "vide"
-    }
-
-    # Parcourir les lignes pour extraire les informations pertinentes
-    for line in lines:
-        if line.startswith("UID:"):
-            event_data["UID"] = line.split("UID:")[1]
-        elif line.startswith("DTSTART:"):
-            event_data["DTSTART"] = line.split("DTSTART:")[1]
-        elif line.startswith("DTEND:"):
-            event_data["DTEND"] = line.split("DTEND:")[1]
-        elif line.startswith("SUMMARY:"):
-            event_data["SUMMARY"] = line.split("SUMMARY:")[1]
-        elif line.startswith("LOCATION:"):
-            event_data["LOCATION"] = line.split("LOCATION:")[1]
-        elif line.startswith("DESCRIPTION:"):
-            event_data["DESCRIPTION"] = line.split("DESCRIPTION:")[1]
-
-    # Transformer DTSTART et DTEND pour extraire la date et l'heure
-    start_match = re.match(r"(\d{4})(\d{2})(\d{2})T(\d{2})(\d{2})", event_data["DTSTART"])
-    end_match = re.match(r"(\d{4})(\d{2})(\d{2})T(\d{2})(\d{2})", event_data["DTEND"])
-
-    if start_match and end_match:
-        start_date = f"{start_match.group(3)}-{start_match.group(2)}-{start_match.group(1)}"
-        start_time = f"{start_match.group(4)}:{start_match.group(5)}"
-        end_time = f"{end_match.group(4)}:{end_match.group(5)}"
+    # Propriétés de l'événement (lignes dépliées, paramètres séparés), "vide" pour les champs manquants
+    proprietes = lire_proprietes(lines)
+    event_data = {nom: proprietes.get(nom, "vide") for nom in CHAMPS}
+
+    # Date, heure et durée, mémorisées : les exports ADE répètent les mêmes valeurs
+    start = date_et_heure(event_data["DTSTART"])
+    duration = duree(event_data["DTSTART"], event_data["DTEND"])
+    if start is not None and duration is not None:
+        start_date, start_time = start
     else:
-        start_date, start_time, end_time = "vide", "vide", "vide"
-
-    # Calculer la durée de l'événement
-    try:
-        start_hour, start_minute = map(int, start_time.split(":"))
-        end_hour, end_minute = map(int, end_time.split(":"))
-        duration_hours = end_hour - start_hour
-        duration_minutes = end_minute - start_minute
-        if duration_minutes < 0:
-            duration_hours -= 1
-            duration_minutes += 60
-        duration = f"{duration_hours:02}:{duration_minutes:02}"
-    except ValueError:
-        duration = "vide"
+        start_date, start_time, duration = "vide", "vide", "vide"
 
     # Extraire les détails de la description
-    session_match = re.search(r"RT1-(S\d)", event_data["DESCRIPTION"])
-    teacher_match = re.findall(r"([A-Z]+ [A-Z]+)", event_data["DESCRIPTION"])
+    session_match = SESSION.search(event_data["DESCRIPTION"])
+    teacher_match = ENSEIGNANTS.findall(event_data["DESCRIPTION"])
 
     session = session_match.group(1) if session_match else "vide"
     teachers = "|".join(teacher_match) if teacher_match else "vide"
@@ -103,6 +80,21 @@ def parse_event(lines):
 
     return formatted_output
 
+def iter_events(file_path):
+    """
+    Analyse un fichier ICS au fil de la lecture, un événement à la fois.
+
+    :param file_path: Le chemin du fichier ICS
+    :return: Générateur de chaînes de caractères formatées (voir parse_event())
+    """
+    try:
+        for lines in blocs_evenements(file_path):
+            yield parse_event(lines)
+    except FileNotFoundError:
+        print(f"Erreur: Le fichier '{file_path}' n'a pas été trouvé.")
+    except IOError:
+        print(f"Erreur: Impossible d'ouvrir le fichier '{file_path}'.")
+
 def parse_ics(file_path):
     """
     Analyse un fichier ICS contenant plusieurs événements et retourne un tableau de pseudo-CSV.
@@ -110,32 +102,15 @@ def parse_ics(file_path):
     :param file_path: Le chemin du fichier ICS
     :return: Liste de chaînes de caractères formatées
     """
-    lines = tab(file_path)
-    events = []
-    current_event = []
-
-    for line in lines:
-        if line == "BEGIN:VEVENT":
-            current_event = []  # Démarrer un nouvel événement
-        elif line == "END:VEVENT":
-            # Ajouter l'événement analysé à la liste
-            events.append(parse_event(current_event))
-            current_event = []
-        else:
-            current_event.append(line)
-
-    return events
+    return list(iter_events(file_path))
 
 def main():
     # Définir le chemin du fichier .ics
     file_path = "ADE_RT1_Septembre2023_Decembre2023.ics"  # Exemple de fichier
 
-    # Analyser le fichier ICS pour obtenir le tableau des événements
-    tableau = parse_ics(file_path)
-
-    # Afficher chaque événement formaté
+    # Analyser le fichier ICS et afficher chaque événement formaté dès qu'il est lu
     print("\nTableau des événements :")
-    for evenement in tableau:
+    for evenement in iter_events(file_path):
         print(evenement)
 
 # Point d'entrée du programme
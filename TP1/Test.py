@@ -5,11 +5,26 @@ Created on Fri Dec 13 12:00:00 2024
 Programme pour traiter le fichier texte "Fichier texte à traiter.txt"
 """
 
-import re
 import os
+import sys
 import csv
 from collections import defaultdict
 
+# Le parseur tcpdump est partagé avec le dossier Projet
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Projet"))
+from lecteur_pcap import format_capture, lire_pcap
+from parseur_tcpdump import lire_paquets
+
+def est_adresse_ip(hote):
+    """
+    Indique si un hôte est une adresse IPv4 (a.b.c.d) plutôt qu'un nom.
+
+    :param hote: Hôte extrait d'un paquet
+    :return: True pour une adresse IPv4
+    """
+    parties = hote.split('.')
+    return len(parties) == 4 and all(partie.isdigit() for partie in parties)
+
 def lire_fichier(file_path):
     """
     Lit le contenu d'un fichier texte et retourne les lignes sous forme de liste.
@@ -32,31 +47,36 @@ def extraire_informations(lignes):
     """
     Extrait les informations spécifiques des lignes du fichier texte.
     
-    :param lignes: Liste des lignes à traiter
+    :param lignes: Lignes à traiter (liste ou fichier ouvert)
+    :return: Liste des dictionnaires des informations extraites
+    """
+    return informations_paquets(lire_paquets(lignes))
+
+def informations_paquets(paquets):
+    """
+    Extrait les informations spécifiques de paquets déjà analysés (texte ou capture pcap).
+
+    :param paquets: Itérable de Paquet
     :return: Liste des dictionnaires des informations extraites
     """
     informations = []
-    
-    ip_pattern = re.compile(r'\b(?:[0-9]{1,3}\.){3}[0-9]{1,3}\b')
-    machine_name_pattern = re.compile(r'\b(?:[a-zA-Z0-9-_]+\.[a-zA-Z0-9-_]+)\b')
-    url_pattern = re.compile(r'\b(?:[a-zA-Z0-9-_]+\.[a-zA-Z0-9-_]+\.[a-zA-Z0-9-_]+)\b')
-    
-    for ligne in lignes:
-        if ligne.startswith("11:42"):
-            info = {
-                'nom_machine': None,
-                'adresse_ip': None,
-                'adresse_site_web': None
-            }
-            
-            if machine_name_match := machine_name_pattern.search(ligne):
-                info['nom_machine'] = machine_name_match.group()
-            if ip_match := ip_pattern.search(ligne):
-                info['adresse_ip'] = ip_match.group()
-            if url_match := url_pattern.search(ligne):
-                info['adresse_site_web'] = url_match.group()
-            
-            informations.append(info)
+
+    for paquet in paquets:
+        info = {
+            'nom_machine': None,
+            'adresse_ip': None,
+            'adresse_site_web': None
+        }
+
+        for hote in (paquet.source, paquet.destination):
+            if est_adresse_ip(hote):
+                info['adresse_ip'] = info['adresse_ip'] or hote
+            elif '.' in hote:
+                info['adresse_site_web'] = info['adresse_site_web'] or hote
+            else:
+                info['nom_machine'] = info['nom_machine'] or hote
+
+        informations.append(info)
     
     return informations
 
@@ -69,14 +89,14 @@ def compter_acces(informations):
     """
     acces = defaultdict(int)
     visites_site_web = defaultdict(int)
-    
+
     for info in informations:
-        if info['adresse_ip'] and info['adresse_site_web']:
-            key = (info['adresse_ip'], info['adresse_site_web'])
-            acces[key] += 1
-        if info['adresse_site_web']:
-            visites_site_web[info['adresse_site_web']] += 1
-    
+        site = info['adresse_site_web']
+        if site:
+            visites_site_web[site] += 1
+            if info['adresse_ip']:
+                acces[(info['adresse_ip'], site)] += 1
+
     return acces, visites_site_web
 
 def enregistrer_informations_csv(informations, file_path):
@@ -101,11 +121,15 @@ def main():
     # Définir le chemin du fichier texte
     file_path = "Projet/tcpdump.txt"  # Utiliser un chemin relatif
     
-    # Lire le fichier et obtenir les lignes
-    lignes = lire_fichier(file_path)
-    
-    # Extraire les informations des lignes lues
-    informations = extraire_informations(lignes)
+    if os.path.exists(file_path) and format_capture(file_path) is not None:
+        # Capture pcap / pcapng : les paquets sont décodés directement
+        informations = informations_paquets(lire_pcap(file_path))
+    else:
+        # Lire le fichier et obtenir les lignes
+        lignes = lire_fichier(file_path)
+
+        # Extraire les informations des lignes lues
+        informations = extraire_informations(lignes)
     
     # Enregistrer les informations extraites dans un fichier CSV
     csv_file_path = "Projet/informations_extraites.csv"
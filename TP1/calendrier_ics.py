@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+"""
+Lecture en flux des calendriers ICS.
+
+Le fichier est lu par blocs et découpé en événements au fil de la lecture : seules
+les lignes de l'événement en cours sont gardées en mémoire, quelle que soit la
+taille du calendrier (là où tab() chargeait toutes les lignes dans une liste).
+
+Les propriétés sont découpées selon la RFC 5545 : lignes de continuation dépliées,
+paramètres (DTSTART;TZID=...:) séparés du nom, propriétés répétables (EXDATE,
+RDATE, ATTENDEE...) gardées en liste, composants imbriqués (VALARM) ignorés.
+Les dates sont lues par découpage à positions fixes et mémorisées : les exports
+ADE répètent les mêmes DTSTART/DTEND d'un événement à l'autre.
+"""
+
+from datetime import datetime
+from functools import lru_cache
+
+# Taille des lectures du fichier, en caractères
+TAILLE_BLOC = 1 << 16
+
+# Nombre de dates distinctes gardées en mémoire par lire_date()
+CACHE_DATES = 1 << 14
+
+def lignes_fichier(fichier, taille_bloc=TAILLE_BLOC):
+    """
+    :param fichier: Chemin du fichier .ics
+    :param taille_bloc: Taille des lectures, en caractères
+    :return: Générateur des lignes du fichier, sans retour à la ligne ("\r\n" compris) ;
+             l'espace qui ouvre les lignes de continuation est conservé
+    """
+    with open(fichier, "r", encoding="utf-8") as f:
+        reste = ""
+        for bloc in iter(lambda: f.read(taille_bloc), ""):
+            lignes = (reste + bloc).split("\n")
+            # La dernière ligne du bloc peut être coupée : elle attend le bloc suivant
+            reste = lignes.pop()
+            yield from lignes
+        if reste:
+            yield reste
+
+def blocs_evenements(fichier, taille_bloc=TAILLE_BLOC):
+    """
+    :param fichier: Chemin du fichier .ics
+    :param taille_bloc: Taille des lectures, en caractères
+    :return: Générateur des listes de lignes logiques de chaque événement, sans BEGIN:VEVENT
+             ni END:VEVENT : une ligne ouverte par une espace ou une tabulation prolonge la
+             précédente (RFC 5545, 3.1) ; les lignes vides sont ignorées
+    """
+    evenement = None
+    for ligne in lignes_fichier(fichier, taille_bloc):
+        if evenement is None:
+            if ligne == "BEGIN:VEVENT":
+                evenement = []
+        elif ligne.startswith((" ", "\t")):
+            # Ligne de continuation : dépliée au passage
+            if evenement:
+                evenement[-1] += ligne[1:]
+        elif ligne == "END:VEVENT":
+            yield evenement
+            evenement = None
+        elif ligne:
+            evenement.append(ligne)
+
+def decouper_propriete(ligne):
+    """
+    :param ligne: Ligne logique "NOM;PARAM=...:valeur"
+    :return: Triplet (nom en majuscules, paramètres sous forme de texte brut, valeur)
+    """
+    tete, _, valeur = ligne.partition(":")
+    if tete.count('"') % 2:
+        # Guillemet non refermé : le premier ":" était dans une valeur de paramètre
+        # entre guillemets (ALTREP="http://..."), on cherche le premier hors guillemets
+        position = 0
+        while True:
+            deux_points = ligne.find(":", position)
+            guillemet = ligne.find('"', position)
+            if guillemet < 0 or deux_points < guillemet:
+                break
+            position = ligne.find('"', guillemet + 1) + 1
+            if not position:
+                deux_points = -1
+                break
+        tete, valeur = (ligne, "") if deux_points < 0 else (ligne[:deux_points], ligne[deux_points + 1:])
+    nom, _, parametres = tete.partition(";")
+    return nom if nom.isupper() else nom.upper(), parametres, valeur
+
+def lire_parametres(texte):
+    """
+    :param texte: Paramètres bruts d'une propriété ("TZID=Europe/Paris;VALUE=DATE-TIME")
+    :return: Dictionnaire nom (en majuscules) -> valeur, guillemets retirés
+    """
+    parametres = {}
+    while texte:
+        nom, _, texte = texte.partition("=")
+        if texte.startswith('"'):
+            fin = texte.find('"', 1)
+            fin = len(texte) if fin < 0 else fin
+            valeur, texte = texte[1:fin], texte[fin + 1:]
+            texte = texte[1:] if texte.startswith(";") else texte
+        else:
+            valeur, _, texte = texte.partition(";")
+        parametres[nom.upper()] = valeur
+    return parametres
+
+class Evenement(dict):
+    """
+    Propriétés d'un événement : nom -> valeur (texte brut, non déséchappé), ou liste des
+    valeurs pour les propriétés répétables. Les paramètres des propriétés qui en ont
+    sont dans l'attribut parametres (nom -> dictionnaire, ceux de la dernière occurrence).
+    """
+    __slots__ = ("parametres",)
+
+    def __init__(self):
+        super().__init__()
+        self.parametres = {}
+
+def ajouter_valeur(evenement, nom, valeur):
+    """
+    Propriété répétable : la valeur s'ajoute à la liste des précédentes.
+    """
+    if nom in evenement:
+        evenement[nom].append(valeur)
+    else:
+        evenement[nom] = [valeur]
+
+# Traitement des propriétés qu'un VEVENT peut contenir plusieurs fois (RFC 5545, 3.6.1) :
+# gardées en liste ; les autres remplacent la précédente
+TRAITEMENTS = dict.fromkeys(
+    ("ATTACH", "ATTENDEE", "CATEGORIES", "COMMENT", "CONTACT", "EXDATE", "RDATE", "RELATED-TO", "RESOURCES",
+     "REQUEST-STATUS"),
+    ajouter_valeur)
+
+def lire_proprietes(lignes):
+    """
+    :param lignes: Lignes logiques (dépliées) d'un événement, voir blocs_evenements()
+    :return: Evenement
+    """
+    evenement = Evenement()
+    imbrication = 0
+    for ligne in lignes:
+        # Cas courant découpé sur place ; decouper_propriete() pour les paramètres entre guillemets
+        tete, _, valeur = ligne.partition(":")
+        if '"' in tete:
+            nom, parametres, valeur = decouper_propriete(ligne)
+        else:
+            nom, _, parametres = tete.partition(";")
+            if not nom.isupper():
+                nom = nom.upper()
+        if nom == "BEGIN":
+            imbrication += 1
+        elif nom == "END":
+            imbrication -= 1
+        elif not imbrication:
+            if nom in TRAITEMENTS:
+                TRAITEMENTS[nom](evenement, nom, valeur)
+            else:
+                evenement[nom] = valeur
+            if parametres:
+                evenement.parametres[nom] = lire_parametres(parametres)
+    return evenement
+
+def lire_evenements(fichier, taille_bloc=TAILLE_BLOC):
+    """
+    :param fichier: Chemin du fichier .ics
+    :param taille_bloc: Taille des lectures, en caractères
+    :return: Générateur d'Evenement, un par VEVENT
+    """
+    for lignes in blocs_evenements(fichier, taille_bloc):
+        yield lire_proprietes(lignes)
+
+@lru_cache(maxsize=CACHE_DATES)
+def lire_date(valeur):
+    """
+    :param valeur: Date ICS "AAAAMMJJ" ou date-heure "AAAAMMJJTHHMMSS", suivie ou non de "Z"
+    :return: datetime (heure telle qu'écrite : UTC pour les valeurs en "Z", sans fuseau),
+             ou None si la valeur n'est pas une date
+    """
+    if valeur.endswith("Z"):
+        valeur = valeur[:-1]
+    try:
+        # Forme compacte lue par fromisoformat() depuis Python 3.11
+        return datetime.fromisoformat(valeur)
+    except ValueError:
+        pass
+    # Versions précédentes : découpage à positions fixes
+    try:
+        if len(valeur) == 8:
+            return datetime(int(valeur[:4]), int(valeur[4:6]), int(valeur[6:8]))
+        if len(valeur) != 15 or valeur[8] != "T":
+            return None
+        return datetime(int(valeur[:4]), int(valeur[4:6]), int(valeur[6:8]),
+                        int(valeur[9:11]), int(valeur[11:13]), int(valeur[13:15]))
+    except ValueError:
+        return None
+
+def formater_duree(duree):
+    """
+    :param duree: timedelta positif ou nul
+    :return: "HH:MM", les heures pouvant dépasser 24 pour un événement sur plusieurs jours
+    """
+    minutes = int(duree.total_seconds()) // 60
+    return f"{minutes // 60:02}:{minutes % 60:02}"
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""
+Calendrier indexé : les événements d'un fichier ICS, construits une seule fois, avec
+des index secondaires par date, salle, enseignant, ressource, groupe et type de séance.
+
+Les événements sont rangés par date de début : les numéros d'événements sont donc
+dans l'ordre chronologique, une période est un intervalle de numéros (bisect) et
+chaque index associe une clé à la liste triée des numéros concernés. Une recherche
+part de la liste la plus courte, la restreint à la période et vérifie les autres
+critères sur les seuls candidats restants.
+"""
+
+import re
+from bisect import bisect_left
+from datetime import datetime
+
+from calendrier_ics import lire_date
+
+# Critères de recherche (arguments de CalendrierIndexe.rechercher())
+CRITERES = ("salle", "enseignant", "ressource", "groupe", "type_seance")
+TYPES_SEANCE = ("CM", "TD", "TP")
+
+# Code de ressource ou de SAE en tête du résumé ("R1.07 TP", "SAE1.01 ...", "R1.01c ...")
+RESSOURCE = re.compile(r"(?:R|SAE)\d+\.\w+")
+# Ligne de groupe de la description ("RT1-TP A1", "RT1-TD B", "RT1-S1", "RT3-TD C (CYBER)")
+GROUPE = re.compile(r"RT\d-(\S+(?: \S+)?)")
+# Sous-groupe d'un groupe de TD/TP : "A" pour "TP A1" et "TD A"
+LETTRE_GROUPE = re.compile(r"(?:TD|TP) ([A-Z])(\d*)$")
+# Ligne d'enseignant ("NOM PRENOM", en majuscules)
+ENSEIGNANT = re.compile(r"[A-Z][A-Z'-]*(?: [A-Z][A-Z'-]*)+$")
+
+def salles(location):
+    """
+    :param location: Propriété LOCATION brute ("G_002\\,D_110")
+    :return: Tuple des salles
+    """
+    return tuple(salle.strip() for salle in location.replace("\\,", ",").split(",") if salle.strip())
+
+def details_description(description):
+    """
+    :param description: Propriété DESCRIPTION brute ("\\n\\nRT1-TP A1\\nLACAN DAVID\\n(Exporté le:...)\\n")
+    :return: Couple (groupes, enseignants), tuples de chaînes
+    """
+    groupes, enseignants = [], []
+    for ligne in description.split("\\n"):
+        ligne = ligne.strip()
+        correspondance = GROUPE.match(ligne)
+        if correspondance:
+            groupes.append(correspondance.group(1))
+        elif ENSEIGNANT.match(ligne):
+            enseignants.append(ligne)
+    return tuple(groupes), tuple(enseignants)
+
+def cles_groupe(groupe):
+    """
+    :param groupe: Groupe de la description ("TP A1")
+    :return: Clés d'index du groupe : lui-même, son sous-groupe ("A1") et sa lettre ("A")
+    """
+    cles = {groupe}
+    correspondance = LETTRE_GROUPE.match(groupe)
+    if correspondance:
+        lettre, numero = correspondance.groups()
+        cles.add(lettre)
+        if numero:
+            cles.add(lettre + numero)
+    return cles
+
+def cles_evenement(evenement):
+    """
+    :param evenement: Dictionnaire des propriétés d'un événement (SUMMARY, LOCATION, DESCRIPTION)
+    :return: Ensemble de couples (critère, clé) ; les clés sont en majuscules
+    """
+    resume = evenement.get("SUMMARY", "")
+    groupes, enseignants = details_description(evenement.get("DESCRIPTION", ""))
+    cles = {("salle", salle.upper()) for salle in salles(evenement.get("LOCATION", ""))}
+    cles.update(("enseignant", enseignant) for enseignant in enseignants)
+    ressource = RESSOURCE.match(resume)
+    if ressource:
+        cles.add(("ressource", ressource.group().upper()))
+    for groupe in groupes:
+        cles.update(("groupe", cle.upper()) for cle in cles_groupe(groupe))
+
+    # Type de séance : écrit dans le résumé ("R1.07 DS TP 2H"), sinon déduit du groupe
+    mots = resume.upper().split()
+    types = [type_seance for type_seance in TYPES_SEANCE if type_seance in mots]
+    if not types:
+        types = {groupe[:2] for groupe in groupes if groupe[:2] in TYPES_SEANCE} or ({"CM"} if groupes else set())
+    cles.update(("type_seance", type_seance) for type_seance in types)
+    return cles
+
+class CalendrierIndexe:
+    """
+    Événements indexés, construits une fois à partir de parse_ics() (dictionnaires
+    contenant au moins DTSTART, SUMMARY, LOCATION et DESCRIPTION).
+    """
+    __slots__ = ("evenements", "debuts", "cles", "index")
+
+    def __init__(self, evenements):
+        """
+        :param evenements: Itérable de dictionnaires d'événements
+        """
+        dates = []
+        for evenement in evenements:
+            debut = lire_date(evenement.get("DTSTART", ""))
+            # Les événements sans date sont rangés après tous les autres
+            dates.append((debut or datetime.max, len(dates), evenement))
+        dates.sort(key=lambda element: element[:2])
+
+        self.evenements = [evenement for _, _, evenement in dates]
+        self.debuts = [debut for debut, _, _ in dates]
+        self.cles = []
+        self.index = {critere: {} for critere in CRITERES}
+        for numero, evenement in enumerate(self.evenements):
+            cles = frozenset(cles_evenement(evenement))
+            self.cles.append(cles)
+            # Numéros croissants : chaque liste de l'index reste triée
+            for critere, cle in cles:
+                self.index[critere].setdefault(cle, []).append(numero)
+
+    def __len__(self):
+        return len(self.evenements)
+
+    def valeurs(self, critere):
+        """
+        :param critere: Un des CRITERES
+        :return: Liste triée des clés connues pour ce critère
+        """
+        return sorted(self.index[critere])
+
+    def rechercher(self, debut=None, fin=None, **criteres):
+        """
+        :param debut: Début de la période (datetime inclus), ou None
+        :param fin: Fin de la période (datetime exclu), ou None
+        :param criteres: Valeurs recherchées, par critère (salle="G_019", enseignant="LACAN DAVID",
+                         ressource="R1.07", groupe="A", type_seance="TP") ; la casse est ignorée
+        :return: Liste des événements correspondant à tous les critères, par date de début
+        :raises ValueError: Pour un critère inconnu
+        """
+        demandes = set()
+        for critere, valeur in criteres.items():
+            if critere not in self.index:
+                raise ValueError(f"Critère inconnu : {critere} (attendus : {', '.join(CRITERES)})")
+            if valeur is not None:
+                demandes.add((critere, valeur.strip().upper()))
+
+        premier = 0 if debut is None else bisect_left(self.debuts, debut)
+        dernier = len(self.debuts) if fin is None else bisect_left(self.debuts, fin)
+        if not demandes:
+            return self.evenements[premier:dernier]
+
+        # Liste la plus courte, restreinte à la période, puis vérification des autres critères
+        listes = [self.index[critere].get(cle, []) for critere, cle in demandes]
+        candidats = min(listes, key=len)
+        candidats = candidats[bisect_left(candidats, premier):bisect_left(candidats, dernier)]
+        return [self.evenements[numero] for numero in candidats if demandes <= self.cles[numero]]
@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+"""
+Index inversé plein texte d'un calendrier ICS.
+
+Les mots de SUMMARY, DESCRIPTION et LOCATION sont normalisés (échappements ICS
+retirés, casse ignorée, accents supprimés : "Exporté" -> "exporte") et associés à
+la liste triée des événements qui les contiennent. Les événements sont rangés par
+date de début : les résultats sortent dans l'ordre de l'agenda. Une recherche de
+plusieurs mots intersecte (ET) ou réunit (OU) ces listes ; les mots de la requête
+sont découpés comme ceux du calendrier ("TP," -> "tp") et un mot terminé par "*"
+désigne tous les mots du vocabulaire qui commencent ainsi (recherche dichotomique
+dans le vocabulaire trié).
+
+L'index s'enregistre en JSON avec la taille et la date de modification du fichier
+ICS : charger_index() le réutilise tant que le calendrier n'a pas changé.
+"""
+
+import json
+import os
+import re
+import unicodedata
+from bisect import bisect_left
+from datetime import datetime
+
+from calendrier_ics import lire_date, lire_evenements
+
+# Propriétés indexées, et propriétés gardées pour afficher les résultats
+CHAMPS_INDEXES = ("SUMMARY", "DESCRIPTION", "LOCATION")
+CHAMPS_CONSERVES = ("UID", "DTSTART", "DTEND") + CHAMPS_INDEXES
+VERSION_INDEX = 2
+
+# Mot : lettres et chiffres, avec les séparateurs internes de "r1.07" ou "pierre-jean"
+MOT = re.compile(r"\w+(?:[.'-]\w+)*")
+SEPARATEURS = re.compile(r"[.'-]")
+# Échappements des valeurs TEXT (RFC 5545, 3.3.11)
+ECHAPPEMENT = re.compile(r"\\([\\;,nN])")
+
+def texte_ics(valeur):
+    """
+    :param valeur: Valeur TEXT brute ("G_002\\,D_110", "\\n\\nRT1-TP A1\\n")
+    :return: Texte déséchappé
+    """
+    return ECHAPPEMENT.sub(lambda m: "\n" if m.group(1) in "nN" else m.group(1), valeur)
+
+def normaliser(texte):
+    """
+    :param texte: Texte quelconque
+    :return: Texte sans casse ni accents ("Exporté" -> "exporte")
+    """
+    texte = unicodedata.normalize("NFKD", texte.casefold())
+    return "".join(caractere for caractere in texte if not unicodedata.combining(caractere))
+
+def mots(texte):
+    """
+    :param texte: Texte brut d'une propriété
+    :return: Ensemble des mots normalisés ; un mot composé ("pierre-jean") donne aussi ses parties
+    """
+    resultat = set()
+    for mot in MOT.findall(normaliser(texte_ics(texte))):
+        resultat.add(mot)
+        if SEPARATEURS.search(mot):
+            resultat.update(partie for partie in SEPARATEURS.split(mot) if partie)
+    return resultat
+
+def termes_requete(requete):
+    """
+    :param requete: Mots séparés par des espaces ("Lacan TP,", "(R1.0*)")
+    :return: Liste des termes normalisés, découpés comme les mots indexés ("lacan", "tp",
+             "r1.0*") ; le "*" d'un préfixe reste sur le dernier terme de son mot
+    """
+    termes = []
+    for morceau in requete.split():
+        prefixe = morceau.rstrip(")]}>.,;:!?\"'»").endswith("*")
+        trouves = MOT.findall(normaliser(morceau))
+        if prefixe and trouves:
+            trouves[-1] += "*"
+        termes.extend(trouves)
+    return termes
+
+class IndexTexte:
+    """
+    Index inversé : mot normalisé -> liste triée des numéros d'événements.
+    """
+    __slots__ = ("evenements", "postings", "vocabulaire")
+
+    def __init__(self, evenements=(), postings=None):
+        """
+        :param evenements: Itérable de dictionnaires d'événements (lire_evenements(), parse_ics())
+        :param postings: Index déjà calculé (relecture d'un fichier, événements déjà rangés),
+                         ou None pour le construire
+        """
+        self.evenements = [{champ: evenement.get(champ, "") for champ in CHAMPS_CONSERVES}
+                           for evenement in evenements]
+        if postings is None:
+            # Rangement par date de début (tri stable ; les événements sans date à la fin) :
+            # les numéros croissants des listes sont alors dans l'ordre de l'agenda
+            self.evenements.sort(key=lambda evenement: lire_date(evenement["DTSTART"]) or datetime.max)
+            postings = {}
+            for numero, evenement in enumerate(self.evenements):
+                for mot in set().union(*(mots(evenement[champ]) for champ in CHAMPS_INDEXES)):
+                    postings.setdefault(mot, []).append(numero)
+        self.postings = postings
+        self.vocabulaire = sorted(postings)
+
+    def __len__(self):
+        return len(self.evenements)
+
+    def numeros(self, terme):
+        """
+        :param terme: Mot recherché, ou préfixe terminé par "*"
+        :return: Ensemble des numéros des événements contenant ce mot (ou un mot de ce préfixe)
+        """
+        if not terme.endswith("*"):
+            return set(self.postings.get(normaliser(terme), ()))
+        prefixe = normaliser(terme[:-1])
+        numeros = set()
+        position = bisect_left(self.vocabulaire, prefixe)
+        while position < len(self.vocabulaire) and self.vocabulaire[position].startswith(prefixe):
+            numeros.update(self.postings[self.vocabulaire[position]])
+            position += 1
+        return numeros
+
+    def rechercher(self, requete, tous=True):
+        """
+        :param requete: Mots séparés par des espaces ("lacan tp", "r1.0*") ; la ponctuation est
+                        ignorée comme dans le calendrier (voir termes_requete())
+        :param tous: True pour les événements contenant tous les mots (ET), False pour au moins un (OU)
+        :return: Liste des événements trouvés, par date de début
+        """
+        termes = termes_requete(requete)
+        if not termes:
+            return []
+        # Ensembles les plus petits d'abord : l'intersection se réduit au plus vite
+        ensembles = sorted((self.numeros(terme) for terme in termes), key=len)
+        numeros = ensembles[0]
+        for ensemble in ensembles[1:]:
+            numeros = numeros & ensemble if tous else numeros | ensemble
+        return [self.evenements[numero] for numero in sorted(numeros)]
+
+    def enregistrer(self, fichier, source):
+        """
+        Enregistre l'index de façon atomique (fichier temporaire puis renommage).
+
+        :param fichier: Fichier JSON de l'index
+        :param source: Fichier ICS indexé (sa taille et sa date de modification sont notées)
+        :raises OSError: Si l'index ne peut pas être écrit (le fichier temporaire est alors supprimé)
+        """
+        etat = os.stat(source)
+        temporaire = fichier + ".tmp"
+        try:
+            with open(temporaire, "w", encoding="utf-8") as f:
+                json.dump({"version": VERSION_INDEX, "source": os.path.abspath(source), "taille": etat.st_size,
+                           "mtime_ns": etat.st_mtime_ns, "evenements": self.evenements, "postings": self.postings},
+                          f, ensure_ascii=False)
+            os.replace(temporaire, fichier)
+        except OSError:
+            # Disque plein, dossier en lecture seule... : pas de fichier temporaire laissé derrière
+            try:
+                os.remove(temporaire)
+            except OSError:
+                pass
+            raise
+
+def lire_index(fichier, source):
+    """
+    :param fichier: Fichier JSON de l'index
+    :param source: Fichier ICS indexé
+    :return: IndexTexte, ou None si le fichier est absent, illisible ou si le calendrier a changé
+    """
+    try:
+        with open(fichier, "r", encoding="utf-8") as f:
+            donnees = json.load(f)
+        etat = os.stat(source)
+    except (OSError, ValueError):
+        # Absent, illisible (droits, dossier...) ou corrompu : l'index est reconstruit
+        return None
+    if (donnees.get("version") != VERSION_INDEX or donnees.get("source") != os.path.abspath(source)
+            or donnees.get("taille") != etat.st_size or donnees.get("mtime_ns") != etat.st_mtime_ns):
+        return None
+    return IndexTexte(donnees["evenements"], donnees["postings"])
+
+def charger_index(source, fichier=None):
+    """
+    :param source: Fichier ICS
+    :param fichier: Fichier JSON de l'index (défaut : <source>.index.json)
+    :return: IndexTexte relu s'il est à jour, sinon construit à partir du calendrier et enregistré
+             (si possible : un index impossible à écrire est simplement reconstruit la fois suivante)
+    """
+    fichier = fichier or source + ".index.json"
+    index = lire_index(fichier, source)
+    if index is None:
+        index = IndexTexte(lire_evenements(source))
+        try:
+            index.enregistrer(fichier, source)
+        except OSError:
+            pass
+    return index